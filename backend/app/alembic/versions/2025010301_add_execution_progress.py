@@ -0,0 +1,27 @@
+"""Add progress to executions
+
+Revision ID: 2025010301
+Revises: 2025010201, b3b17c96f189
+Create Date: 2025-01-03 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2025010301'
+down_revision: Union[str, Sequence[str], None] = ('2025010201', 'b3b17c96f189')
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('executions', sa.Column('progress', postgresql.JSON(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('executions', 'progress')
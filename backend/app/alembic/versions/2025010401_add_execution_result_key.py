@@ -0,0 +1,28 @@
+"""Add result_key to executions
+
+Revision ID: 2025010401
+Revises: 2025010301
+Create Date: 2025-01-04 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2025010401'
+down_revision: Union[str, Sequence[str], None] = '2025010301'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('executions', sa.Column('result_key', sa.String(length=64), nullable=True))
+    op.create_index('ix_executions_result_key', 'executions', ['result_key'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_executions_result_key', table_name='executions')
+    op.drop_column('executions', 'result_key')
@@ -0,0 +1,42 @@
+"""Add post submit jobs table
+
+Revision ID: 2025010501
+Revises: 2025010401
+Create Date: 2025-01-05 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2025010501'
+down_revision: Union[str, None] = '2025010401'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'post_submit_jobs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column('execution_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('executions.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('run_after', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index('ix_post_submit_jobs_execution_id', 'post_submit_jobs', ['execution_id'], unique=True)
+    op.create_index('ix_post_submit_jobs_status_run_after', 'post_submit_jobs', ['status', 'run_after'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_post_submit_jobs_status_run_after', table_name='post_submit_jobs')
+    op.drop_index('ix_post_submit_jobs_execution_id', table_name='post_submit_jobs')
+    op.drop_table('post_submit_jobs')
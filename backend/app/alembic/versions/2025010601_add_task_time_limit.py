@@ -0,0 +1,26 @@
+"""Add time_limit_ms to tasks
+
+Revision ID: 2025010601
+Revises: 2025010501
+Create Date: 2025-01-06 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2025010601'
+down_revision: Union[str, Sequence[str], None] = '2025010501'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tasks', sa.Column('time_limit_ms', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('tasks', 'time_limit_ms')
@@ -0,0 +1,29 @@
+"""Replace tasks.time_limit_ms with per-language resource_limits
+
+Revision ID: 2025010701
+Revises: 2025010601
+Create Date: 2025-01-07 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2025010701'
+down_revision: Union[str, Sequence[str], None] = '2025010601'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tasks', sa.Column('resource_limits', sa.JSON(), nullable=True))
+    # Общий на все языки лимит был выведен из замера одного рантайма - не переносим его
+    op.drop_column('tasks', 'time_limit_ms')
+
+
+def downgrade() -> None:
+    op.add_column('tasks', sa.Column('time_limit_ms', sa.Integer(), nullable=True))
+    op.drop_column('tasks', 'resource_limits')
@@ -0,0 +1,27 @@
+"""Add adaptive_execution_id to task_solutions
+
+Revision ID: 2025010801
+Revises: 2025010701
+Create Date: 2025-01-08 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2025010801'
+down_revision: Union[str, Sequence[str], None] = '2025010701'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('task_solutions', sa.Column('adaptive_execution_id', postgresql.UUID(as_uuid=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('task_solutions', 'adaptive_execution_id')
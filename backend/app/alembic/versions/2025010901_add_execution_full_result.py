@@ -0,0 +1,28 @@
+"""Add full_result to executions
+
+Revision ID: 2025010901
+Revises: 2025010801
+Create Date: 2025-01-09 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2025010901'
+down_revision: Union[str, Sequence[str], None] = '2025010801'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('executions', sa.Column('full_result', sa.JSON(), nullable=True))
+    # У прежних Submit в result лежит копия со скрытыми тестами - её нельзя отдавать из кэша
+    op.execute('UPDATE executions SET result_key = NULL WHERE is_submit AND result_key IS NOT NULL')
+
+
+def downgrade() -> None:
+    op.drop_column('executions', 'full_result')
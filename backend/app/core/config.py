@@ -22,7 +22,21 @@ class Settings(BaseSettings):
     executor_service_url: str = 'http://localhost:8001'
     ml_service_url: str = 'http://localhost:8002/api/v1'
     ml_service_timeout: int = 30000
+    ml_batch_timeout: int = 600000  # пакетные /evaluate/batch и /anti-cheat/check/batch
+    # Пулы соединений к внутренним сервисам (services/http_clients.py)
+    executor_http_max_connections: int = 100
+    executor_http_max_keepalive: int = 20
+    ml_http_max_connections: int = 50
+    ml_http_max_keepalive: int = 10
+    # Очередь post-submit (services/post_submit_jobs.py); 0 воркеров - обработка только
+    # отдельным процессом scripts/post_submit_worker.py
+    post_submit_workers: int = 2
+    post_submit_poll_interval: float = 2.0
+    post_submit_visibility_timeout: int = 300
+    post_submit_max_attempts: int = 5
     moderator_token: str = 'moderator_secret_token'
+    # Общий токен backend и executor для внутренних эндпоинтов (наборы тестов задач)
+    internal_service_token: str = 'internal_service_token'
 
     model_config = SettingsConfigDict(
         env_file=os.getenv('ENV_FILE', '.env'),
@@ -0,0 +1,14 @@
+import hmac
+
+from fastapi import Header, HTTPException, status
+
+from ..core.config import get_settings
+
+
+settings = get_settings()
+
+
+async def require_internal_token(x_internal_token: str | None = Header(None)) -> None:
+    """Доступ только для внутренних сервисов (executor), по общему токену INTERNAL_SERVICE_TOKEN"""
+    if not x_internal_token or not hmac.compare_digest(x_internal_token, settings.internal_service_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Internal access only')
@@ -5,6 +5,9 @@ from .core.config import get_settings
 from .database import engine
 from .models import Base
 from .routes import admin_router, auth_router, executions_router, questions_router, tasks_router, users_router, vacancies_router, hints_router, scoring_router, moderator_router, moderator_auth_router
+from .services.http_clients import http_clients
+from .services.post_submit_jobs import post_submit_workers
+from .services.result_cache import result_cache
 
 
 settings = get_settings()
@@ -28,9 +31,26 @@ app.add_middleware(
 #         await conn.run_sync(Base.metadata.create_all)
 
 
+@app.on_event('startup')
+async def on_startup():
+    # Воркеры post-submit очереди; при POST_SUBMIT_WORKERS=0 её разбирает отдельный процесс
+    post_submit_workers.start()
+
+
+@app.on_event('shutdown')
+async def on_shutdown():
+    await post_submit_workers.stop()
+    # Закрываем пулы соединений к executor и ML сервису
+    await http_clients.close_all()
+
+
 @app.get('/health', tags=['health'])
 async def health():
-    return {'status': 'ok'}
+    return {
+        'status': 'ok',
+        'result_cache': result_cache.stats(),
+        'post_submit': post_submit_workers.stats(),
+    }
 
 
 api_router = APIRouter(prefix=settings.api_v1_str)
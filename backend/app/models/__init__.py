@@ -1,6 +1,7 @@
 from .base import Base
 from .execution import Execution
 from .login_code import LoginCode
+from .post_submit_job import PostSubmitJob
 from .question import Answer, Question
 from .task import Task
 from .task_solution import TaskSolution
@@ -12,4 +13,4 @@ from .vacancy import Application, Vacancy
 from .moderator import Moderator
 from .user_contest_tasks import UserContestTasks
 
-__all__ = ['Base', 'User', 'LoginCode', 'Question', 'Answer', 'Execution', 'Vacancy', 'Application', 'Task', 'TaskSolution', 'TaskMetric', 'TaskCommunication', 'HintUsage', 'UserContestTasks', 'Moderator']
+__all__ = ['Base', 'User', 'LoginCode', 'Question', 'Answer', 'Execution', 'Vacancy', 'Application', 'Task', 'TaskSolution', 'TaskMetric', 'TaskCommunication', 'HintUsage', 'UserContestTasks', 'Moderator', 'PostSubmitJob']
@@ -24,7 +24,14 @@ class Execution(Base):
     )  # pending, running, completed, failed
     files: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False)  # {path: content}
     result: Mapped[dict[str, Any] | None] = mapped_column(JSON, nullable=True)  # stdout, stderr, exit_code, duration_ms
+    full_result: Mapped[dict[str, Any] | None] = mapped_column(
+        JSON, nullable=True
+    )  # результат Submit до скрытия закрытых тестов - источник для кэша результатов
+    progress: Mapped[dict[str, Any] | None] = mapped_column(JSON, nullable=True)  # total, completed, test_results - пока идут тесты
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
+    result_key: Mapped[str | None] = mapped_column(
+        String(64), nullable=True, index=True
+    )  # ключ мемоизации результата, см. services/result_cache
     task_id: Mapped[uuid.UUID | None] = mapped_column(
         UUID(as_uuid=True), ForeignKey('tasks.id', ondelete='SET NULL'), nullable=True
     )
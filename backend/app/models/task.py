@@ -37,6 +37,9 @@ class Task(Base):
     canonical_solution: Mapped[str | None] = mapped_column(
         Text, nullable=True
     )  # Эталонное оптимальное решение (Python)
+    resource_limits: Mapped[dict | None] = mapped_column(
+        JSON, nullable=True
+    )  # Лимиты теста по языкам {language: {time_limit_ms, memory_limit_mb}} из замера эталонных решений
     vacancy_id: Mapped[uuid.UUID | None] = mapped_column(
         UUID(as_uuid=True), ForeignKey('vacancies.id', ondelete='SET NULL'), nullable=True
     )  # Привязка к вакансии (опционально)
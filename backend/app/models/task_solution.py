@@ -71,4 +71,7 @@ class TaskSolution(Base):
     ml_passed: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
     anti_cheat_flag: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
     anti_cheat_reason: Mapped[str | None] = mapped_column(Text, nullable=True)
+    adaptive_execution_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), nullable=True
+    )  # Выполнение, по которому уже применён адаптивный этап post-submit
 
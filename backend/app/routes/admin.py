@@ -1,8 +1,10 @@
 """Админские роуты - управление вопросами и просмотр ответов"""
 
+import json
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
@@ -25,6 +27,7 @@ from ..schemas import (
     VacancyUpdate,
 )
 from ..services import crud
+from ..services.rescoring import rescore_vacancy
 
 router = APIRouter(prefix='/admin', tags=['admin'])
 
@@ -243,6 +246,31 @@ async def update_vacancy(
     return vacancy
 
 
+@router.post('/vacancies/{vacancy_id}/rescore')
+async def rescore_vacancy_solutions(
+    vacancy_id: UUID,
+    evaluate: bool = True,
+    anti_cheat: bool = True,
+    session: AsyncSession = Depends(get_session),
+    _admin: User = Depends(get_admin_user),
+):
+    """
+    Переоценить решения вакансии через ML (например, после смены промптов).
+    Ответ - NDJSON: строка прогресса после каждой порции и итоговая строка с ошибками.
+    """
+    vacancy = await session.get(Vacancy, vacancy_id)
+    if not vacancy:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail='Vacancy not found'
+        )
+
+    async def report_stream():
+        async for report in rescore_vacancy(vacancy_id, evaluate=evaluate, anti_cheat=anti_cheat):
+            yield json.dumps(report, ensure_ascii=False) + '\n'
+
+    return StreamingResponse(report_stream(), media_type='application/x-ndjson')
+
+
 @router.delete('/vacancies/{vacancy_id}', status_code=status.HTTP_204_NO_CONTENT)
 async def delete_vacancy(
     vacancy_id: UUID,
@@ -347,6 +375,8 @@ async def generate_task(
             topic=request.topic,
             language=target_language,
         )
+        if ml_task.get('generation_timings_ms'):
+            logger.info(f"ML task generation stages (ms): {ml_task['generation_timings_ms']}")
         
         # Преобразуем формат данных из ML в формат БД
         # 1. Объединяем description с input_format и output_format
@@ -444,6 +474,7 @@ async def generate_task(
             vacancy_id=vacancy_id,  # Используем проверенный vacancy_id
             hints=hints_data,  # hints уже в правильном формате (list[dict])
             canonical_solution=ml_task.get('canonical_solution'),
+            resource_limits=ml_task.get('resource_limits'),
         )
         
         await session.commit()
@@ -1,5 +1,8 @@
 """Роуты для выполнения кода"""
 
+import asyncio
+import hmac
+import json
 import logging
 import uuid
 from datetime import datetime, timezone
@@ -7,12 +10,14 @@ from typing import Any
 
 import httpx
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..core.config import get_settings
 from ..database import get_session
 from ..dependencies.auth import get_current_user
+from ..dependencies.internal import require_internal_token
 from ..models import (
     Application,
     Execution,
@@ -24,12 +29,24 @@ from ..models import (
     Vacancy,
 )
 from ..schemas import ExecutionRead, ExecutionRequest, ExecutionStatus
-from ..services.post_submit import schedule_post_submit
+from ..services.execution_events import execution_events
+from ..services.http_clients import http_clients
+from ..services.post_submit_jobs import enqueue_post_submit, post_submit_workers
+from ..services.result_cache import is_memoizable, make_result_key, result_cache
+from ..services.test_bundles import BUNDLE_SCOPES, redact_hidden_tests, test_bundles
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix='/executions', tags=['executions'])
 settings = get_settings()
 
+TERMINAL_STATUSES = ('completed', 'failed')
+# Как часто слать комментарий-пинг в SSE, чтобы прокси не закрывали простаивающее соединение
+SSE_KEEPALIVE_SECONDS = 15
+# Сколько поток может жить с момента создания выполнения: максимальный ExecutionRequest.timeout
+# плюс запас на очередь executor и доставку callback. Если итоговый callback потерян,
+# соединение закрывается, а клиент перечитывает GET /executions/{id}
+SSE_MAX_STREAM_SECONDS = 300 + 60
+
 
 @router.post('', response_model=ExecutionRead, status_code=status.HTTP_201_CREATED)
 async def create_execution(
@@ -55,6 +72,43 @@ async def create_execution(
             )
         execution_language = vacancy_language
 
+    # Тесты задачи берём на сервере: клиент присылает только task_id, а executor получает
+    # ссылку на набор (хэш) и достаёт сами тесты из своего кэша. Присланные клиентом тесты
+    # для задачи игнорируются - иначе Submit засчитывался бы на тестах, выбранных кандидатом
+    test_bundle = None
+    if request.task_id:
+        if request.test_cases:
+            logger.warning(f'Ignoring client-supplied test cases for task {request.task_id}')
+        test_bundle = await test_bundles.get(
+            session, request.task_id, 'all' if request.is_submit else 'open'
+        )
+        if test_bundle is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail='Task not found for execution',
+            )
+
+    # Лимиты теста задачи выводятся из замера эталонных решений: executor применяет их к
+    # процессорному времени и пиковой памяти каждого теста. Таймаут запроса остаётся бюджетом
+    # компиляции и страховкой по реальному времени - его executor сам расширяет под лимит теста
+    timeout = request.timeout
+    limits = test_bundle.limits(execution_language) if test_bundle else {}
+
+    # Повторная отправка того же кода на тот же набор тестов отвечает сохранённым результатом
+    result_key = None
+    cached_result = None
+    if test_bundle and test_bundle.test_cases:
+        result_key = make_result_key(
+            request.task_id,
+            execution_language,
+            request.files,
+            test_bundle.hash,
+            request.fail_fast,
+            timeout,
+            limits,
+        )
+        cached_result = await result_cache.lookup(session, result_key)
+
     execution = Execution(
         user_id=current_user.id,
         language=execution_language,
@@ -63,36 +117,71 @@ async def create_execution(
         task_id=request.task_id,
         vacancy_id=request.vacancy_id,
         is_submit=request.is_submit,
+        result_key=result_key,
     )
     session.add(execution)
     await session.flush()
 
+    if cached_result is not None:
+        now = datetime.now(timezone.utc).isoformat()
+        logger.info(f"Execution {execution.id} served from result cache (key={result_key[:12]})")
+        await _apply_execution_result(
+            session,
+            execution,
+            {
+                'status': 'completed',
+                'result': cached_result,
+                'error_message': None,
+                'started_at': now,
+                'completed_at': now,
+            },
+        )
+        await session.refresh(execution)
+        return ExecutionRead.from_orm(execution)
+
     # Отправляем задачу в executor service
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            executor_request = {
-                'execution_id': str(execution.id),
-                'language': execution_language,
-                'files': request.files,
-                'timeout': request.timeout,
-            }
-            if request.test_cases:
-                executor_request['test_cases'] = [
-                    {'input': tc.input, 'output': tc.output} for tc in request.test_cases
-                ]
-            
-            response = await client.post(
-                f'{settings.executor_service_url}/execute',
-                json=executor_request,
+        client = http_clients.get('executor')
+        executor_request = {
+            'execution_id': str(execution.id),
+            'language': execution_language,
+            'files': request.files,
+            'timeout': timeout,
+            'fail_fast': request.fail_fast,
+            'user_id': str(current_user.id),
+            **limits,
+        }
+        if test_bundle is not None:
+            if test_bundle.test_cases:
+                executor_request['test_bundle'] = test_bundle.ref()
+        elif request.test_cases:
+            executor_request['test_cases'] = [
+                {'input': tc.input, 'output': tc.output} for tc in request.test_cases
+            ]
+        
+        response = await client.post(
+            f'{settings.executor_service_url}/execute',
+            json=executor_request,
+        )
+        if response.status_code == 429:
+            # Очередь executor переполнена - просим клиента повторить позже
+            retry_after = response.headers.get('Retry-After', '5')
+            execution.status = 'failed'
+            execution.error_message = 'Executor queue is full'
+            await session.commit()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f'Слишком много запусков, повторите через {retry_after} с.',
+                headers={'Retry-After': retry_after},
+            )
+        if response.status_code != 202:
+            execution.status = 'failed'
+            execution.error_message = f'Executor service error: {response.text}'
+            await session.commit()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail='Executor service unavailable',
             )
-            if response.status_code != 202:
-                execution.status = 'failed'
-                execution.error_message = f'Executor service error: {response.text}'
-                await session.commit()
-                raise HTTPException(
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    detail='Executor service unavailable',
-                )
     except httpx.RequestError as exc:
         execution.status = 'failed'
         execution.error_message = f'Executor service connection error: {str(exc)}'
@@ -108,6 +197,25 @@ async def create_execution(
     return ExecutionRead.from_orm(execution)
 
 
+@router.get('/test-bundles/{task_id}/{scope}/{bundle_hash}', dependencies=[Depends(require_internal_token)])
+async def get_test_bundle(
+    task_id: uuid.UUID,
+    scope: str,
+    bundle_hash: str,
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Набор тестов для executor (вызывается при промахе его кэша).
+    Доступен только по внутреннему токену и при точном совпадении хэша набора.
+    """
+    if scope not in BUNDLE_SCOPES:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Test bundle not found')
+    bundle = await test_bundles.get(session, task_id, scope)
+    if bundle is None or not hmac.compare_digest(bundle.hash, bundle_hash):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Test bundle not found')
+    return {'hash': bundle.hash, 'test_cases': list(bundle.test_cases)}
+
+
 @router.get('/{execution_id}', response_model=ExecutionRead)
 async def get_execution(
     execution_id: uuid.UUID,
@@ -128,6 +236,74 @@ async def get_execution(
     return ExecutionRead.from_orm(execution)
 
 
+@router.get('/{execution_id}/events')
+async def stream_execution_events(
+    execution_id: uuid.UUID,
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    SSE-поток изменений выполнения: сначала текущее состояние, затем каждое обновление
+    из execution_callback (прогресс тестов, итоговый результат). Поток закрывается,
+    когда выполнение завершено, поэтому клиенту не нужно опрашивать GET /executions/{id},
+    или по истечении SSE_MAX_STREAM_SECONDS с момента создания выполнения.
+    """
+    # Подписываемся до чтения из БД, чтобы не пропустить callback между чтением и подпиской
+    queue = execution_events.subscribe(execution_id)
+    execution = await session.scalar(
+        select(Execution).where(
+            Execution.id == execution_id, Execution.user_id == current_user.id
+        )
+    )
+    if not execution:
+        execution_events.unsubscribe(execution_id, queue)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail='Execution not found'
+        )
+    snapshot = ExecutionRead.from_orm(execution).model_dump(mode='json')
+    age = (datetime.now(timezone.utc) - execution.created_at).total_seconds()
+    stream_seconds = max(0.0, SSE_MAX_STREAM_SECONDS - age)
+
+    async def event_stream():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + stream_seconds
+        try:
+            yield _sse_event(snapshot)
+            if snapshot['status'] in TERMINAL_STATUSES:
+                return
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return
+                try:
+                    payload = await asyncio.wait_for(
+                        queue.get(), timeout=min(SSE_KEEPALIVE_SECONDS, remaining)
+                    )
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield _sse_event(payload)
+                if payload['status'] in TERMINAL_STATUSES:
+                    return
+        finally:
+            execution_events.unsubscribe(execution_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+def _sse_event(payload: dict[str, Any]) -> str:
+    return f'event: execution\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n'
+
+
+def _publish_execution(execution: Execution) -> None:
+    """Разослать текущее состояние выполнения подписчикам SSE (после commit)"""
+    execution_events.publish(execution.id, ExecutionRead.from_orm(execution).model_dump(mode='json'))
+
+
 @router.get('', response_model=list[ExecutionRead])
 async def list_executions(
     session: AsyncSession = Depends(get_session),
@@ -168,15 +344,57 @@ async def execution_callback(
             status_code=status.HTTP_404_NOT_FOUND, detail='Execution not found'
         )
 
+    progress = callback_data.get('progress')
+    if progress is not None:
+        # Промежуточный прогресс тестов: результат, решение и метрики не трогаем.
+        # Executor отправляет его строго до итогового callback, но завершённое выполнение
+        # на всякий случай не откатываем обратно в running.
+        if execution.status not in TERMINAL_STATUSES:
+            execution.status = 'running'
+            execution.progress = progress
+            if callback_data.get('started_at') and not execution.started_at:
+                execution.started_at = datetime.fromisoformat(callback_data['started_at'].replace('Z', '+00:00'))
+            await session.commit()
+            _publish_execution(execution)
+        return {'detail': 'Progress stored'}
+
+    await _apply_execution_result(session, execution, callback_data)
+    return {'detail': 'Callback processed'}
+
+
+async def _apply_execution_result(
+    session: AsyncSession,
+    execution: Execution,
+    callback_data: dict[str, Any],
+) -> None:
+    """
+    Записать итог выполнения: статус и результат, решение задачи и метрики для Submit,
+    статус заявки; коммитит сессию и уведомляет подписчиков. Общий путь для callback
+    executor и для результата, взятого из кэша.
+    """
     execution.status = callback_data.get('status', 'failed')
-    execution.result = callback_data.get('result')
+    full_result = callback_data.get('result')
+    execution.result = full_result
+    if execution.is_submit and execution.task_id and isinstance(full_result, dict):
+        # Кандидат видит закрытые тесты только как пройден/не пройден; полный результат
+        # остаётся в решении задачи (TaskSolution) для модератора
+        open_bundle = await test_bundles.get(session, execution.task_id, 'open')
+        visible_count = len(open_bundle.test_cases) if open_bundle else 0
+        execution.result = redact_hidden_tests(full_result, visible_count)
+        execution.full_result = full_result
     execution.error_message = callback_data.get('error_message')
+    if execution.status in TERMINAL_STATUSES:
+        # Итог уже в result
+        execution.progress = None
+    if execution.result_key and not is_memoizable(execution.status, full_result):
+        # Таймауты и сбои инфраструктуры не переиспользуем для повторных отправок
+        execution.result_key = None
     
     # Логируем результат для отладки
     result_dict = execution.result if isinstance(execution.result, dict) else {}
     verdict = result_dict.get('verdict') if result_dict else None
     logger.info(
-        f"Updated execution: id={execution_id}, status={execution.status}, "
+        f"Updated execution: id={execution.id}, status={execution.status}, "
         f"is_submit={execution.is_submit}, task_id={execution.task_id}, "
         f"verdict={verdict}, has_result={execution.result is not None}"
     )
@@ -190,7 +408,7 @@ async def execution_callback(
 
     # Если это Submit, сохраняем решение (независимо от результата)
     # Получаем вердикт из result (может быть dict или уже объект)
-    result_dict = execution.result if isinstance(execution.result, dict) else (execution.result.model_dump() if hasattr(execution.result, 'model_dump') else {})
+    result_dict = full_result if isinstance(full_result, dict) else {}
     
     # Получаем test_results
     test_results = result_dict.get('test_results') if result_dict else None
@@ -312,8 +530,12 @@ async def execution_callback(
         await session.flush()
         if saved_solution and new_status == 'solved':
             await _upsert_task_metric(session, saved_solution, test_results)
+        if post_submit_needed:
+            # Задача пост-обработки коммитится вместе с решением
+            await enqueue_post_submit(session, execution.id)
 
         await session.commit()
+        _publish_execution(execution)
         logger.info(
             f"Successfully saved solution for execution_id={execution.id}, "
             f"task_id={execution.task_id}, status={new_status if 'new_status' in locals() else 'unknown'}, "
@@ -337,9 +559,7 @@ async def execution_callback(
         raise
     
     if post_submit_needed:
-        schedule_post_submit(execution.id)
-
-    return {'detail': 'Callback processed'}
+        post_submit_workers.notify()
 
 
 async def check_and_update_application_status(
@@ -10,9 +10,11 @@ from ..dependencies.auth import get_current_user
 from ..database import get_session
 from ..models import Task, HintUsage
 from ..schemas.hint_usage import HintRequest, HintResponse
+from ..services.keyed_locks import KeyedLocks
 from ..services.ml_client import ml_client
 
 router = APIRouter(prefix='/hints', tags=['hints'])
+hint_generation_locks = KeyedLocks()
 
 
 @router.post('/request', response_model=HintResponse)
@@ -36,67 +38,55 @@ async def request_hint(
     
     # Если у задачи нет подсказок, генерируем их через ML сервис
     if not task.hints:
-        try:
-            # Генерируем подсказки через ML сервис
-            from ..services.ml_client import ml_client
-            
-            # Получаем данные задачи для генерации подсказок
-            # Парсим open_tests для получения примеров
-            examples = []
-            if task.open_tests:
+        # Одна генерация на задачу: остальные запросы ждут её и берут готовые подсказки
+        async with hint_generation_locks.hold(task.id):
+            await session.refresh(task, attribute_names=['hints'])
+            if not task.hints:
                 try:
-                    open_tests_data = json.loads(task.open_tests) if isinstance(task.open_tests, str) else task.open_tests
-                    examples = [{'input': t.get('input', ''), 'output': t.get('output', '')} for t in open_tests_data]
-                except (json.JSONDecodeError, TypeError):
+                    # Получаем данные задачи для генерации подсказок
+                    # Парсим open_tests для получения примеров
                     examples = []
-            
-            # Генерируем подсказки через ML сервис
-            # Используем эндпоинт /hints/generate из ML сервиса
-            import httpx
-            from ..core.config import get_settings
-            settings = get_settings()
-            
-            async with httpx.AsyncClient(timeout=settings.ml_service_timeout / 1000) as client:
-                response = await client.post(
-                    f'{settings.ml_service_url}/hints/generate',
-                    json={
-                        'task_description': task.description,
-                        'task_difficulty': task.difficulty or 'medium',
-                        'input_format': 'Стандартный ввод',
-                        'output_format': 'Стандартный вывод',
-                        'examples': examples,
-                    }
-                )
-                response.raise_for_status()
-                hints_data = response.json()
-                
-                # Конвертируем подсказки в формат для сохранения
-                hints_list = []
-                for hint in hints_data.get('hints', []):
-                    # hint может быть Pydantic объектом или dict
-                    if hasattr(hint, 'dict'):
-                        hint_dict = hint.dict()
-                    elif hasattr(hint, 'model_dump'):
-                        hint_dict = hint.model_dump()
-                    else:
-                        hint_dict = hint
+                    if task.open_tests:
+                        try:
+                            open_tests_data = json.loads(task.open_tests) if isinstance(task.open_tests, str) else task.open_tests
+                            examples = [{'input': t.get('input', ''), 'output': t.get('output', '')} for t in open_tests_data]
+                        except (json.JSONDecodeError, TypeError):
+                            examples = []
                     
-                    hints_list.append({
-                        'level': hint_dict.get('level'),
-                        'content': hint_dict.get('content', hint_dict.get('hint', '')),
-                        'penalty': hint_dict.get('penalty', 0.0)
-                    })
-                
-                # Сохраняем подсказки в задачу
-                task.hints = hints_list
-                await session.commit()
-                await session.refresh(task)
-        except Exception as e:
-            # Если не удалось сгенерировать подсказки, возвращаем ошибку
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f'Не удалось сгенерировать подсказки: {str(e)}'
-            )
+                    # Генерируем подсказки через ML сервис (эндпоинт /hints/generate)
+                    hints_data = await ml_client.generate_hints(
+                        task_description=task.description,
+                        task_difficulty=task.difficulty or 'medium',
+                        examples=examples,
+                    )
+
+                    # Конвертируем подсказки в формат для сохранения
+                    hints_list = []
+                    for hint in hints_data.get('hints', []):
+                        # hint может быть Pydantic объектом или dict
+                        if hasattr(hint, 'dict'):
+                            hint_dict = hint.dict()
+                        elif hasattr(hint, 'model_dump'):
+                            hint_dict = hint.model_dump()
+                        else:
+                            hint_dict = hint
+                        
+                        hints_list.append({
+                            'level': hint_dict.get('level'),
+                            'content': hint_dict.get('content', hint_dict.get('hint', '')),
+                            'penalty': hint_dict.get('penalty', 0.0)
+                        })
+                    
+                    # Сохраняем подсказки в задачу
+                    task.hints = hints_list
+                    await session.commit()
+                    await session.refresh(task)
+                except Exception as e:
+                    # Если не удалось сгенерировать подсказки, возвращаем ошибку
+                    raise HTTPException(
+                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                        detail=f'Не удалось сгенерировать подсказки: {str(e)}'
+                    )
     
     # Парсим подсказки из JSON
     try:
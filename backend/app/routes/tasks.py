@@ -12,7 +12,7 @@ from sqlalchemy.exc import IntegrityError
 from ..database import get_session
 from ..dependencies.auth import get_current_user
 from ..models import Task, TaskSolution, TaskCommunication, User, Vacancy, UserContestTasks
-from ..schemas import TaskRead, TaskTestsForSubmit, TaskCommunicationRead, TaskCommunicationAnswer
+from ..schemas import TaskRead, TaskCommunicationRead, TaskCommunicationAnswer
 from ..services.ml_client import ml_client
 
 logger = logging.getLogger(__name__)
@@ -161,22 +161,6 @@ async def get_task(
     return TaskRead.from_orm(task)
 
 
-@router.get('/{task_id}/tests-for-submit', response_model=TaskTestsForSubmit)
-async def get_task_tests_for_submit(
-    task_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session),
-):
-    """Получить все тесты задачи для Submit (открытые + закрытые, только для executor)"""
-    task = await session.get(Task, task_id)
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail='Task not found'
-        )
-    
-    return TaskTestsForSubmit.from_orm(task)
-
-
 @router.get('/solved/{vacancy_id}', response_model=list[uuid.UUID])
 async def get_solved_tasks(
     vacancy_id: uuid.UUID,
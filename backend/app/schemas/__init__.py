@@ -7,10 +7,10 @@ from .auth import (
     AuthSuccessResponse,
     TokenResponse,
 )
-from .execution import ExecutionRead, ExecutionRequest, ExecutionResult, ExecutionStatus
+from .execution import ExecutionProgress, ExecutionRead, ExecutionRequest, ExecutionResult, ExecutionStatus
 from .question import QuestionCreate, QuestionRead, QuestionUpdate
 from .scoring import ScoringRequest, ScoringResponse
-from .task import TaskCreate, TaskGenerateRequest, TaskRead, TaskReadWithHidden, TaskTestsForSubmit, TaskUpdate
+from .task import TaskCreate, TaskGenerateRequest, TaskRead, TaskReadWithHidden, TaskUpdate
 from .task_solution import TaskSolutionCreate, TaskSolutionRead
 from .task_metric import TaskMetricRead
 from .task_communication import TaskCommunicationRead, TaskCommunicationAnswer
@@ -41,7 +41,6 @@ __all__ = [
     'TaskUpdate',
     'TaskRead',
     'TaskReadWithHidden',
-    'TaskTestsForSubmit',
     'AnswerCreate',
     'AnswerRead',
     'AnswerWithQuestion',
@@ -49,6 +48,7 @@ __all__ = [
     'ExecutionRead',
     'ExecutionStatus',
     'ExecutionResult',
+    'ExecutionProgress',
     'VacancyCreate',
     'VacancyUpdate',
     'VacancyRead',
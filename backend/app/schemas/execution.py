@@ -16,10 +16,13 @@ class ExecutionRequest(BaseModel):
     language: str = Field(..., description='Язык программирования (python, typescript, go, java)')
     files: dict[str, str] = Field(..., description='Файлы кода {path: content}')
     timeout: int = Field(default=30, ge=1, le=300, description='Таймаут выполнения в секундах')
-    test_cases: list[TestCase] | None = Field(None, description='Тестовые случаи для проверки решения')
+    test_cases: list[TestCase] | None = Field(
+        None, description='Тестовые случаи для запуска без task_id (тесты задачи берутся на сервере)'
+    )
     task_id: uuid.UUID | None = Field(None, description='ID задачи (для контеста)')
     vacancy_id: uuid.UUID | None = Field(None, description='ID вакансии (для контеста)')
     is_submit: bool = Field(default=False, description='Это Submit (все тесты) или Run (только открытые)')
+    fail_fast: bool = Field(default=False, description='Остановить проверку после первого упавшего теста')
 
 
 class TestResult(BaseModel):
@@ -29,6 +32,28 @@ class TestResult(BaseModel):
     actual_output: str
     passed: bool
     duration_ms: int
+    cpu_time_ms: int | None = None
+    peak_memory_kb: int | None = None
+    verdict: str | None = None
+    skipped: bool = False
+
+
+class TestProgress(BaseModel):
+    test_index: int
+    passed: bool
+    duration_ms: int
+    exit_code: int = 0
+    cpu_time_ms: int | None = None
+    peak_memory_kb: int | None = None
+    verdict: str | None = None
+    skipped: bool = False
+
+
+class ExecutionProgress(BaseModel):
+    """Промежуточный прогресс тестов; passed предварительный, итог - в result"""
+    total: int
+    completed: int
+    test_results: list[TestProgress] = Field(default_factory=list)
 
 
 class ExecutionResult(BaseModel):
@@ -36,7 +61,9 @@ class ExecutionResult(BaseModel):
     stderr: str = Field(default='', description='Ошибки')
     exit_code: int = Field(..., description='Код возврата')
     duration_ms: int = Field(..., description='Время выполнения в миллисекундах')
-    verdict: str | None = Field(None, description='Вердикт (ACCEPTED, WRONG ANSWER, etc.)')
+    verdict: str | None = Field(
+        None, description='Вердикт (ACCEPTED, WRONG ANSWER, TIME LIMIT EXCEEDED, MEMORY LIMIT EXCEEDED)'
+    )
     test_results: list[TestResult] | None = Field(None, description='Результаты тестов')
 
 
@@ -47,6 +74,7 @@ class ExecutionRead(BaseModel):
     status: str
     files: dict[str, Any]
     result: ExecutionResult | None
+    progress: ExecutionProgress | None = None
     error_message: str | None
     created_at: datetime
     started_at: datetime | None
@@ -61,6 +89,7 @@ class ExecutionRead(BaseModel):
             'language': execution.language,
             'status': execution.status,
             'files': execution.files,
+            'progress': execution.progress,
             'error_message': execution.error_message,
             'created_at': execution.created_at,
             'started_at': execution.started_at,
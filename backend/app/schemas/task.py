@@ -92,36 +92,11 @@ class TaskRead(BaseModel):
         from_attributes = True
 
 
-class TaskTestsForSubmit(BaseModel):
-    """Тесты для Submit (открытые + закрытые, только для executor)"""
-    open_tests: list[TestCase] | None
-    hidden_tests: list[TestCase] | None
-
-    @classmethod
-    def from_orm(cls, task):
-        """Создать TaskTestsForSubmit из модели Task с парсингом JSON"""
-        open_tests = None
-        hidden_tests = None
-        
-        if task.open_tests:
-            try:
-                open_tests = json.loads(task.open_tests)
-            except (json.JSONDecodeError, TypeError):
-                open_tests = None
-        
-        if task.hidden_tests:
-            try:
-                hidden_tests = json.loads(task.hidden_tests)
-            except (json.JSONDecodeError, TypeError):
-                hidden_tests = None
-        
-        return cls(open_tests=open_tests, hidden_tests=hidden_tests)
-
-
 class TaskReadWithHidden(TaskRead):
     """Версия TaskRead с закрытыми тестами (для админки)"""
     hidden_tests: list[TestCase] | None
     canonical_solution: str | None = None
+    resource_limits: dict[str, dict[str, int]] | None = None
 
     @classmethod
     def from_orm(cls, task):
@@ -136,6 +111,7 @@ class TaskReadWithHidden(TaskRead):
             'created_at': task.created_at,
             'updated_at': task.updated_at,
             'canonical_solution': task.canonical_solution,
+            'resource_limits': task.resource_limits,
         }
         
         # Парсим JSON тесты
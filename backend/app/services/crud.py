@@ -7,6 +7,8 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models import Answer, Question, Task
+from .result_cache import result_cache
+from .test_bundles import test_bundles
 
 
 # ========== Questions CRUD ==========
@@ -150,6 +152,7 @@ async def create_task(
     vacancy_id: UUID | None = None,
     hints: list[dict] | dict | None = None,
     canonical_solution: str | None = None,
+    resource_limits: dict[str, dict[str, int]] | None = None,
 ) -> Task:
     """Создать новую задачу"""
     task = Task(
@@ -162,6 +165,7 @@ async def create_task(
         vacancy_id=vacancy_id,
         hints=hints,  # hints уже должен быть dict/list, сохраняется как JSON
         canonical_solution=canonical_solution,
+        resource_limits=resource_limits,
     )
     session.add(task)
     await session.flush()
@@ -203,6 +207,9 @@ async def update_task(
         task.canonical_solution = canonical_solution
 
     await session.flush()
+    if open_tests is not None or hidden_tests is not None:
+        test_bundles.invalidate(task_id)
+        await result_cache.invalidate_task(session, task_id)
     return task
 
 
@@ -214,5 +221,6 @@ async def delete_task(session: AsyncSession, task_id: UUID) -> bool:
 
     await session.delete(task)
     await session.flush()
+    test_bundles.invalidate(task_id)
     return True
 
@@ -0,0 +1,50 @@
+"""In-process pub/sub for execution status updates (used by the SSE endpoint)"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Сколько непрочитанных событий держим на подписчика; медленный клиент теряет
+# промежуточные события, но последнее состояние всегда доходит
+SUBSCRIBER_QUEUE_SIZE = 16
+
+
+class ExecutionEventBus:
+    """Подписки на изменения выполнения: execution_callback публикует, SSE-роут слушает"""
+
+    def __init__(self) -> None:
+        self._subscribers: dict[uuid.UUID, set[asyncio.Queue]] = {}
+
+    def subscribe(self, execution_id: uuid.UUID) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.setdefault(execution_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, execution_id: uuid.UUID, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(execution_id)
+        if not queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[execution_id]
+
+    def publish(self, execution_id: uuid.UUID, payload: dict[str, Any]) -> None:
+        for queue in list(self._subscribers.get(execution_id, ())):
+            if queue.full():
+                # Выбрасываем самое старое событие: важнее доставить актуальное состояние
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(payload)
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+
+execution_events = ExecutionEventBus()
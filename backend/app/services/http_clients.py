@@ -0,0 +1,86 @@
+"""Shared pooled HTTP clients for calls to internal services (executor, ML)"""
+
+from __future__ import annotations
+
+import importlib.util
+import logging
+from dataclasses import dataclass
+
+import httpx
+
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# HTTP/2 включаем, если установлен h2 (httpx[http2]): по TLS он согласуется через ALPN,
+# по открытому HTTP httpx остаётся на HTTP/1.1 с keep-alive
+HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+
+@dataclass(frozen=True)
+class ClientTarget:
+    timeout: float
+    max_connections: int
+    max_keepalive_connections: int
+    keepalive_expiry: float = 30.0
+
+
+class HttpClientRegistry:
+    """
+    Один пул соединений на целевой сервис в рамках процесса.
+
+    Клиент создаётся при первом обращении и переиспользуется всеми запросами, поэтому
+    TCP-соединения не открываются заново на каждый вызов. Закрываются клиенты в shutdown
+    приложения (close_all).
+    """
+
+    def __init__(self) -> None:
+        self._targets: dict[str, ClientTarget] = {}
+        self._clients: dict[str, httpx.AsyncClient] = {}
+
+    def register(self, name: str, target: ClientTarget) -> None:
+        self._targets[name] = target
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            target = self._targets[name]
+            client = httpx.AsyncClient(
+                timeout=target.timeout,
+                limits=httpx.Limits(
+                    max_connections=target.max_connections,
+                    max_keepalive_connections=target.max_keepalive_connections,
+                    keepalive_expiry=target.keepalive_expiry,
+                ),
+                http2=HTTP2_AVAILABLE,
+            )
+            self._clients[name] = client
+        return client
+
+    async def close_all(self) -> None:
+        clients, self._clients = self._clients, {}
+        for name, client in clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f'Failed to close HTTP client {name}: {e}')
+
+
+http_clients = HttpClientRegistry()
+http_clients.register(
+    'executor',
+    ClientTarget(
+        timeout=5.0,
+        max_connections=settings.executor_http_max_connections,
+        max_keepalive_connections=settings.executor_http_max_keepalive,
+    ),
+)
+http_clients.register(
+    'ml',
+    ClientTarget(
+        timeout=settings.ml_service_timeout / 1000,
+        max_connections=settings.ml_http_max_connections,
+        max_keepalive_connections=settings.ml_http_max_keepalive,
+    ),
+)
@@ -5,6 +5,7 @@ import httpx
 from typing import Any
 
 from app.core.config import get_settings
+from app.services.http_clients import http_clients
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -15,7 +16,8 @@ class MLClient:
     
     def __init__(self):
         self.base_url = settings.ml_service_url
-        self.timeout = settings.ml_service_timeout / 1000  # Конвертируем мс в секунды
+        # Обычный таймаут (ml_service_timeout) задан в общем клиенте http_clients['ml']
+        self.batch_timeout = settings.ml_batch_timeout / 1000
     
     async def generate_task(
         self,
@@ -41,20 +43,20 @@ class MLClient:
             payload['topic'] = topic
         if language:
             payload['language'] = language
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.post(
-                    f'{self.base_url}{endpoint}',
-                    json=payload,
-                )
-                response.raise_for_status()
-                return response.json()
-            except (httpx.RequestError, httpx.HTTPStatusError) as e:
-                # Если не удалось подключиться к реальному эндпоинту, пробуем mock
-                if not use_mock:
-                    logger.warning(f'Failed to generate task via ML service: {e}. Trying mock endpoint...')
-                    return await self.generate_task(difficulty, topic, use_mock=True)
-                raise
+        client = http_clients.get('ml')
+        try:
+            response = await client.post(
+                f'{self.base_url}{endpoint}',
+                json=payload,
+            )
+            response.raise_for_status()
+            return response.json()
+        except (httpx.RequestError, httpx.HTTPStatusError) as e:
+            # Если не удалось подключиться к реальному эндпоинту, пробуем mock
+            if not use_mock:
+                logger.warning(f'Failed to generate task via ML service: {e}. Trying mock endpoint...')
+                return await self.generate_task(difficulty, topic, use_mock=True)
+            raise
     
     async def evaluate_code(
         self,
@@ -75,18 +77,56 @@ class MLClient:
             dict: Результат оценки с полями correctness_score, efficiency_score,
                   clean_code_score, feedback, passed
         """
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                f'{self.base_url}/evaluate',
-                json={
-                    'code': code,
-                    'task_difficulty': task_difficulty,
-                    'task_description': task_description,
-                    'hidden_tests': hidden_tests
-                }
-            )
-            response.raise_for_status()
-            return response.json()
+        client = http_clients.get('ml')
+        response = await client.post(
+            f'{self.base_url}/evaluate',
+            json={
+                'code': code,
+                'task_difficulty': task_difficulty,
+                'task_description': task_description,
+                'hidden_tests': hidden_tests
+            }
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    async def evaluate_code_batch(self, items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Оценивает пакет решений через ML сервис
+        
+        Args:
+            items: Запросы в формате evaluate_code (code, task_difficulty,
+                   task_description, hidden_tests)
+            
+        Returns:
+            list: Элементы {index, result, error} в порядке запроса; error заполнен,
+                  если конкретное решение оценить не удалось
+        """
+        client = http_clients.get('ml')
+        response = await client.post(
+            f'{self.base_url}/evaluate/batch',
+            json={'items': items},
+            timeout=self.batch_timeout,
+        )
+        response.raise_for_status()
+        return response.json()['results']
+    
+    async def check_anti_cheat_batch(self, items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Проверяет пакет решений на плагиат
+        
+        Args:
+            items: Запросы в формате check_anti_cheat (code, problem_description)
+            
+        Returns:
+            list: Элементы {index, result, error} в порядке запроса
+        """
+        client = http_clients.get('ml')
+        response = await client.post(
+            f'{self.base_url}/anti-cheat/check/batch',
+            json={'items': items},
+            timeout=self.batch_timeout,
+        )
+        response.raise_for_status()
+        return response.json()['results']
     
     async def check_anti_cheat(self, code: str, problem_description: str) -> dict[str, Any]:
         """Проверяет код на плагиат и AI-генерацию
@@ -98,16 +138,16 @@ class MLClient:
         Returns:
             dict: Результат проверки с полями is_suspicious, confidence, reason
         """
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                f'{self.base_url}/anti-cheat/check',
-                json={
-                    'code': code,
-                    'problem_description': problem_description
-                }
-            )
-            response.raise_for_status()
-            return response.json()
+        client = http_clients.get('ml')
+        response = await client.post(
+            f'{self.base_url}/anti-cheat/check',
+            json={
+                'code': code,
+                'problem_description': problem_description
+            }
+        )
+        response.raise_for_status()
+        return response.json()
     
     async def evaluate_communication(
         self,
@@ -125,35 +165,56 @@ class MLClient:
         Returns:
             dict: Результат оценки с полями communication_score, feedback
         """
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            json_data = {
-                'problem_description': problem_description,
-                'user_explanation': user_explanation
-            }
-            if code:
-                json_data['code'] = code
+        client = http_clients.get('ml')
+        json_data = {
+            'problem_description': problem_description,
+            'user_explanation': user_explanation
+        }
+        if code:
+            json_data['code'] = code
             
-            response = await client.post(
-                f'{self.base_url}/communication/evaluate',
-                json=json_data
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await client.post(
+            f'{self.base_url}/communication/evaluate',
+            json=json_data
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def generate_hints(
+        self,
+        task_description: str,
+        task_difficulty: str,
+        examples: list[dict[str, str]],
+    ) -> dict[str, Any]:
+        """Генерирует подсказки к задаче через ML сервис"""
+        client = http_clients.get('ml')
+        response = await client.post(
+            f'{self.base_url}/hints/generate',
+            json={
+                'task_description': task_description,
+                'task_difficulty': task_difficulty,
+                'input_format': 'Стандартный ввод',
+                'output_format': 'Стандартный вывод',
+                'examples': examples,
+            }
+        )
+        response.raise_for_status()
+        return response.json()
 
     async def request_follow_up(self, problem_description: str, code: str | None = None) -> str | None:
         """Запрашивает follow-up вопрос для пользователя."""
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            json_data = {
-                'problem_description': problem_description,
-                'code': code or '',
-            }
-            response = await client.post(
-                f'{self.base_url}/communication/follow-up',
-                json=json_data,
-            )
-            response.raise_for_status()
-            data = response.json()
-            return data.get('question')
+        client = http_clients.get('ml')
+        json_data = {
+            'problem_description': problem_description,
+            'code': code or '',
+        }
+        response = await client.post(
+            f'{self.base_url}/communication/follow-up',
+            json=json_data,
+        )
+        response.raise_for_status()
+        data = response.json()
+        return data.get('question')
 
     async def adaptive_next_level(
         self,
@@ -169,13 +230,13 @@ class MLClient:
             'bad_attempts': bad_attempts,
             'total_time_seconds': total_time_seconds or 0,
         }
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                f'{self.base_url}/adaptive-engine',
-                json=payload,
-            )
-            response.raise_for_status()
-            return response.json()
+        client = http_clients.get('ml')
+        response = await client.post(
+            f'{self.base_url}/adaptive-engine',
+            json=payload,
+        )
+        response.raise_for_status()
+        return response.json()
 
 
 # Глобальный экземпляр клиента
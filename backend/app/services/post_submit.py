@@ -6,8 +6,10 @@ import asyncio
 import json
 import logging
 import random
+import time
 import uuid
 from datetime import datetime
+from typing import Any, Awaitable, TypeVar
 
 from sqlalchemy import select
 
@@ -17,8 +19,53 @@ from app.services.ml_client import ml_client
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
+
+
+class PostSubmitIncomplete(Exception):
+    """Часть этапов не выполнилась (ML недоступен) - задачу нужно повторить позже"""
+
+
+class StageTimings:
+    """Длительности этапов post-submit в рамках процесса (для /health)"""
+
+    def __init__(self) -> None:
+        self._stats: dict[str, dict[str, int]] = {}
+
+    def record(self, stage: str, elapsed_ms: int) -> None:
+        entry = self._stats.setdefault(stage, {'count': 0, 'total_ms': 0, 'max_ms': 0})
+        entry['count'] += 1
+        entry['total_ms'] += elapsed_ms
+        entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {
+            stage: {'count': entry['count'], 'avg_ms': entry['total_ms'] // entry['count'], 'max_ms': entry['max_ms']}
+            for stage, entry in self._stats.items()
+        }
+
+
+stage_timings = StageTimings()
+
+
+async def _timed(stage: str, coro: Awaitable[T], timings: dict[str, int]) -> T:
+    started = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        elapsed_ms = int((time.perf_counter() - started) * 1000)
+        timings[stage] = elapsed_ms
+        stage_timings.record(stage, elapsed_ms)
+
 
 async def process_post_submit(execution_id: uuid.UUID) -> None:
+    """
+    Обработать принятое решение. Этапы идемпотентны: уже выполненные при повторе
+    пропускаются, поэтому задачу можно безопасно перезапускать.
+
+    Запросы к ML (оценка, анти-чит, follow-up, адаптивность) друг от друга не зависят и
+    идут параллельно; сессия БД используется только до и после них, последовательно.
+    """
     async with async_session_factory() as session:
         execution = await session.get(Execution, execution_id)
         if (
@@ -36,85 +83,127 @@ async def process_post_submit(execution_id: uuid.UUID) -> None:
             return
 
         task = await session.get(Task, execution.task_id) if execution.task_id else None
+        timings: dict[str, int] = {}
 
-        # Evaluate code quality
+        # Всё, что нужно прочитать из БД, - до запросов к ML
+        stages: dict[str, Awaitable[Any]] = {}
         if task and solution.ml_correctness is None:
-            await _evaluate_code(session, solution, task)
+            stages['evaluate'] = _fetch_evaluation(solution, task)
+        if task and solution.anti_cheat_flag is None:
+            stages['anti_cheat'] = ml_client.check_anti_cheat(
+                code=solution.solution_code,
+                problem_description=task.description or '',
+            )
+        if task and not await _has_communication_entry(session, solution):
+            stages['follow_up'] = ml_client.request_follow_up(
+                problem_description=task.description or '',
+                code=solution.solution_code,
+            )
+        binding = await _load_adaptive_binding(session, execution, task)
+        # Адаптивный этап меняет задачи кандидата, поэтому при повторе из-за другого
+        # этапа не выполняется заново: отметка ставится в той же транзакции, что и замена
+        if binding is not None and solution.adaptive_execution_id != execution.id:
+            bad_attempts = await _count_bad_attempts(session, execution)
+            stages['adaptive'] = _fetch_adaptive(execution, solution, task, bad_attempts)
+
+        names = list(stages)
+        outcomes = await asyncio.gather(
+            *(_timed(name, stages[name], timings) for name in names),
+            return_exceptions=True,
+        )
+        results = dict(zip(names, outcomes))
+        failed_stages: list[str] = []
+
+        # Evaluate code quality
+        evaluation = results.get('evaluate')
+        if isinstance(evaluation, BaseException):
+            logger.error('Failed to evaluate code via ML: %s', evaluation)
+            failed_stages.append('evaluate')
+        elif evaluation is not None:
+            solution.ml_correctness = evaluation.get('correctness_score')
+            solution.ml_efficiency = evaluation.get('efficiency_score')
+            solution.ml_clean_code = evaluation.get('clean_code_score')
+            solution.ml_feedback = evaluation.get('feedback')
+            solution.ml_passed = evaluation.get('passed')
 
         # Anti-cheat
-        if task and solution.anti_cheat_flag is None:
-            await _run_anti_cheat(session, solution, task)
+        anti_cheat = results.get('anti_cheat')
+        if isinstance(anti_cheat, BaseException):
+            logger.error('Failed to run anti-cheat: %s', anti_cheat)
+            failed_stages.append('anti_cheat')
+        elif anti_cheat is not None:
+            solution.anti_cheat_flag = anti_cheat.get('is_suspicious')
+            solution.anti_cheat_reason = anti_cheat.get('reason')
 
-        # Communication prompt
-        await _ensure_communication_entry(session, execution, solution, task)
+        # Communication prompt (без ML - вопрос по шаблону)
+        if 'follow_up' in results:
+            question = results['follow_up']
+            if isinstance(question, BaseException):
+                logger.error('Failed to request follow-up question: %s', question)
+                question = None
+            _add_communication_entry(session, execution, solution, task, question)
 
         # Adaptive difficulty
-        await _update_adaptive_recommendation(session, execution, solution, task)
+        adaptive = results.get('adaptive')
+        if isinstance(adaptive, BaseException):
+            logger.error('Failed to update adaptive difficulty: %s', adaptive)
+            failed_stages.append('adaptive')
+        elif adaptive is not None:
+            binding.next_difficulty = adaptive.get('next_difficulty')
+            binding.next_reason = adaptive.get('reason')
+            await _swap_task_if_needed(session, binding, solution.task_id, adaptive.get('next_difficulty'))
+            solution.adaptive_execution_id = execution.id
 
         await session.commit()
 
+    logger.info('Post-submit for execution %s stage timings (ms): %s', execution_id, timings)
+    if failed_stages:
+        raise PostSubmitIncomplete(f'Failed stages: {", ".join(failed_stages)}')
 
-async def _evaluate_code(session, solution: TaskSolution, task: Task) -> None:
-    try:
-        hidden_tests = []
-        if task.hidden_tests:
-            try:
-                parsed = json.loads(task.hidden_tests)
-                if isinstance(parsed, list):
-                    for test in parsed:
-                        if isinstance(test, dict):
-                            hidden_tests.append(test.get('input', ''))
-                        elif isinstance(test, str):
-                            hidden_tests.append(test)
-            except json.JSONDecodeError:
-                logger.warning('Failed to parse hidden tests for task %s', task.id)
-        evaluation = await ml_client.evaluate_code(
-            code=solution.solution_code,
-            task_difficulty=task.difficulty or 'medium',
-            task_description=task.description or '',
-            hidden_tests=hidden_tests,
-        )
-        solution.ml_correctness = evaluation.get('correctness_score')
-        solution.ml_efficiency = evaluation.get('efficiency_score')
-        solution.ml_clean_code = evaluation.get('clean_code_score')
-        solution.ml_feedback = evaluation.get('feedback')
-        solution.ml_passed = evaluation.get('passed')
-    except Exception as exc:  # noqa: BLE001
-        logger.exception('Failed to evaluate code via ML: %s', exc)
 
+def hidden_test_inputs(task: Task) -> list[str]:
+    """Входные данные скрытых тестов задачи - в том виде, в котором их ждёт ML оценка"""
+    hidden_tests = []
+    if task.hidden_tests:
+        try:
+            parsed = json.loads(task.hidden_tests)
+            if isinstance(parsed, list):
+                for test in parsed:
+                    if isinstance(test, dict):
+                        hidden_tests.append(test.get('input', ''))
+                    elif isinstance(test, str):
+                        hidden_tests.append(test)
+        except json.JSONDecodeError:
+            logger.warning('Failed to parse hidden tests for task %s', task.id)
+    return hidden_tests
 
-async def _run_anti_cheat(session, solution: TaskSolution, task: Task) -> None:
-    try:
-        result = await ml_client.check_anti_cheat(
-            code=solution.solution_code,
-            problem_description=task.description or '',
-        )
-        solution.anti_cheat_flag = result.get('is_suspicious')
-        solution.anti_cheat_reason = result.get('reason')
-    except Exception as exc:  # noqa: BLE001
-        logger.exception('Failed to run anti-cheat: %s', exc)
 
+async def _fetch_evaluation(solution: TaskSolution, task: Task) -> dict[str, Any]:
+    return await ml_client.evaluate_code(
+        code=solution.solution_code,
+        task_difficulty=task.difficulty or 'medium',
+        task_description=task.description or '',
+        hidden_tests=hidden_test_inputs(task),
+    )
 
-async def _ensure_communication_entry(session, execution: Execution, solution: TaskSolution, task: Task | None) -> None:
-    if not task:
-        return
+
+async def _has_communication_entry(session, solution: TaskSolution) -> bool:
     existing = await session.scalar(
-        select(TaskCommunication)
+        select(TaskCommunication.id)
         .where(TaskCommunication.solution_id == solution.id)
-        .order_by(TaskCommunication.created_at.desc())
+        .limit(1)
     )
-    if existing:
-        return
-    question_text: str | None = None
-    try:
-        question = await ml_client.request_follow_up(
-            problem_description=task.description or '',
-            code=solution.solution_code,
-        )
-        if question:
-            question_text = question.strip()
-    except Exception as exc:  # noqa: BLE001
-        logger.exception('Failed to request follow-up question: %s', exc)
+    return existing is not None
+
+
+def _add_communication_entry(
+    session,
+    execution: Execution,
+    solution: TaskSolution,
+    task: Task,
+    question: str | None,
+) -> None:
+    question_text = question.strip() if question else None
     if not question_text:
         question_text = _build_default_question(task)
     if not question_text:
@@ -130,51 +219,48 @@ async def _ensure_communication_entry(session, execution: Execution, solution: T
     session.add(communication)
 
 
-async def _update_adaptive_recommendation(session, execution: Execution, solution: TaskSolution, task: Task | None) -> None:
+async def _load_adaptive_binding(session, execution: Execution, task: Task | None) -> UserContestTasks | None:
     if not (execution.vacancy_id and execution.task_id and task):
-        return
-    binding = await session.scalar(
+        return None
+    return await session.scalar(
         select(UserContestTasks).where(
             UserContestTasks.user_id == execution.user_id,
             UserContestTasks.vacancy_id == execution.vacancy_id,
         )
     )
-    if not binding:
-        return
-    # Count bad attempts
-    stmt = select(Execution).where(
-        Execution.user_id == execution.user_id,
-        Execution.task_id == execution.task_id,
-        Execution.vacancy_id == execution.vacancy_id,
-        Execution.is_submit.is_(True),
-        Execution.id != execution.id,
+
+
+async def _count_bad_attempts(session, execution: Execution) -> int:
+    # Только вердикты прошлых отправок, без кода и полного результата
+    verdicts = await session.scalars(
+        select(Execution.result['verdict'].as_string()).where(
+            Execution.user_id == execution.user_id,
+            Execution.task_id == execution.task_id,
+            Execution.vacancy_id == execution.vacancy_id,
+            Execution.is_submit.is_(True),
+            Execution.id != execution.id,
+        )
     )
-    executions = await session.scalars(stmt)
-    bad_attempts = 0
-    for exec_item in executions:
-        verdict = None
-        if exec_item.result and isinstance(exec_item.result, dict):
-            verdict = exec_item.result.get('verdict')
-        if verdict != 'ACCEPTED':
-            bad_attempts += 1
+    return sum(1 for verdict in verdicts if verdict != 'ACCEPTED')
+
 
+async def _fetch_adaptive(
+    execution: Execution,
+    solution: TaskSolution,
+    task: Task,
+    bad_attempts: int,
+) -> dict[str, Any]:
     total_time = None
     if execution.started_at and execution.completed_at:
         delta = execution.completed_at - execution.started_at
         total_time = delta.total_seconds()
 
-    try:
-        adaptive = await ml_client.adaptive_next_level(
-            current_difficulty=task.difficulty or 'medium',
-            is_passed=solution.status == 'solved',
-            bad_attempts=bad_attempts,
-            total_time_seconds=total_time or 0,
-        )
-        binding.next_difficulty = adaptive.get('next_difficulty')
-        binding.next_reason = adaptive.get('reason')
-        await _swap_task_if_needed(session, binding, solution.task_id, adaptive.get('next_difficulty'))
-    except Exception as exc:  # noqa: BLE001
-        logger.exception('Failed to update adaptive difficulty: %s', exc)
+    return await ml_client.adaptive_next_level(
+        current_difficulty=task.difficulty or 'medium',
+        is_passed=solution.status == 'solved',
+        bad_attempts=bad_attempts,
+        total_time_seconds=total_time or 0,
+    )
 
 
 async def _swap_task_if_needed(session, binding: UserContestTasks, solved_task_id: uuid.UUID, target_difficulty: str | None) -> None:
@@ -198,10 +284,6 @@ async def _swap_task_if_needed(session, binding: UserContestTasks, solved_task_i
     binding.task_ids[idx] = new_task.id
 
 
-def schedule_post_submit(execution_id: uuid.UUID) -> None:
-    asyncio.create_task(process_post_submit(execution_id))
-
-
 def _build_default_question(task: Task) -> str | None:
     """Возвращает дефолтный follow-up вопрос, если ML недоступен."""
     title = (task.title or '').strip()
@@ -0,0 +1,179 @@
+"""Durable post-submit job queue in Postgres and its workers"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.database import async_session_factory
+from app.models import PostSubmitJob
+from app.services.post_submit import process_post_submit, stage_timings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Отсрочка повтора: base * 2^(attempt-1), не больше max, плюс до 20% случайного разброса
+RETRY_BASE_SECONDS = 5.0
+RETRY_MAX_SECONDS = 600.0
+
+
+async def enqueue_post_submit(session: AsyncSession, execution_id: uuid.UUID) -> None:
+    """
+    Поставить выполнение в очередь. Задача пишется в той же транзакции, что и решение,
+    поэтому после коммита она не потеряется даже при падении процесса. Повторный итоговый
+    callback executor для того же выполнения не создаёт вторую задачу.
+    """
+    await session.execute(
+        insert(PostSubmitJob)
+        .values(id=uuid.uuid4(), execution_id=execution_id, status='pending', attempts=0)
+        .on_conflict_do_nothing(index_elements=['execution_id'])
+    )
+
+
+def _retry_delay(attempts: int) -> float:
+    delay = min(RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), RETRY_MAX_SECONDS)
+    return delay * (1 + random.uniform(0, 0.2))
+
+
+class PostSubmitWorkerPool:
+    """
+    Воркеры, разбирающие post_submit_jobs.
+
+    Задача забирается через SELECT ... FOR UPDATE SKIP LOCKED и получает аренду
+    (locked_until): если воркер упал, по истечении аренды задачу заберёт другой воркер,
+    в этом или в отдельном процессе (scripts/post_submit_worker.py). Ошибки повторяются
+    с экспоненциальной отсрочкой до max_attempts, после чего задача остаётся в failed.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.post_submit_workers,
+        poll_interval: float = settings.post_submit_poll_interval,
+        visibility_timeout: int = settings.post_submit_visibility_timeout,
+        max_attempts: int = settings.post_submit_max_attempts,
+    ) -> None:
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._tasks: list[asyncio.Task] = []
+        self._stats = {'processed': 0, 'retried': 0, 'failed': 0}
+
+    def start(self) -> None:
+        self._stopping = False
+        for index in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(index)))
+        logger.info(f'Started {self.workers} post-submit workers')
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Дать текущим задачам завершиться; незавершённые вернутся в очередь по аренде"""
+        self._stopping = True
+        self._wakeup.set()
+        tasks, self._tasks = self._tasks, []
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    def notify(self) -> None:
+        """Разбудить воркеры этого процесса сразу после постановки задачи"""
+        self._wakeup.set()
+
+    async def _worker(self, index: int) -> None:
+        while not self._stopping:
+            try:
+                job = await self._claim()
+            except Exception as exc:  # noqa: BLE001
+                logger.exception(f'Post-submit worker {index} failed to claim a job: {exc}')
+                job = None
+            if job is not None:
+                await self._run(job)
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _claim(self) -> tuple[uuid.UUID, uuid.UUID, int, datetime] | None:
+        async with async_session_factory() as session:
+            now = datetime.now(timezone.utc)
+            job = await session.scalar(
+                select(PostSubmitJob)
+                .where(
+                    or_(
+                        and_(PostSubmitJob.status == 'pending', PostSubmitJob.run_after <= now),
+                        # Аренда истекла: воркер упал или завис посреди обработки
+                        and_(PostSubmitJob.status == 'running', PostSubmitJob.locked_until < now),
+                    )
+                )
+                .order_by(PostSubmitJob.run_after)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            if job is None:
+                return None
+            if job.attempts >= self.max_attempts:
+                job.status = 'failed'
+                job.locked_until = None
+                job.last_error = job.last_error or 'Visibility timeout expired on the last attempt'
+                await session.commit()
+                self._stats['failed'] += 1
+                return None
+            job.status = 'running'
+            job.attempts += 1
+            job.locked_until = now + timedelta(seconds=self.visibility_timeout)
+            await session.commit()
+            return job.id, job.execution_id, job.attempts, job.locked_until
+
+    async def _run(self, job: tuple[uuid.UUID, uuid.UUID, int, datetime]) -> None:
+        job_id, execution_id, attempts, lease = job
+        try:
+            await asyncio.wait_for(process_post_submit(execution_id), timeout=self.visibility_timeout)
+        except Exception as exc:  # noqa: BLE001
+            error = f'{type(exc).__name__}: {exc}'
+            if attempts >= self.max_attempts:
+                logger.error(f'Post-submit job {job_id} failed after {attempts} attempts: {error}')
+                values: dict[str, Any] = {'status': 'failed', 'locked_until': None, 'last_error': error}
+                self._stats['failed'] += 1
+            else:
+                delay = _retry_delay(attempts)
+                logger.warning(f'Post-submit job {job_id} attempt {attempts} failed, retrying in {delay:.0f}s: {error}')
+                values = {
+                    'status': 'pending',
+                    'locked_until': None,
+                    'last_error': error,
+                    'run_after': datetime.now(timezone.utc) + timedelta(seconds=delay),
+                }
+                self._stats['retried'] += 1
+        else:
+            values = {'status': 'done', 'locked_until': None, 'last_error': None}
+            self._stats['processed'] += 1
+
+        async with async_session_factory() as session:
+            # Аренда могла истечь и задачу уже забрал другой воркер - его результат не трогаем
+            await session.execute(
+                update(PostSubmitJob)
+                .where(PostSubmitJob.id == job_id, PostSubmitJob.locked_until == lease)
+                .values(**values)
+            )
+            await session.commit()
+
+    def stats(self) -> dict[str, Any]:
+        return {'workers': len(self._tasks), **self._stats, 'stages': stage_timings.stats()}
+
+
+post_submit_workers = PostSubmitWorkerPool()
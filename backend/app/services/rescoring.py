@@ -0,0 +1,149 @@
+"""Bulk re-scoring of a vacancy's solutions through the ML batch endpoints"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from typing import Any, AsyncIterator
+
+from sqlalchemy import select, update
+
+from app.database import async_session_factory
+from app.models import Task, TaskSolution
+from app.services.ml_client import ml_client
+from app.services.post_submit import hidden_test_inputs
+
+logger = logging.getLogger(__name__)
+
+# Решений на один пакетный запрос к ML (не больше BATCH_MAX_ITEMS ML сервиса)
+RESCORE_CHUNK_SIZE = 50
+# Сколько ошибок отдельных решений возвращать в итоговом отчёте
+MAX_REPORTED_ERRORS = 50
+DIFFICULTIES = ('easy', 'medium', 'hard')
+
+
+async def rescore_vacancy(
+    vacancy_id: uuid.UUID,
+    evaluate: bool = True,
+    anti_cheat: bool = True,
+    chunk_size: int = RESCORE_CHUNK_SIZE,
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Переоценить решённые задачи вакансии (как post-submit, но пакетами).
+
+    Решения читаются порциями по id (keyset), каждая порция уходит одним запросом в
+    /evaluate/batch и /anti-cheat/check/batch, результаты пишутся одним bulk UPDATE на
+    порцию. После каждой порции отдаётся прогресс, в конце - итог со списком ошибок.
+    """
+    summary: dict[str, Any] = {'processed': 0, 'evaluated': 0, 'anti_cheat_checked': 0, 'failed': 0}
+    errors: list[dict[str, str]] = []
+    last_id: uuid.UUID | None = None
+    hidden_tests_cache: dict[uuid.UUID, list[str]] = {}
+
+    while True:
+        async with async_session_factory() as session:
+            stmt = (
+                select(TaskSolution.id, TaskSolution.solution_code, Task)
+                .join(Task, Task.id == TaskSolution.task_id)
+                .where(TaskSolution.vacancy_id == vacancy_id, TaskSolution.status == 'solved')
+                .order_by(TaskSolution.id)
+                .limit(chunk_size)
+            )
+            if last_id is not None:
+                stmt = stmt.where(TaskSolution.id > last_id)
+            rows = (await session.execute(stmt)).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+        failed_ids: set[uuid.UUID] = set()
+        updates: dict[uuid.UUID, dict[str, Any]] = {row[0]: {'id': row[0]} for row in rows}
+
+        # Оценка и анти-чит порции независимы - оба пакетных запроса идут одновременно
+        calls = []
+        if evaluate:
+            evaluate_items = []
+            for _, code, task in rows:
+                if task.id not in hidden_tests_cache:
+                    hidden_tests_cache[task.id] = hidden_test_inputs(task)
+                evaluate_items.append({
+                    'code': code,
+                    'task_difficulty': task.difficulty if task.difficulty in DIFFICULTIES else 'medium',
+                    'task_description': task.description or '',
+                    'hidden_tests': hidden_tests_cache[task.id],
+                })
+            calls.append(_run_batch(ml_client.evaluate_code_batch, evaluate_items))
+        if anti_cheat:
+            anti_cheat_items = [
+                {'code': code, 'problem_description': task.description or ''}
+                for _, code, task in rows
+            ]
+            calls.append(_run_batch(ml_client.check_anti_cheat_batch, anti_cheat_items))
+        outcomes = list(await asyncio.gather(*calls))
+        evaluate_outcomes = outcomes.pop(0) if evaluate else []
+        anti_cheat_outcomes = outcomes.pop(0) if anti_cheat else []
+
+        if evaluate:
+            for solution_id, outcome in _match_outcomes(rows, evaluate_outcomes):
+                if outcome.get('error') or not outcome.get('result'):
+                    failed_ids.add(solution_id)
+                    _report(errors, solution_id, 'evaluate', outcome.get('error'))
+                    continue
+                evaluation = outcome['result']
+                updates[solution_id].update(
+                    ml_correctness=evaluation.get('correctness_score'),
+                    ml_efficiency=evaluation.get('efficiency_score'),
+                    ml_clean_code=evaluation.get('clean_code_score'),
+                    ml_feedback=evaluation.get('feedback'),
+                    ml_passed=evaluation.get('passed'),
+                )
+                summary['evaluated'] += 1
+
+        if anti_cheat:
+            for solution_id, outcome in _match_outcomes(rows, anti_cheat_outcomes):
+                if outcome.get('error') or not outcome.get('result'):
+                    failed_ids.add(solution_id)
+                    _report(errors, solution_id, 'anti_cheat', outcome.get('error'))
+                    continue
+                result = outcome['result']
+                updates[solution_id].update(
+                    anti_cheat_flag=result.get('is_suspicious'),
+                    anti_cheat_reason=result.get('reason'),
+                )
+                summary['anti_cheat_checked'] += 1
+
+        # Bulk UPDATE по первичному ключу; executemany группирует строки с одинаковым набором колонок.
+        # Соединение с БД не держим, пока ждём ML: сессия открывается только на чтение и запись
+        params = [values for values in updates.values() if len(values) > 1]
+        if params:
+            async with async_session_factory() as session:
+                await session.execute(update(TaskSolution), params)
+                await session.commit()
+
+        summary['processed'] += len(rows)
+        summary['failed'] += len(failed_ids)
+        yield {'event': 'progress', **summary}
+
+    logger.info(f'Re-scored vacancy {vacancy_id}: {summary}')
+    yield {'event': 'done', **summary, 'errors': errors}
+
+
+async def _run_batch(call, items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # Ошибка всего запроса (ML недоступен) - ошибка каждого элемента порции
+    try:
+        return await call(items)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning(f'ML batch request failed: {exc}')
+        return [{'index': index, 'result': None, 'error': str(exc) or type(exc).__name__} for index in range(len(items))]
+
+
+def _match_outcomes(rows, outcomes: list[dict[str, Any]]):
+    by_index = {outcome.get('index'): outcome for outcome in outcomes}
+    for index, row in enumerate(rows):
+        yield row[0], by_index.get(index, {'error': 'Missing from ML batch response'})
+
+
+def _report(errors: list[dict[str, str]], solution_id: uuid.UUID, stage: str, error: str | None) -> None:
+    if len(errors) < MAX_REPORTED_ERRORS:
+        errors.append({'solution_id': str(solution_id), 'stage': stage, 'error': error or 'Empty result'})
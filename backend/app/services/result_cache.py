@@ -0,0 +1,111 @@
+"""Memoization of submission results by (task, language, code, test bundle)"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import uuid
+from typing import Any
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Execution
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_source(content: str) -> str:
+    # Разные переводы строк и хвостовые пустые строки не меняют поведение программы
+    return content.replace('\r\n', '\n').rstrip()
+
+
+def make_result_key(
+    task_id: uuid.UUID,
+    language: str,
+    files: dict[str, str],
+    bundle_hash: str,
+    fail_fast: bool,
+    timeout: int,
+    limits: dict[str, int] | None = None,
+) -> str:
+    """Ключ результата: всё, от чего зависит вердикт на фиксированном наборе тестов"""
+    payload = {
+        'task_id': str(task_id),
+        'language': language,
+        'files': {path: _normalize_source(content) for path, content in sorted(files.items())},
+        'bundle': bundle_hash,
+        'fail_fast': fail_fast,
+        'timeout': timeout,
+        'limits': limits or {},
+    }
+    canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def is_memoizable(status: str, result: dict[str, Any] | None) -> bool:
+    """
+    Запоминаем только детерминированные итоги: выполнение завершено, тесты прогнаны,
+    и ни один тест не упал по инфраструктурной причине или лимиту времени/памяти (exit_code -1)
+    """
+    if status != 'completed' or not isinstance(result, dict):
+        return False
+    test_results = result.get('test_results')
+    if not test_results:
+        return False
+    return all(
+        isinstance(tr, dict) and (tr.get('skipped') or tr.get('exit_code', 0) != -1)
+        for tr in test_results
+    )
+
+
+class ResultCache:
+    """
+    Поиск готового результата по ключу среди завершённых выполнений.
+
+    Ключ хранится в Execution.result_key, поэтому кэш переживает рестарт и общий для всех
+    процессов backend. Для Submit отдаётся нескрытый результат (Execution.full_result):
+    по нему заполняется решение задачи, а кандидату его заново скрывает _apply_execution_result. Изменение тестов задачи меняет хэш набора, а crud.update_task ещё
+    и явно снимает ключи со старых выполнений задачи.
+    """
+
+    def __init__(self) -> None:
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    async def lookup(self, session: AsyncSession, result_key: str) -> dict[str, Any] | None:
+        row = (
+            await session.execute(
+                select(Execution.full_result, Execution.result)
+                .where(Execution.result_key == result_key, Execution.status == 'completed')
+                .order_by(Execution.completed_at.desc())
+                .limit(1)
+            )
+        ).first()
+        result = None
+        if row is not None:
+            result = row.full_result if row.full_result is not None else row.result
+        if result is None:
+            self._stats['misses'] += 1
+            return None
+        self._stats['hits'] += 1
+        return result
+
+    async def invalidate_task(self, session: AsyncSession, task_id: uuid.UUID) -> None:
+        await session.execute(
+            update(Execution)
+            .where(Execution.task_id == task_id, Execution.result_key.is_not(None))
+            .values(result_key=None)
+        )
+        self._stats['invalidations'] += 1
+        logger.info(f'Invalidated memoized results for task {task_id}')
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self._stats['hits'] + self._stats['misses']
+        return {
+            **self._stats,
+            'hit_rate': round(self._stats['hits'] / lookups, 3) if lookups else None,
+        }
+
+
+result_cache = ResultCache()
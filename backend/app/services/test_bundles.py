@@ -0,0 +1,180 @@
+"""Pre-parsed per-task test bundles shared by create_execution and the executor"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Task
+
+# open - только открытые тесты (Run), all - открытые + закрытые (Submit)
+BUNDLE_SCOPES = ('open', 'all')
+MAX_CACHED_TASKS = 512
+
+
+@dataclass(frozen=True)
+class TestBundle:
+    task_id: uuid.UUID
+    scope: str
+    hash: str
+    test_cases: tuple[dict[str, str], ...]
+    # Лимиты теста по языкам из замера эталонных решений; для языка без замера действуют
+    # таймаут запроса и лимиты executor по умолчанию
+    resource_limits: dict[str, dict[str, int]] = field(default_factory=dict)
+
+    def ref(self) -> dict[str, Any]:
+        """Ссылка на набор для executor: по ней он берёт тесты из своего кэша или у backend"""
+        return {
+            'task_id': str(self.task_id),
+            'scope': self.scope,
+            'hash': self.hash,
+            'count': len(self.test_cases),
+        }
+
+    def limits(self, language: str) -> dict[str, int]:
+        """Лимиты теста языка для запроса к executor (только заданные)"""
+        limits = self.resource_limits.get(language) or {}
+        return {name: limits[name] for name in ('time_limit_ms', 'memory_limit_mb') if limits.get(name)}
+
+
+def _parse_tests(raw: str | None) -> list[dict[str, str]]:
+    if not raw:
+        return []
+    try:
+        parsed = json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        return []
+    tests = []
+    for test in parsed if isinstance(parsed, list) else []:
+        if isinstance(test, dict):
+            tests.append({'input': test.get('input', '') or '', 'output': test.get('output', '') or ''})
+    return tests
+
+
+def _build_bundle(
+    task_id: uuid.UUID,
+    scope: str,
+    tests: list[dict[str, str]],
+    resource_limits: dict[str, dict[str, int]] | None = None,
+) -> TestBundle:
+    canonical = json.dumps(tests, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+    digest = hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    return TestBundle(
+        task_id=task_id,
+        scope=scope,
+        hash=digest,
+        test_cases=tuple(tests),
+        resource_limits=resource_limits or {},
+    )
+
+
+class TestBundleCache:
+    """
+    Кэш разобранных тестов задач.
+
+    JSON из Task.open_tests/hidden_tests разбирается один раз на версию задачи (по
+    updated_at); crud.update_task дополнительно сбрасывает запись явно. Хэш набора -
+    одновременно его версия и ключ кэша на стороне executor.
+    """
+
+    def __init__(self, max_tasks: int = MAX_CACHED_TASKS) -> None:
+        self.max_tasks = max_tasks
+        self._entries: OrderedDict[uuid.UUID, tuple[datetime | None, dict[str, TestBundle]]] = OrderedDict()
+
+    def invalidate(self, task_id: uuid.UUID) -> None:
+        self._entries.pop(task_id, None)
+
+    def for_task(self, task: Task, scope: str) -> TestBundle:
+        if scope not in BUNDLE_SCOPES:
+            raise ValueError(f'Unknown test bundle scope: {scope}')
+        entry = self._entries.get(task.id)
+        if entry is not None and entry[0] == task.updated_at:
+            self._entries.move_to_end(task.id)
+            return entry[1][scope]
+
+        open_tests = _parse_tests(task.open_tests)
+        hidden_tests = _parse_tests(task.hidden_tests)
+        bundles = {
+            'open': _build_bundle(task.id, 'open', open_tests, task.resource_limits),
+            'all': _build_bundle(task.id, 'all', open_tests + hidden_tests, task.resource_limits),
+        }
+        self._entries[task.id] = (task.updated_at, bundles)
+        self._entries.move_to_end(task.id)
+        while len(self._entries) > self.max_tasks:
+            self._entries.popitem(last=False)
+        return bundles[scope]
+
+    async def get(self, session: AsyncSession, task_id: uuid.UUID, scope: str) -> TestBundle | None:
+        if scope not in BUNDLE_SCOPES:
+            raise ValueError(f'Unknown test bundle scope: {scope}')
+        # Сначала только версия задачи: при попадании тексты тестов из БД не читаются вовсе
+        updated_at = await session.scalar(select(Task.updated_at).where(Task.id == task_id))
+        entry = self._entries.get(task_id)
+        if entry is not None and updated_at is not None and entry[0] == updated_at:
+            self._entries.move_to_end(task_id)
+            return entry[1][scope]
+        task = await session.get(Task, task_id)
+        if not task:
+            return None
+        return self.for_task(task, scope)
+
+
+HIDDEN_TEST_OUTPUT = 'Скрытый тест'
+_TEST_LINE = re.compile(r'^(✅|❌) Тест \d+: ')
+
+
+def redact_hidden_tests(result: dict[str, Any] | None, visible_count: int) -> dict[str, Any] | None:
+    """
+    Результат Submit в том виде, в каком его видит кандидат: у закрытых тестов (номер больше
+    числа открытых) убраны вход, ожидаемый и фактический вывод, а в stdout - их строки.
+    Иначе по выдаче можно восстановить набор 'all' и его хэш.
+    """
+    if not isinstance(result, dict) or not isinstance(result.get('test_results'), list):
+        return result
+    test_results = []
+    error_test = None
+    for tr in result['test_results']:
+        if not isinstance(tr, dict):
+            test_results.append(tr)
+            continue
+        if error_test is None and 'Ошибка: ' in (tr.get('actual_output') or ''):
+            error_test = tr
+        if (tr.get('test_index') or 0) > visible_count:
+            tr = {**tr, 'input': '', 'expected_output': '', 'actual_output': HIDDEN_TEST_OUTPUT}
+        test_results.append(tr)
+
+    redacted = {**result, 'test_results': test_results}
+    stdout = result.get('stdout') or ''
+    if stdout.startswith('Вердикт:'):
+        # Строки тестов executor пересобираются по уже очищенным test_results
+        lines = stdout.split('\n')
+        header = next((i for i, line in enumerate(lines) if _TEST_LINE.match(line)), len(lines))
+        test_lines = []
+        for tr in test_results:
+            if not isinstance(tr, dict):
+                continue
+            status = '✅' if tr.get('passed') else '❌'
+            if (tr.get('test_index') or 0) > visible_count:
+                test_lines.append(f'{status} Тест {tr.get("test_index")}: {HIDDEN_TEST_OUTPUT}')
+            else:
+                test_lines.append(
+                    f'{status} Тест {tr.get("test_index")}: {tr.get("actual_output")} '
+                    f'(ожидалось: {tr.get("expected_output")})'
+                )
+        redacted['stdout'] = '\n'.join(lines[:header] + test_lines)
+    if error_test is not None and (error_test.get('test_index') or 0) > visible_count:
+        # stderr executor - вывод первого теста с ошибкой; вывод программы на закрытом входе не отдаём
+        redacted['stderr'] = f'Ошибка на скрытом тесте {error_test.get("test_index")}'
+    return redacted
+
+
+test_bundles = TestBundleCache()
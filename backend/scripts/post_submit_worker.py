@@ -0,0 +1,42 @@
+"""Run post-submit workers as a separate process.
+
+Usage: python scripts/post_submit_worker.py [workers]
+Several such processes (and the backend's own workers) can share one queue.
+"""
+
+import asyncio
+import signal
+import sys
+from pathlib import Path
+
+# Make backend package importable when running directly
+backend_root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(backend_root))
+
+from app.core.config import get_settings
+from app.database import engine
+from app.services.http_clients import http_clients
+from app.services.post_submit_jobs import PostSubmitWorkerPool
+
+
+async def main() -> None:
+    settings = get_settings()
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else max(settings.post_submit_workers, 1)
+    pool = PostSubmitWorkerPool(workers=workers)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    pool.start()
+    print(f'Post-submit worker started with {workers} workers')
+    await stop.wait()
+    print('Stopping post-submit worker...')
+    await pool.stop()
+    await http_clients.close_all()
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
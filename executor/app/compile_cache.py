@@ -0,0 +1,138 @@
+"""Compile Cache - Кэш скомпилированных артефактов по хэшу исходников"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any
+
+COMPILE_CACHE_DIR = os.getenv('EXECUTOR_COMPILE_CACHE_DIR', '/var/cache/vibecode/compile')
+COMPILE_CACHE_MAX_MB = int(os.getenv('EXECUTOR_COMPILE_CACHE_MAX_MB', '512'))
+
+
+class CompileCache:
+    """
+    Дисковый content-addressed кэш сборок.
+
+    Ключ - sha256 от (язык, digest образа тулчейна, все исходные файлы), значение -
+    tar-архив директории сборки. Вытеснение LRU по суммарному размеру: при попадании
+    у файла обновляется mtime, при превышении лимита удаляются самые старые записи.
+    """
+
+    def __init__(self, root: str = COMPILE_CACHE_DIR, max_bytes: int = COMPILE_CACHE_MAX_MB * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, int] = OrderedDict()  # key -> размер, от старых к новым
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._enabled = self.max_bytes > 0
+        if self._enabled:
+            try:
+                os.makedirs(self.root, exist_ok=True)
+                self._load_index()
+            except OSError as exc:
+                print(f'Compile cache disabled: {exc}')  # noqa: T201
+                self._enabled = False
+
+    @staticmethod
+    def make_key(language: str, image_digest: str, files: dict[str, str], command: str = '') -> str:
+        """Ключ сборки; command - команда компиляции, чтобы смена флагов не отдавала старые артефакты"""
+        digest = hashlib.sha256()
+        for part in (language, image_digest, command):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        for path in sorted(files):
+            digest.update(path.encode('utf-8'))
+            digest.update(b'\0')
+            digest.update(files[path].encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f'{key}.tar')
+
+    def _load_index(self) -> None:
+        """Восстановить индекс по файлам на диске (порядок LRU - по mtime)"""
+        found = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if not filename.endswith('.tar'):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                found.append((stat.st_mtime, filename[:-len('.tar')], stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._size += size
+        self._evict()
+
+    def get(self, key: str) -> bytes | None:
+        if not self._enabled:
+            return None
+        with self._lock:
+            if key not in self._entries:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._size -= self._entries.pop(key, 0)
+                self._misses += 1
+            return None
+        with self._lock:
+            self._hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if not self._enabled or len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Атомарная запись: параллельные сборки одного и того же кода не увидят битый файл
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            print(f'Failed to store compile artifacts: {exc}')  # noqa: T201
+            return
+        with self._lock:
+            self._size -= self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._size += len(data)
+            self._evict()
+
+    def _evict(self) -> None:
+        """Удалить самые давно использованные записи, пока кэш больше лимита (под self._lock)"""
+        while self._size > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._size -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'enabled': self._enabled,
+                'entries': len(self._entries),
+                'size_bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 3) if lookups else None,
+            }
@@ -0,0 +1,363 @@
+"""Container Pool - Пул заранее запущенных песочниц для DockerExecutor"""
+
+import io
+import os
+import shlex
+import tarfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+import docker
+
+# Сколько простаивающих контейнеров держим «тёплыми» для каждого языка
+POOL_SIZE = int(os.getenv('EXECUTOR_POOL_SIZE', '2'))
+# Верхняя граница контейнеров (занятые + свободные) на язык
+POOL_MAX_CONTAINERS = int(os.getenv('EXECUTOR_POOL_MAX_CONTAINERS', '8'))
+# После скольких задач контейнер пересоздаётся
+POOL_MAX_USES = int(os.getenv('EXECUTOR_POOL_MAX_USES', '50'))
+# Сколько ждать свободный контейнер, прежде чем сдаться
+POOL_ACQUIRE_TIMEOUT = float(os.getenv('EXECUTOR_POOL_ACQUIRE_TIMEOUT', '60'))
+# Доля ядра CPU на один параллельно выполняемый тест
+TEST_CPU_SHARE = float(os.getenv('EXECUTOR_TEST_CPU_SHARE', '0.5'))
+
+WORKSPACE = '/workspace'
+POOL_LABEL = 'vibecode.executor.pool'
+
+# Код возврата процесса, убитого SIGKILL (`timeout -s KILL`, харнесс, OOM killer)
+KILLED_EXIT_CODE = 137
+
+# Pid всех процессов контейнера, кроме init (PID 1) и самой команды
+LIST_PROCESSES = 'for dir in /proc/[0-9]*; do pid=${dir#/proc/}; [ "$pid" = 1 ] || [ "$pid" = $$ ] || echo "$pid"; done'
+# Убить всё, кроме init, keep-alive процесса и самой команды, и убедиться, что ничего не осталось.
+# Процессы, запущенные через setsid или nohup ... &, переживают `timeout -s KILL` и харнесс
+KILL_STRAYS = (
+    'keep={keep}; '
+    'for attempt in 1 2 3 4 5 6 7 8 9 10; do '
+    'left=; '
+    'for dir in /proc/[0-9]*; do '
+    'pid=${{dir#/proc/}}; '
+    'case "$pid" in 1|"$keep"|"$$") continue ;; esac; '
+    'kill -9 "$pid" 2>/dev/null; left="$left $pid"; '
+    'done; '
+    '[ -z "$left" ] && exit 0; '
+    'sleep 0.05; '
+    'done; '
+    'echo "stray processes:$left" >&2; exit 1'
+)
+
+
+class SandboxContainer:
+    """Запущенный изолированный контейнер, в котором выполняются exec-команды"""
+
+    def __init__(self, container, language: str, cache: dict[str, Any] | None = None):
+        self.container = container
+        self.language = language
+        # Кэш тулчейна на tmpfs: {'path', 'seed', 'max_mb'}, наполняется из seed в образе
+        self.cache = cache
+        self.uses = 0
+        self.created_at = time.time()
+        # Pid процесса `tail -f /dev/null`, который держит контейнер запущенным
+        self.keepalive_pid: int | None = None
+        # Если в контейнере что-то пошло не так (таймаут, ошибка Docker) - не возвращаем его в пул
+        self.tainted = False
+
+    def put_files(self, files: dict[str, str | bytes], dest: str = WORKSPACE) -> None:
+        """Записать файлы в контейнер одним tar-архивом"""
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode='w') as tar:
+            for filepath, content in files.items():
+                data = content.encode('utf-8') if isinstance(content, str) else content
+                info = tarfile.TarInfo(name=filepath.lstrip('/'))
+                info.size = len(data)
+                info.mode = 0o644
+                info.mtime = int(time.time())
+                tar.addfile(info, io.BytesIO(data))
+        self.container.put_archive(dest, buffer.getvalue())
+
+    def get_files(self, path: str) -> dict[str, bytes]:
+        """Забрать содержимое директории контейнера одним tar-архивом: {имя файла: байты}"""
+        buffer = io.BytesIO(self.get_archive(path))
+        files: dict[str, bytes] = {}
+        with tarfile.open(fileobj=buffer, mode='r') as tar:
+            for member in tar.getmembers():
+                if not member.isfile():
+                    continue
+                extracted = tar.extractfile(member)
+                if extracted is not None:
+                    files[os.path.basename(member.name)] = extracted.read()
+        return files
+
+    def get_archive(self, path: str) -> bytes:
+        """Забрать директорию контейнера как tar-архив (корень архива - имя директории)"""
+        stream, _ = self.container.get_archive(path)
+        return b''.join(stream)
+
+    def put_archive(self, data: bytes, dest: str = WORKSPACE) -> None:
+        """Распаковать ранее полученный tar-архив в директорию контейнера"""
+        self.container.put_archive(dest, data)
+
+    def exec(
+        self,
+        command: str,
+        timeout: int,
+        environment: dict[str, str] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Выполнить shell-команду внутри контейнера с ограничением по времени
+
+        Returns:
+            dict с stdout, stderr, exit_code, timed_out
+        """
+        wrapped = f'timeout -s KILL {int(timeout)} /bin/sh -c {shlex.quote(command)}'
+        started = time.monotonic()
+        exit_code, output = self.container.exec_run(
+            ['/bin/sh', '-c', wrapped],
+            workdir=WORKSPACE,
+            environment=environment,
+            demux=True,
+        )
+        elapsed = time.monotonic() - started
+        stdout_bytes, stderr_bytes = output if output else (None, None)
+        timed_out = exit_code == KILLED_EXIT_CODE and elapsed >= timeout
+        if timed_out:
+            self.tainted = True
+        return {
+            'stdout': stdout_bytes.decode('utf-8', errors='replace') if stdout_bytes else '',
+            'stderr': stderr_bytes.decode('utf-8', errors='replace') if stderr_bytes else '',
+            'exit_code': exit_code if exit_code is not None else -1,
+            'timed_out': timed_out,
+        }
+
+    def detect_keepalive(self) -> None:
+        """Запомнить pid keep-alive процесса, пока в контейнере не выполнялся чужой код"""
+        exit_code, output = self.container.exec_run(['/bin/sh', '-c', LIST_PROCESSES])
+        pids = (output or b'').decode('utf-8', errors='replace').split()
+        if exit_code != 0 or len(pids) != 1:
+            raise RuntimeError(f'Unexpected processes in a fresh {self.language} sandbox: {pids}')
+        self.keepalive_pid = int(pids[0])
+
+    def seed_cache(self) -> None:
+        """Заполнить кэш тулчейна прогретой копией из образа"""
+        if not self.cache:
+            return
+        path, seed = self.cache['path'], self.cache['seed']
+        self.container.exec_run(['/bin/sh', '-c', f'[ -d {seed} ] && cp -a {seed}/. {path}/; true'])
+
+    def wipe(self) -> None:
+        """
+        Подготовить контейнер к следующей задаче: убить оставшиеся процессы предыдущей
+        (иначе они прочитают чужой код и тесты в /workspace), очистить рабочую директорию и /tmp
+        """
+        if self.keepalive_pid is None:
+            self.tainted = True
+            return
+        exit_code, _ = self.container.exec_run(['/bin/sh', '-c', KILL_STRAYS.format(keep=self.keepalive_pid)])
+        if exit_code != 0:
+            self.tainted = True
+            return
+        command = f'rm -rf {WORKSPACE}/* {WORKSPACE}/.[!.]* /tmp/* /tmp/.[!.]* 2>/dev/null; true'
+        if self.cache:
+            # Кэш тулчейна тоже возвращаем к прогретому состоянию: следующая задача не увидит
+            # чужих записей, а размер кэша не растёт между задачами
+            path, seed = self.cache['path'], self.cache['seed']
+            command += f'; rm -rf {path}/* {path}/.[!.]* 2>/dev/null; [ -d {seed} ] && cp -a {seed}/. {path}/; true'
+        exit_code, _ = self.container.exec_run(['/bin/sh', '-c', command])
+        if exit_code != 0:
+            self.tainted = True
+
+    def remove(self) -> None:
+        try:
+            self.container.remove(force=True)
+        except Exception:  # noqa: BLE001
+            pass
+
+
+class ContainerPool:
+    """
+    Пул тёплых контейнеров по языкам.
+
+    Задача арендует контейнер (`lease`), выполняет в нём exec-команды и возвращает его:
+    рабочая директория очищается, а после POOL_MAX_USES задач или после таймаута
+    контейнер удаляется и заменяется новым в фоне.
+    """
+
+    def __init__(
+        self,
+        client: docker.DockerClient,
+        language_config: dict[str, dict[str, Any]],
+        size: int = POOL_SIZE,
+        max_containers: int = POOL_MAX_CONTAINERS,
+        max_uses: int = POOL_MAX_USES,
+        parallelism: int = 1,
+        memory_mb: int = 512,
+    ):
+        self.client = client
+        self.language_config = language_config
+        # Контейнер рассчитан на parallelism одновременно выполняемых тестов
+        self.parallelism = max(1, parallelism)
+        self.memory_mb = memory_mb
+        self.size = max(0, size)
+        self.max_containers = max(1, max_containers, self.size)
+        self.max_uses = max(1, max_uses)
+        self._lock = threading.Condition()
+        self._idle: dict[str, list[SandboxContainer]] = {lang: [] for lang in language_config}
+        self._total: dict[str, int] = {lang: 0 for lang in language_config}
+        self._stats = {'leases': 0, 'cold_starts': 0, 'recycled': 0}
+        self._closed = False
+
+    def _start_container(self, language: str) -> SandboxContainer:
+        """Запустить новый простаивающий контейнер для языка"""
+        config = self.language_config[language]
+        use_network = config.get('network', False)
+        cache = config.get('cache')
+        tmpfs = {WORKSPACE: 'rw,exec,nosuid,size=256m'}
+        if cache:
+            # Размер tmpfs - жёсткий лимит кэша (учитывается в памяти контейнера)
+            tmpfs[cache['path']] = f'rw,nosuid,size={int(cache["max_mb"])}m'
+        container = self.client.containers.run(
+            image=config['image'],
+            command=['tail', '-f', '/dev/null'],
+            detach=True,
+            init=True,
+            working_dir=WORKSPACE,
+            tmpfs=tmpfs,
+            mem_limit=f'{self.memory_mb * self.parallelism}m',
+            cpu_period=100000,
+            cpu_quota=int(100000 * TEST_CPU_SHARE * self.parallelism),
+            pids_limit=256 * self.parallelism,
+            cap_drop=['ALL'],
+            security_opt=['no-new-privileges'],
+            network_disabled=not use_network,
+            environment=config.get('environment'),
+            labels={POOL_LABEL: language},
+        )
+        sandbox = SandboxContainer(container, language, cache)
+        try:
+            sandbox.detect_keepalive()
+            sandbox.seed_cache()
+        except Exception:
+            sandbox.remove()
+            raise
+        return sandbox
+
+    def _reserve_slot(self, language: str, timeout: float) -> SandboxContainer | None:
+        """Взять свободный контейнер или зарезервировать место под новый (вернёт None)"""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise RuntimeError('Container pool is shut down')
+                idle = self._idle[language]
+                if idle:
+                    return idle.pop()
+                if self._total[language] < self.max_containers:
+                    self._total[language] += 1
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f'No free {language} sandbox within {timeout} seconds')
+                self._lock.wait(remaining)
+
+    def acquire(self, language: str, timeout: float = POOL_ACQUIRE_TIMEOUT) -> SandboxContainer:
+        """Арендовать контейнер для языка (блокирующий вызов)"""
+        sandbox = self._reserve_slot(language, timeout)
+        if sandbox is None:
+            try:
+                sandbox = self._start_container(language)
+            except Exception:
+                self._forget(language)
+                raise
+            with self._lock:
+                self._stats['cold_starts'] += 1
+        sandbox.uses += 1
+        with self._lock:
+            self._stats['leases'] += 1
+        return sandbox
+
+    def release(self, sandbox: SandboxContainer) -> None:
+        """Вернуть контейнер в пул (или утилизировать, если он отслужил своё)"""
+        if not sandbox.tainted and sandbox.uses < self.max_uses:
+            try:
+                sandbox.wipe()
+            except Exception:  # noqa: BLE001
+                sandbox.tainted = True
+
+        if sandbox.tainted or sandbox.uses >= self.max_uses or self._closed:
+            sandbox.remove()
+            self._forget(sandbox.language)
+            with self._lock:
+                self._stats['recycled'] += 1
+            self._replenish_async(sandbox.language)
+            return
+
+        with self._lock:
+            self._idle[sandbox.language].append(sandbox)
+            self._lock.notify()
+
+    @contextmanager
+    def lease(self, language: str) -> Iterator[SandboxContainer]:
+        sandbox = self.acquire(language)
+        try:
+            yield sandbox
+        except Exception:
+            sandbox.tainted = True
+            raise
+        finally:
+            self.release(sandbox)
+
+    def _forget(self, language: str) -> None:
+        with self._lock:
+            self._total[language] = max(0, self._total[language] - 1)
+            self._lock.notify()
+
+    def _replenish(self, language: str) -> None:
+        """Дозапустить контейнеры, пока свободных меньше POOL_SIZE"""
+        while True:
+            with self._lock:
+                if (
+                    self._closed
+                    or len(self._idle[language]) >= self.size
+                    or self._total[language] >= self.max_containers
+                ):
+                    return
+                self._total[language] += 1
+            try:
+                sandbox = self._start_container(language)
+            except Exception as exc:  # noqa: BLE001
+                self._forget(language)
+                print(f'Failed to start {language} sandbox: {exc}')  # noqa: T201
+                return
+            with self._lock:
+                self._idle[language].append(sandbox)
+                self._lock.notify()
+
+    def _replenish_async(self, language: str) -> None:
+        if self._closed or self.size == 0:
+            return
+        threading.Thread(target=self._replenish, args=(language,), daemon=True).start()
+
+    def warm_up(self) -> None:
+        """Заполнить пул для всех языков в фоне"""
+        for language in self.language_config:
+            self._replenish_async(language)
+
+    def shutdown(self) -> None:
+        """Удалить все простаивающие контейнеры"""
+        with self._lock:
+            self._closed = True
+            idle = [sandbox for sandboxes in self._idle.values() for sandbox in sandboxes]
+            for sandboxes in self._idle.values():
+                sandboxes.clear()
+            self._lock.notify_all()
+        for sandbox in idle:
+            sandbox.remove()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                'idle': {lang: len(items) for lang, items in self._idle.items()},
+                'total': dict(self._total),
+            }
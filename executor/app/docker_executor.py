@@ -1,40 +1,158 @@
 """Docker Executor - Выполнение кода в Docker контейнерах"""
 
 import asyncio
+import math
 import os
-import tempfile
+import threading
 import time
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
 
 import docker
 
+from .compile_cache import CompileCache
+from .container_pool import TEST_CPU_SHARE, ContainerPool, SandboxContainer
+from .harness import (
+    PROGRESS_COMMAND,
+    RESULTS_DIR,
+    build_harness_files,
+    harness_command,
+    LIMIT_VERDICTS,
+    parse_harness_results,
+    parse_progress,
+)
+from .runner_images import (
+    GO_CACHE_SEED,
+    GO_CACHE_STEPS,
+    JAVA_CDS_ARCHIVE,
+    JAVA_CDS_STEPS,
+    ensure_runner_images,
+    resolve_runner_images,
+)
+
+# Сколько задач одновременно выполняется в песочницах (потоков для синхронного Docker SDK)
+EXECUTOR_CONCURRENCY = int(os.getenv('EXECUTOR_CONCURRENCY', '8'))
+# Сколько тестов одной задачи выполняется параллельно (верхняя граница)
+EXECUTOR_TEST_PARALLELISM = int(os.getenv('EXECUTOR_TEST_PARALLELISM', '4'))
+# Бюджет памяти на один параллельно выполняемый тест
+EXECUTOR_TEST_MEMORY_MB = int(os.getenv('EXECUTOR_TEST_MEMORY_MB', '512'))
+
+# Как часто во время прогона тестов собирается и отправляется прогресс (секунды)
+EXECUTOR_PROGRESS_INTERVAL = float(os.getenv('EXECUTOR_PROGRESS_INTERVAL', '1.0'))
+
+# Лимит GOCACHE песочницы (tmpfs, прогретый стандартной библиотекой из образа)
+EXECUTOR_GO_CACHE_MB = int(os.getenv('EXECUTOR_GO_CACHE_MB', '256'))
+
+# Директория со скомпилированными артефактами внутри песочницы (именно она кэшируется)
+BUILD_DIR = '.build'
+
+
+def _host_memory_mb() -> int | None:
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def resolve_test_parallelism(
+    requested: int = EXECUTOR_TEST_PARALLELISM,
+    concurrency: int = EXECUTOR_CONCURRENCY,
+) -> int:
+    """Ширина параллельного прогона тестов с учётом ядер и памяти хоста"""
+    width = min(max(1, requested), os.cpu_count() or 1)
+    host_memory = _host_memory_mb()
+    if host_memory:
+        # Все одновременно выполняемые задачи должны уместиться в память хоста
+        width = min(width, max(1, host_memory // (EXECUTOR_TEST_MEMORY_MB * max(1, concurrency))))
+    return width
+
 
 class DockerExecutor:
     """Выполняет код в изолированных Docker контейнерах"""
 
-    # Маппинг языков на Docker образы
+    # Маппинг языков на Docker образы: образ песочницы = base_image + runner_steps,
+    # всё необходимое ставится при сборке образа, в песочнице сеть выключена
     LANGUAGE_CONFIG = {
         'python': {
-            'image': 'python:3.12-slim',
+            'base_image': 'python:3.12-slim',
             'main_file': 'main.py',
         },
         'typescript': {
-            'image': 'node:20-slim',
+            'base_image': 'node:20-slim',
             'main_file': 'main.ts',
-            'setup_command': 'npm install -g typescript ts-node',  # Предустановка для ускорения
+            # Компилятор ставится в образ, чтобы не скачивать его через npx на каждый запуск
+            'runner_steps': ['RUN npm install -g typescript@5.6.3 && npm cache clean --force'],
         },
         'go': {
-            'image': 'golang:1.23-alpine',
+            'base_image': 'golang:1.23-alpine',
             'main_file': 'main.go',
+            # Стандартная библиотека уже скомпилирована в образе - go build не начинает с нуля
+            'runner_steps': GO_CACHE_STEPS,
+            'environment': {'GOCACHE': '/cache/go-build'},
+            'cache': {'path': '/cache/go-build', 'seed': GO_CACHE_SEED, 'max_mb': EXECUTOR_GO_CACHE_MB},
         },
         'java': {
-            'image': 'openjdk:21-jdk-slim',
+            'base_image': 'openjdk:21-jdk-slim',
             'main_file': 'Main.java',
+            # CDS архив с классами JDK, типичными для решений, ускоряет старт JVM на каждом тесте
+            'runner_steps': JAVA_CDS_STEPS,
         },
     }
 
-    def __init__(self):
+    def __init__(self, concurrency: int = EXECUTOR_CONCURRENCY):
         self.client = docker.from_env()
+        self.language_config = resolve_runner_images(self.LANGUAGE_CONFIG)
+        self.runner_images: dict[str, str] = {}
+        self.test_parallelism = resolve_test_parallelism(concurrency=concurrency)
+        # Лимиты контейнера масштабируются под число параллельно выполняемых тестов
+        self.pool = ContainerPool(
+            self.client,
+            self.language_config,
+            parallelism=self.test_parallelism,
+            memory_mb=EXECUTOR_TEST_MEMORY_MB,
+        )
+        # docker-py синхронный: вся работа с Docker идёт в ограниченном пуле потоков,
+        # чтобы не блокировать event loop uvicorn
+        self.concurrency = max(1, concurrency)
+        self._threads = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='docker-exec')
+        self._active_lock = threading.Lock()
+        self._active_jobs = 0
+        self.compile_cache = CompileCache()
+        self._image_digests: dict[str, str] = {}
+
+    def stats(self) -> dict[str, Any]:
+        with self._active_lock:
+            active_jobs = self._active_jobs
+        return {
+            'concurrency': self.concurrency,
+            'test_parallelism': self.test_parallelism,
+            'active_jobs': active_jobs,
+            'pool': self.pool.stats(),
+            'compile_cache': self.compile_cache.stats(),
+            'runner_images': dict(self.runner_images),
+        }
+
+    def prepare_images(self) -> None:
+        """Собрать или проверить образы песочниц (блокирующий вызов, при старте сервиса)"""
+        self.runner_images = ensure_runner_images(self.client, self.language_config)
+
+    def shutdown(self) -> None:
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        self.pool.shutdown()
+
+    def _image_digest(self, language: str) -> str:
+        """ID образа тулчейна: после обновления образа старые сборки в кэше не используются"""
+        image = self.language_config[language]['image']
+        digest = self._image_digests.get(language)
+        if digest is None:
+            try:
+                digest = self.client.images.get(image).id
+            except Exception:  # noqa: BLE001
+                # Не кэшируем неудачу: образ мог ещё не скачаться
+                return image
+            self._image_digests[language] = digest
+        return digest
 
     def _detect_language_from_file(self, filepath: str) -> str | None:
         """Определить язык по расширению файла"""
@@ -49,15 +167,74 @@ class DockerExecutor:
         return ext_map.get(ext)
 
     async def execute_code(
-        self, language: str, files: dict[str, str], timeout: int = 30, test_cases: list | None = None
+        self,
+        language: str,
+        files: dict[str, str],
+        timeout: int = 30,
+        test_cases: list | None = None,
+        fail_fast: bool = False,
+        on_progress: Callable[[dict[str, Any]], None] | None = None,
+        time_limit_ms: int | None = None,
+        memory_limit_mb: int | None = None,
     ) -> dict[str, Any]:
         """
-        Выполнить код в Docker контейнере
+        Выполнить код в пуле потоков, не блокируя event loop
+
+        on_progress вызывается из рабочего потока с накопленным прогрессом тестов
+        ({'total', 'completed', 'test_results'}) по мере их завершения.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._threads,
+            partial(
+                self._execute_tracked, language, files, timeout, test_cases, fail_fast, on_progress,
+                time_limit_ms, memory_limit_mb,
+            ),
+        )
+
+    def _execute_tracked(
+        self,
+        language: str,
+        files: dict[str, str],
+        timeout: int,
+        test_cases: list | None,
+        fail_fast: bool,
+        on_progress: Callable[[dict[str, Any]], None] | None = None,
+        time_limit_ms: int | None = None,
+        memory_limit_mb: int | None = None,
+    ) -> dict[str, Any]:
+        with self._active_lock:
+            self._active_jobs += 1
+        try:
+            return self._execute_sync(
+                language, files, timeout, test_cases, fail_fast, on_progress, time_limit_ms, memory_limit_mb
+            )
+        finally:
+            with self._active_lock:
+                self._active_jobs -= 1
+
+    def _execute_sync(
+        self,
+        language: str,
+        files: dict[str, str],
+        timeout: int = 30,
+        test_cases: list | None = None,
+        fail_fast: bool = False,
+        on_progress: Callable[[dict[str, Any]], None] | None = None,
+        time_limit_ms: int | None = None,
+        memory_limit_mb: int | None = None,
+    ) -> dict[str, Any]:
+        """
+        Выполнить код в контейнере из пула (блокирующий вызов, выполняется в рабочем потоке)
         
         Args:
             language: Язык программирования (может быть переопределен по расширению файла)
             files: Словарь {path: content}
-            timeout: Таймаут в секундах
+            timeout: Таймаут в секундах (для тестов - страховочный лимит реального времени)
+            fail_fast: Прекратить прогон тестов после первого упавшего
+            on_progress: Получатель промежуточного прогресса тестов
+            time_limit_ms: Лимит процессорного времени одного теста (по умолчанию timeout)
+            memory_limit_mb: Лимит пикового RSS одного теста (не больше EXECUTOR_TEST_MEMORY_MB)
             
         Returns:
             dict с stdout, stderr, exit_code, duration_ms
@@ -67,148 +244,118 @@ class DockerExecutor:
         stderr = ''
         exit_code = 0
 
-        # Создаем временную директорию
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Записываем файлы
-            for filepath, content in files.items():
-                full_path = os.path.join(tmpdir, filepath)
-                os.makedirs(os.path.dirname(full_path), exist_ok=True)
-                with open(full_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
-
-            # Определяем язык по расширению файла (приоритет над переданным языком)
-            detected_language = None
-            main_file_path = None
-            
-            # Находим главный файл и определяем язык
+        # Определяем язык по расширению файла (приоритет над переданным языком)
+        detected_language = None
+        main_file_path = None
+        
+        # Находим главный файл и определяем язык
+        for filepath in files.keys():
+            file_lang = self._detect_language_from_file(filepath)
+            if file_lang:
+                detected_language = file_lang
+                main_file_path = filepath
+                break
+        
+        # Если не определили по расширению, используем переданный язык
+        if not detected_language:
+            detected_language = language
+            # Находим главный файл по конфигу
+            config = self.language_config.get(detected_language, {})
+            main_file = config.get('main_file', 'main.py')
             for filepath in files.keys():
-                file_lang = self._detect_language_from_file(filepath)
-                if file_lang:
-                    detected_language = file_lang
+                if main_file in filepath or filepath.endswith(main_file):
                     main_file_path = filepath
                     break
-            
-            # Если не определили по расширению, используем переданный язык
-            if not detected_language:
-                detected_language = language
-                # Находим главный файл по конфигу
-                config = self.LANGUAGE_CONFIG.get(detected_language, {})
-                main_file = config.get('main_file', 'main.py')
-                for filepath in files.keys():
-                    if main_file in filepath or filepath.endswith(main_file):
-                        main_file_path = filepath
-                        break
-                if not main_file_path:
-                    main_file_path = list(files.keys())[0]
-            elif not main_file_path:
+            if not main_file_path:
                 main_file_path = list(files.keys())[0]
+        elif not main_file_path:
+            main_file_path = list(files.keys())[0]
 
-            # Проверяем, поддерживается ли язык
-            if detected_language not in self.LANGUAGE_CONFIG:
-                raise ValueError(f'Unsupported language: {detected_language}')
-
-            config = self.LANGUAGE_CONFIG[detected_language]
-            language = detected_language  # Используем определенный язык
-
-            # Определяем команду запуска на основе определенного языка
-            if language == 'typescript':
-                # Для TypeScript компилируем в JavaScript и запускаем
-                # Используем tsc для компиляции всех .ts файлов
-                js_file = main_file_path.replace('.ts', '.js')
-                # Компилируем все .ts файлы в текущей директории и запускаем главный
-                # npx -y tsc скачает и запустит TypeScript компилятор
-                command = f'/bin/sh -c "cd /workspace && npx -y tsc --target ES2020 --module commonjs --esModuleInterop --skipLibCheck *.ts 2>&1 && node {js_file}"'
-            elif language == 'java':
-                # Для Java нужно скомпилировать
-                class_name = os.path.splitext(os.path.basename(main_file_path))[0]
-                command = f'/bin/sh -c "cd /workspace && javac {main_file_path} && java {class_name}"'
-            elif language == 'go':
-                command = f'go run /workspace/{main_file_path}'
-            else:
-                # Python
-                command = f'python /workspace/{main_file_path}'
+        # Проверяем, поддерживается ли язык
+        if detected_language not in self.language_config:
+            raise ValueError(f'Unsupported language: {detected_language}')
 
-            runner_command = None
-            if test_cases:
-                runner_command = self._prepare_runner(language, main_file_path, tmpdir, timeout)
+        config = self.language_config[detected_language]
+        language = detected_language  # Используем определенный язык
+
+        # Арендуем тёплый контейнер: файлы копируются внутрь, команды выполняются через exec
+        with self.pool.lease(language) as sandbox:
+            sandbox.put_files(files)
+
+            # Компилируем (или берём сборку из кэша) и получаем команду запуска
+            runner_command, compile_failure = self._prepare_runner(
+                sandbox, language, files, main_file_path, timeout
+            )
 
             if not test_cases:
-                # Запускаем контейнер напрямую только если нет набора тестов.
-                container = None
-                try:
-                    use_network = language == 'typescript'
-                    container = self.client.containers.run(
-                        image=config['image'],
-                        command=command,
-                        volumes={tmpdir: {'bind': '/workspace', 'mode': 'rw'}},
-                        mem_limit='512m',
-                        cpu_period=100000,
-                        cpu_quota=50000,
-                        network_disabled=not use_network,
-                        detach=True,
-                        working_dir='/workspace',
-                        environment={'NPM_CONFIG_CACHE': '/tmp/.npm'} if use_network else None,
-                    )
+                # Запускаем программу напрямую только если нет набора тестов.
+                if compile_failure:
+                    stdout = compile_failure['stdout']
+                    stderr = compile_failure['stderr']
+                    exit_code = compile_failure['exit_code']
+                else:
                     try:
-                        container.wait(timeout=timeout)
-                    except Exception as wait_exc:  # noqa: BLE001
-                        container.stop(timeout=1)
-                        raise TimeoutError(f'Execution timeout after {timeout} seconds') from wait_exc
-
-                    stdout_bytes = container.logs(stdout=True, stderr=False)
-                    stderr_bytes = container.logs(stdout=False, stderr=True)
-                    container.reload()
-                    exit_code = container.attrs['State']['ExitCode'] or 0
-                    stdout = stdout_bytes.decode('utf-8', errors='replace') if stdout_bytes else ''
-                    stderr_raw = stderr_bytes.decode('utf-8', errors='replace') if stderr_bytes else ''
-                    stderr = stderr_raw if exit_code != 0 and stderr_raw.strip() else ''
-                except TimeoutError as exc:
-                    stdout = ''
-                    stderr = str(exc)
-                    exit_code = -1
-                except docker.errors.ContainerError as exc:
-                    stdout = exc.stdout.decode('utf-8', errors='replace') if exc.stdout else ''
-                    stderr = exc.stderr.decode('utf-8', errors='replace') if exc.stderr else str(exc)
-                    exit_code = exc.exit_status
-                except Exception as exc:  # noqa: BLE001
-                    stdout = ''
-                    stderr = f'Docker error: {str(exc)}'
-                    exit_code = -1
-                finally:
-                    try:
-                        if container:
-                            container.remove(force=True)
-                    except Exception:  # noqa: BLE001
-                        pass
+                        run_result = sandbox.exec(runner_command, timeout, environment=config.get('environment'))
+                        if run_result['timed_out']:
+                            raise TimeoutError(f'Execution timeout after {timeout} seconds')
+                        exit_code = run_result['exit_code']
+                        stdout = run_result['stdout']
+                        stderr_raw = run_result['stderr']
+                        stderr = stderr_raw if exit_code != 0 and stderr_raw.strip() else ''
+                    except TimeoutError as exc:
+                        stdout = ''
+                        stderr = str(exc)
+                        exit_code = -1
+                    except Exception as exc:  # noqa: BLE001
+                        sandbox.tainted = True
+                        stdout = ''
+                        stderr = f'Docker error: {str(exc)}'
+                        exit_code = -1
 
-            # Если есть тесты, запускаем код на каждом тесте
+            # Если есть тесты, прогоняем их все одним запуском харнесса внутри контейнера
             test_results = []
             if test_cases:
                 first_error_output = ''
-                for test_idx, test_case in enumerate(test_cases):
+                test_inputs = []
+                expected_outputs = []
+                for test_case in test_cases:
                     # test_case может быть dict (если пришел из JSON напрямую) или Pydantic объектом
                     if isinstance(test_case, dict):
-                        test_input = test_case.get('input', '')
-                        expected_output = test_case.get('output', '').strip()
+                        test_inputs.append(test_case.get('input', ''))
+                        expected_outputs.append(test_case.get('output', '').strip())
                     else:
                         # Pydantic объект - обращаемся к атрибутам напрямую
-                        test_input = test_case.input
-                        expected_output = test_case.output.strip()
-                    
+                        test_inputs.append(test_case.input)
+                        expected_outputs.append(test_case.output.strip())
+
+                if compile_failure:
+                    # Программа не собралась - каждый тест падает с ошибкой компиляции
+                    batch_results = {
+                        idx: {
+                            'stdout': '',
+                            'stderr': compile_failure['stderr'],
+                            'exit_code': compile_failure['exit_code'],
+                            'duration_ms': 0,
+                        }
+                        for idx in range(1, len(test_inputs) + 1)
+                    }
+                else:
                     # Пустые входные данные - это валидный случай (например, задача без ввода)
-                    # Продолжаем выполнение
-                    
-                    # Запускаем код с входными данными
-                    test_start_time = time.time()
-                    test_result = await self._run_test(
-                        language=language,
-                        main_file_path=main_file_path,
-                        tmpdir=tmpdir,
-                        test_input=test_input,
+                    batch_results = self._run_tests(
+                        sandbox=sandbox,
+                        test_inputs=test_inputs,
                         timeout=timeout,
                         runner_command=runner_command,
+                        expected_outputs=expected_outputs,
+                        fail_fast=fail_fast,
+                        on_progress=on_progress,
+                        time_limit_ms=time_limit_ms,
+                        memory_limit_mb=memory_limit_mb,
                     )
-                    test_duration_ms = int((time.time() - test_start_time) * 1000)
+
+                for test_idx, (test_input, expected_output) in enumerate(zip(test_inputs, expected_outputs)):
+                    test_result = batch_results[test_idx + 1]
+                    test_duration_ms = test_result['duration_ms']
                     
                     # Сравниваем выводы (expected_output уже обрезан выше)
                     actual_output = test_result['stdout'].strip()
@@ -227,7 +374,16 @@ class DockerExecutor:
                         'passed': passed,
                         'exit_code': exit_code,
                         'duration_ms': test_duration_ms,
+                        'cpu_time_ms': test_result.get('cpu_time_ms'),
+                        'peak_memory_kb': test_result.get('peak_memory_kb'),
+                        'verdict': LIMIT_VERDICTS.get(test_result.get('limit'))
+                        or ('ACCEPTED' if passed else 'WRONG ANSWER'),
                     })
+                    if test_result.get('skipped'):
+                        # Тест не запускался: fail-fast остановил прогон после первого падения
+                        test_results[-1]['skipped'] = True
+                        test_results[-1]['verdict'] = None
+                        test_results[-1]['actual_output'] = 'Не запускался (остановлено после первого падения)'
                     
                     if test_result.get('stderr'):
                         error_text = test_result['stderr'].strip()
@@ -241,7 +397,10 @@ class DockerExecutor:
                 passed_count = sum(1 for tr in test_results if tr['passed'])
                 total_count = len(test_results)
                 all_passed = passed_count == total_count
-                verdict = 'ACCEPTED' if all_passed else 'WRONG ANSWER'
+                # Итоговый вердикт - вердикт первого упавшего теста (TLE/MLE или WRONG ANSWER)
+                verdict = 'ACCEPTED' if all_passed else next(
+                    (tr['verdict'] for tr in test_results if not tr['passed'] and tr['verdict']), 'WRONG ANSWER'
+                )
                 
                 stdout_lines = [f'Вердикт: {verdict}', f'Пройдено тестов: {passed_count}/{total_count}', '']
                 for tr in test_results:
@@ -256,171 +415,209 @@ class DockerExecutor:
                 verdict = None
                 test_results = None
 
-            return {
-                'stdout': stdout,
-                'stderr': stderr,
-                'exit_code': exit_code,
-                'duration_ms': int((time.time() - start_time) * 1000),
-                'test_results': test_results,
-                'verdict': verdict,
-            }
+        return {
+            'stdout': stdout,
+            'stderr': stderr,
+            'exit_code': exit_code,
+            'duration_ms': int((time.time() - start_time) * 1000),
+            'test_results': test_results,
+            'verdict': verdict,
+        }
 
-    async def _run_test(
+    def _run_tests(
         self,
-        language: str,
-        main_file_path: str,
-        tmpdir: str,
-        test_input: str,
+        sandbox: SandboxContainer,
+        test_inputs: list[str],
         timeout: int,
-        runner_command: str | None = None,
-    ) -> dict[str, Any]:
-        """Запустить код на одном тесте"""
-        config = self.LANGUAGE_CONFIG[language]
-        
-        # Записываем входные данные во временный файл для надежной передачи
-        input_file_path = os.path.join(tmpdir, 'test_input.txt')
-        # Убеждаемся, что входные данные не пустые и правильно записаны
-        test_input_normalized = test_input if test_input else ''
-        with open(input_file_path, 'w', encoding='utf-8') as f:
-            f.write(test_input_normalized)
-        
-        # Проверяем, что файл создан
-        if not os.path.exists(input_file_path):
-            return {
-                'stdout': '',
-                'stderr': 'Failed to create input file',
-                'exit_code': -1,
-            }
-        
-        # Определяем команду запуска с перенаправлением из файла
-        # Используем абсолютный путь к файлу для надежности
-        if runner_command:
-            command = f'/bin/sh -c "cd /workspace && cat /workspace/test_input.txt | {runner_command}"'
+        runner_command: str,
+        expected_outputs: list[str] | None = None,
+        fail_fast: bool = False,
+        on_progress: Callable[[dict[str, Any]], None] | None = None,
+        time_limit_ms: int | None = None,
+        memory_limit_mb: int | None = None,
+    ) -> dict[int, dict[str, Any]]:
+        """
+        Прогнать все тесты одним exec: входные данные копируются в контейнер разом,
+        харнесс запускает программу на каждом тесте с отдельными лимитами процессорного
+        времени, памяти и реального времени (до test_parallelism тестов параллельно),
+        а результаты забираются одним архивом. При fail_fast прогон останавливается
+        после первого падения. Если передан on_progress, во время прогона ему
+        отправляются уже завершённые тесты.
+
+        Returns:
+            {номер теста (с 1): dict с stdout, stderr, exit_code, duration_ms, cpu_time_ms, peak_memory_kb}
+        """
+        config = self.language_config[sandbox.language]
+        indices = list(range(1, len(test_inputs) + 1))
+        width = min(self.test_parallelism, len(indices))
+        # Больше доли памяти контейнера на один тест лимит не гарантирует: выше - OOM killer cgroup
+        memory_limit_mb = min(memory_limit_mb or EXECUTOR_TEST_MEMORY_MB, EXECUTOR_TEST_MEMORY_MB)
+        if time_limit_ms:
+            # Лимит реального времени лишь страхует от спящих программ: тест получает TEST_CPU_SHARE ядра,
+            # поэтому реального времени даётся не меньше, чем нужно на весь лимит процессорного
+            timeout = max(timeout, math.ceil(time_limit_ms / 1000 / TEST_CPU_SHARE) + 1)
         else:
-            if language == 'typescript':
-                js_file = main_file_path.replace('.ts', '.js')
-                command = f'/bin/sh -c "cd /workspace && npx -y tsc --target ES2020 --module commonjs --esModuleInterop --skipLibCheck *.ts 2>&1 && cat /workspace/test_input.txt | node {js_file}"'
-            elif language == 'java':
-                class_name = os.path.splitext(os.path.basename(main_file_path))[0]
-                command = f'/bin/sh -c "cd /workspace && cat /workspace/test_input.txt | java {class_name}"'
-            elif language == 'go':
-                command = f'/bin/sh -c "cd /workspace && cat /workspace/test_input.txt | go run {main_file_path}"'
-            else:
-                # Python
-                command = f'/bin/sh -c "cd /workspace && cat /workspace/test_input.txt | python {main_file_path}"'
-            
-        container = None
+            time_limit_ms = timeout * 1000
+
         try:
-            use_network = language == 'typescript'
-            container = self.client.containers.run(
-                image=config['image'],
-                command=command,
-                volumes={tmpdir: {'bind': '/workspace', 'mode': 'rw'}},
-                mem_limit='512m',
-                cpu_period=100000,
-                cpu_quota=50000,
-                network_disabled=not use_network,
-                detach=True,
-                working_dir='/workspace',
-                environment={'NPM_CONFIG_CACHE': '/tmp/.npm'} if use_network else None,
-            )
-            
-            container.wait(timeout=timeout)
-            
-            stdout_bytes = container.logs(stdout=True, stderr=False)
-            stderr_bytes = container.logs(stdout=False, stderr=True)
-            
-            container.reload()
-            exit_code = container.attrs['State']['ExitCode'] or 0
-            
-            stdout = stdout_bytes.decode('utf-8', errors='replace') if stdout_bytes else ''
-            # Показываем stderr только если есть реальная ошибка (exit_code != 0)
-            # Игнорируем предупреждения компилятора и другие несущественные сообщения
-            stderr_raw = stderr_bytes.decode('utf-8', errors='replace') if stderr_bytes else ''
-            stderr = stderr_raw if exit_code != 0 and stderr_raw.strip() else ''
-            
+            sandbox.put_files(build_harness_files(test_inputs, expected_outputs))
+            environment = {
+                **(config.get('environment') or {}),
+                'HARNESS_RUN': runner_command,
+                'HARNESS_PARALLEL': str(width),
+                'HARNESS_FAIL_FAST': '1' if fail_fast and expected_outputs is not None else '0',
+                'HARNESS_TIME_LIMIT_MS': str(time_limit_ms),
+                'HARNESS_MEMORY_KB': str(memory_limit_mb * 1024),
+            }
+            # Общий таймаут харнесса: самый длинный воркер плюс запас на запись результатов
+            tests_per_worker = -(-len(indices) // width)
+            command = harness_command(timeout, indices)
+            overall_timeout = timeout * tests_per_worker + 5
+            if on_progress is None:
+                sandbox.exec(command, overall_timeout, environment=environment)
+            else:
+                self._exec_with_progress(sandbox, command, overall_timeout, environment, len(indices), on_progress)
+            result_files = sandbox.get_files(f'/workspace/{RESULTS_DIR}')
         except Exception as exc:  # noqa: BLE001
-            stdout = ''
-            stderr = str(exc)
-            exit_code = -1
-        finally:
+            sandbox.tainted = True
+            return {
+                idx: {'stdout': '', 'stderr': str(exc), 'exit_code': -1, 'duration_ms': 0}
+                for idx in indices
+            }
+
+        results = parse_harness_results(result_files, indices, timeout, time_limit_ms, memory_limit_mb)
+        # После убитого по лимиту теста в контейнере могли остаться процессы - не переиспользуем его
+        if any(result.get('limit') for result in results.values()):
+            sandbox.tainted = True
+        return results
+
+    def _exec_with_progress(
+        self,
+        sandbox: SandboxContainer,
+        command: str,
+        timeout: int,
+        environment: dict[str, str],
+        total: int,
+        on_progress: Callable[[dict[str, Any]], None],
+    ) -> None:
+        """
+        Выполнить харнесс, параллельно опрашивая meta-файлы завершённых тестов.
+        Прогресс отправляется пачками раз в EXECUTOR_PROGRESS_INTERVAL и только если
+        с прошлой отправки что-то завершилось; итоговый результат остаётся за вызывающим.
+        """
+        outcome: dict[str, Exception] = {}
+
+        def run_harness():
+            try:
+                sandbox.exec(command, timeout, environment=environment)
+            except Exception as exc:  # noqa: BLE001
+                outcome['error'] = exc
+
+        harness_thread = threading.Thread(target=run_harness, daemon=True)
+        harness_thread.start()
+        reported = 0
+        while True:
+            harness_thread.join(EXECUTOR_PROGRESS_INTERVAL)
+            if not harness_thread.is_alive():
+                break
             try:
-                if container:
-                    container.remove(force=True)
+                poll_result = sandbox.exec(PROGRESS_COMMAND, 10)
             except Exception:  # noqa: BLE001
-                pass
-        
-        return {
-            'stdout': stdout,
-            'stderr': stderr,
-            'exit_code': exit_code,
-        }
+                continue
+            progress = parse_progress(poll_result['stdout'])
+            if len(progress) <= reported:
+                continue
+            reported = len(progress)
+            try:
+                on_progress({
+                    'total': total,
+                    'completed': reported,
+                    'test_results': [progress[idx] for idx in sorted(progress)],
+                })
+            except Exception as exc:  # noqa: BLE001
+                print(f'Failed to publish progress: {exc}')  # noqa: T201
+
+        if 'error' in outcome:
+            raise outcome['error']
 
     def _prepare_runner(
         self,
+        sandbox: SandboxContainer,
         language: str,
+        files: dict[str, str],
         main_file_path: str,
-        tmpdir: str,
         timeout: int,
-    ) -> str:
+    ) -> tuple[str, dict[str, Any] | None]:
         """
         Предварительно компилирует/подготавливает окружение и возвращает команду запуска
         без учёта передачи входных данных (stdin подключается отдельно).
+
+        Артефакты сборки складываются в BUILD_DIR и кэшируются по хэшу исходников:
+        при попадании в кэш архив распаковывается в песочницу, компилятор не запускается.
+
+        Returns:
+            (команда запуска, None) или (команда запуска, dict с stdout, stderr, exit_code
+            ошибки компиляции), если сборка не удалась
         """
-        config = self.LANGUAGE_CONFIG[language]
-        use_network = language == 'typescript'
-        compile_container = None
+        config = self.language_config[language]
 
-        def run_compile(command: str):
-            nonlocal compile_container
+        if language == 'typescript':
+            js_file = os.path.splitext(os.path.basename(main_file_path))[0] + '.js'
+            artifact = f'{BUILD_DIR}/{js_file}'
+            compile_cmd = (
+                'tsc --target ES2020 --module commonjs --esModuleInterop --skipLibCheck '
+                f'--outDir {BUILD_DIR} *.ts'
+            )
+            run_command = f'node {artifact}'
+        elif language == 'go':
+            artifact = f'{BUILD_DIR}/main_bin'
+            compile_cmd = f'go build -o {artifact} {main_file_path}'
+            run_command = f'./{artifact}'
+        elif language == 'java':
+            class_name = os.path.splitext(os.path.basename(main_file_path))[0]
+            artifact = f'{BUILD_DIR}/{class_name}.class'
+            compile_cmd = f'javac -d {BUILD_DIR} {main_file_path}'
+            # -Xlog:disable: если архив не подойдёт, JVM молча стартует без него, не засоряя stdout
+            run_command = f'java -XX:SharedArchiveFile={JAVA_CDS_ARCHIVE} -Xlog:disable -cp {BUILD_DIR} {class_name}'
+        else:
+            # Python и прочее без подготовки
+            return f'python {main_file_path}', None
+
+        cache_key = CompileCache.make_key(language, self._image_digest(language), files, compile_cmd)
+        cached = self.compile_cache.get(cache_key)
+        if cached is not None:
             try:
-                compile_container = self.client.containers.run(
-                    image=config['image'],
-                    command=command,
-                    volumes={tmpdir: {'bind': '/workspace', 'mode': 'rw'}},
-                    mem_limit='512m',
-                    cpu_period=100000,
-                    cpu_quota=50000,
-                    network_disabled=not use_network,
-                    detach=True,
-                    working_dir='/workspace',
-                    environment={'NPM_CONFIG_CACHE': '/tmp/.npm'} if use_network else None,
-                )
-                compile_container.wait(timeout=timeout)
+                sandbox.put_archive(cached)
+                return run_command, None
             except Exception as exc:  # noqa: BLE001
-                logs = ''
-                if compile_container:
-                    try:
-                        logs_bytes = compile_container.logs(stdout=True, stderr=True)
-                        logs = logs_bytes.decode('utf-8', errors='replace')
-                    except Exception:  # noqa: BLE001
-                        logs = ''
-                raise RuntimeError(f'Failed to prepare {language} environment: {exc}\n{logs}') from exc
-            finally:
-                try:
-                    if compile_container:
-                        compile_container.remove(force=True)
-                except Exception:  # noqa: BLE001
-                    pass
+                print(f'Failed to restore cached {language} build: {exc}')  # noqa: T201
 
-        if language == 'typescript':
-            js_file = main_file_path.replace('.ts', '.js')
-            compile_cmd = '/bin/sh -c "cd /workspace && npx -y tsc --target ES2020 --module commonjs --esModuleInterop --skipLibCheck *.ts"'
-            run_compile(compile_cmd)
-            return f'node {js_file}'
-
-        if language == 'go':
-            binary_name = 'main_bin'
-            compile_cmd = f'/bin/sh -c "cd /workspace && go build -o {binary_name} {main_file_path}"'
-            run_compile(compile_cmd)
-            return f'./{binary_name}'
-
-        if language == 'java':
-            class_name = os.path.splitext(os.path.basename(main_file_path))[0]
-            compile_cmd = f'/bin/sh -c "cd /workspace && javac {main_file_path}"'
-            run_compile(compile_cmd)
-            return f'java {class_name}'
+        # Сборка удалась, если появился артефакт: tsc выдаёт JS и при ошибках типов
+        try:
+            compile_result = sandbox.exec(
+                f'{compile_cmd} 2>&1; test -e {artifact}',
+                timeout,
+                environment=config.get('environment'),
+            )
+        except Exception as exc:  # noqa: BLE001
+            raise RuntimeError(f'Failed to prepare {language} environment: {exc}') from exc
 
-        # Python и прочее без подготовки
-        return f'python {main_file_path}'
+        logs = compile_result['stdout'] + compile_result['stderr']
+        if compile_result['timed_out']:
+            return run_command, {
+                'stdout': '',
+                'stderr': f'Compilation timeout after {timeout} seconds\n{logs}'.strip(),
+                'exit_code': -1,
+            }
+        if compile_result['exit_code'] != 0:
+            return run_command, {
+                'stdout': '',
+                'stderr': logs.strip() or f'{language} compilation failed',
+                'exit_code': compile_result['exit_code'],
+            }
 
+        try:
+            self.compile_cache.put(cache_key, sandbox.get_archive(f'/workspace/{BUILD_DIR}'))
+        except Exception as exc:  # noqa: BLE001
+            print(f'Failed to cache {language} build: {exc}')  # noqa: T201
+        return run_command, None
@@ -0,0 +1,340 @@
+"""Test Harness - Пакетный прогон всех тестов внутри одного контейнера"""
+
+from typing import Any
+
+from .container_pool import KILLED_EXIT_CODE
+
+HARNESS_PATH = '.harness/run_tests.sh'
+TESTS_DIR = '.harness/tests'
+RESULTS_DIR = '.harness/results'
+
+# POSIX sh: в образах go (alpine/busybox) и java нет python, поэтому харнесс на чистом shell.
+# Для каждого теста: stdin из <i>.in, stdout/stderr в файлы, затем <i>.meta с кодом возврата,
+# временем выполнения в миллисекундах, предварительным вердиктом (ok/wrong/-), по которому
+# executor публикует прогресс до окончания прогона, процессорным временем (мс), пиковым RSS (КБ)
+# и превышенным лимитом (tle/mle/-). Команда запуска приходит в HARNESS_RUN.
+# Тесты раскладываются по HARNESS_PARALLEL воркерам (round-robin) и идут параллельно.
+# При HARNESS_FAIL_FAST=1 первый упавший тест создаёт STOP-файл, оставшиеся тесты
+# помечаются как skipped. Сравнение с <i>.ans без учёта пробельных символов - оно
+# консервативно: если выводы равны после strip(), они равны и здесь.
+#
+# Лимиты теста: HARNESS_TIME_LIMIT_MS - процессорное время, HARNESS_MEMORY_KB - пиковый RSS
+# (0 - без лимита), <timeout_seconds> - страховочный лимит реального времени. Параллельные тесты
+# делят cgroup контейнера, поэтому потребление считается по процессу: пока программа работает,
+# харнесс каждые ~10 мс читает utime+stime (вместе с завершёнными потомками) из /proc/<pid>/stat
+# и VmHWM из /proc/<pid>/status и убивает её при превышении лимита. SIGKILL не от харнесса
+# считается превышением памяти, только если за время теста вырос счётчик oom_kill cgroup.
+HARNESS_SCRIPT = r'''#!/bin/sh
+# usage: run_tests.sh <timeout_seconds> <test_index>...
+TIMEOUT="$1"
+shift
+TESTS="/workspace/.harness/tests"
+RESULTS="/workspace/.harness/results"
+STOP="/workspace/.harness/STOP"
+PARALLEL="${HARNESS_PARALLEL:-1}"
+TIME_LIMIT_MS="${HARNESS_TIME_LIMIT_MS:-$(( TIMEOUT * 1000 ))}"
+MEMORY_KB="${HARNESS_MEMORY_KB:-0}"
+HZ=$(getconf CLK_TCK 2>/dev/null || echo 100)
+mkdir -p "$RESULTS"
+
+now_ms() {
+    t=$(date +%s%N 2>/dev/null)
+    case "$t" in
+        ''|*N)
+            read -r up _ < /proc/uptime
+            cs=${up#*.}
+            echo "$(( ${up%.*} * 1000 + ${cs#0} * 10 ))"
+            ;;
+        *)
+            echo "$(( t / 1000000 ))"
+            ;;
+    esac
+}
+
+clock() {
+    # Без fork: в цикле опроса date на каждой итерации слишком дорог
+    read -r up _ < /proc/uptime
+    cs=${up#*.}
+    now=$(( ${up%.*} * 1000 + ${cs#0} * 10 ))
+}
+
+sample() {
+    # $1 - pid программы; обновляет ticks и peak, код 1 - программа завершилась
+    read -r stat 2>/dev/null < "/proc/$1/stat" || return 1
+    status_file="/proc/$1/status"
+    set -- ${stat##*) }
+    [ -n "${15}" ] && ticks=$(( ${12} + ${13} + ${14} + ${15} ))
+    [ "$1" = "Z" ] && return 1
+    while read -r key value _; do
+        if [ "$key" = "VmHWM:" ]; then
+            [ "$value" -gt "$peak" ] && peak="$value"
+            break
+        fi
+    done 2>/dev/null < "$status_file"
+    return 0
+}
+
+oom_kills() {
+    # Счётчик OOM kill в cgroup контейнера (v2 или v1); 0 - счётчик недоступен
+    oom=0
+    for f in /sys/fs/cgroup/memory.events /sys/fs/cgroup/memory/memory.oom_control; do
+        [ -r "$f" ] || continue
+        while read -r key value; do
+            [ "$key" = "oom_kill" ] && oom="$value"
+        done < "$f"
+        return
+    done
+}
+
+is_wrong() {
+    # $1 - номер теста, $2 - код возврата
+    [ "$2" -ne 0 ] && return 0
+    [ -f "$TESTS/$1.ans" ] || return 1
+    tr -d '[:space:]' < "$RESULTS/$1.stdout" > "$RESULTS/$1.norm"
+    tr -d '[:space:]' < "$TESTS/$1.ans" > "$TESTS/$1.norm"
+    ! cmp -s "$RESULTS/$1.norm" "$TESTS/$1.norm"
+}
+
+run_one() {
+    i="$1"
+    if [ -e "$STOP" ]; then
+        echo "skipped" > "$RESULTS/$i.meta"
+        return
+    fi
+    started=$(now_ms)
+    clock
+    deadline=$(( now + TIMEOUT * 1000 ))
+    ticks=0
+    peak=0
+    limit="-"
+    oom_kills
+    oom_before="$oom"
+    /bin/sh -c "exec $HARNESS_RUN" \
+        < "$TESTS/$i.in" > "$RESULTS/$i.stdout" 2> "$RESULTS/$i.stderr" &
+    pid=$!
+    while sample "$pid"; do
+        clock
+        if [ "$MEMORY_KB" -gt 0 ] && [ "$peak" -gt "$MEMORY_KB" ]; then
+            limit="mle"
+        elif [ $(( ticks * 1000 / HZ )) -gt "$TIME_LIMIT_MS" ] || [ "$now" -ge "$deadline" ]; then
+            limit="tle"
+        fi
+        if [ "$limit" != "-" ]; then
+            kill -9 "$pid" 2>/dev/null
+            break
+        fi
+        sleep 0.01
+    done
+    wait "$pid" 2>/dev/null
+    code=$?
+    finished=$(now_ms)
+    cpu_ms=$(( ticks * 1000 / HZ ))
+    if [ "$limit" = "-" ] && [ "$cpu_ms" -gt "$TIME_LIMIT_MS" ]; then
+        # Программа успела завершиться между замерами, но лимит уже превысила
+        limit="tle"
+    elif [ "$limit" = "-" ] && [ "$code" -eq 137 ]; then
+        # Пик памяти пришёлся между замерами и программу убил OOM killer cgroup
+        oom_kills
+        [ "$oom" -gt "$oom_before" ] && limit="mle"
+    fi
+    if [ "$limit" != "-" ] || is_wrong "$i" "$code"; then
+        verdict="wrong"
+    elif [ -f "$TESTS/$i.ans" ]; then
+        verdict="ok"
+    else
+        verdict="-"
+    fi
+    echo "$code $(( finished - started )) $verdict $cpu_ms $peak $limit" > "$RESULTS/$i.meta.tmp"
+    mv "$RESULTS/$i.meta.tmp" "$RESULTS/$i.meta"
+    if [ "${HARNESS_FAIL_FAST:-0}" = "1" ] && [ "$verdict" = "wrong" ]; then
+        : > "$STOP"
+    fi
+}
+
+worker() {
+    for i in "$@"; do
+        run_one "$i"
+    done
+}
+
+k=0
+while [ "$k" -lt "$PARALLEL" ]; do
+    shard=""
+    n=0
+    for i in "$@"; do
+        if [ $(( n % PARALLEL )) -eq "$k" ]; then
+            shard="$shard $i"
+        fi
+        n=$(( n + 1 ))
+    done
+    if [ -n "$shard" ]; then
+        worker $shard &
+    fi
+    k=$(( k + 1 ))
+done
+wait
+'''
+
+# Вердикты тестов, остановленных харнессом по лимиту
+LIMIT_VERDICTS = {
+    'tle': 'TIME LIMIT EXCEEDED',
+    'mle': 'MEMORY LIMIT EXCEEDED',
+}
+
+
+def build_harness_files(
+    test_inputs: list[str],
+    expected_outputs: list[str] | None = None,
+) -> dict[str, str]:
+    """Файлы для put_archive: скрипт харнесса, входные данные и ожидаемые ответы (для вердиктов)"""
+    files = {HARNESS_PATH: HARNESS_SCRIPT}
+    for idx, test_input in enumerate(test_inputs, start=1):
+        files[f'{TESTS_DIR}/{idx}.in'] = test_input if test_input else ''
+    if expected_outputs is not None:
+        for idx, expected in enumerate(expected_outputs, start=1):
+            files[f'{TESTS_DIR}/{idx}.ans'] = expected or ''
+    return files
+
+
+def harness_command(timeout: int, indices: list[int]) -> str:
+    """Команда запуска харнесса для указанных тестов"""
+    return f'/bin/sh /workspace/{HARNESS_PATH} {int(timeout)} ' + ' '.join(str(idx) for idx in indices)
+
+
+# Печатает "<номер> <содержимое meta>" для каждого уже завершённого теста
+PROGRESS_COMMAND = (
+    f'cd /workspace/{RESULTS_DIR} 2>/dev/null && '
+    'for f in *.meta; do [ -f "$f" ] && echo "${f%.meta} $(cat "$f")"; done; true'
+)
+
+
+def _parse_usage(parts: list[str]) -> tuple[int | None, int | None, str | None]:
+    """Процессорное время (мс), пиковый RSS (КБ) и превышенный лимит из полей meta после вердикта"""
+    try:
+        cpu_time_ms, peak_memory_kb = int(parts[0]), int(parts[1])
+    except (IndexError, ValueError):
+        return None, None, None
+    limit = parts[2] if len(parts) > 2 and parts[2] in LIMIT_VERDICTS else None
+    return cpu_time_ms, peak_memory_kb, limit
+
+
+def parse_progress(output: str) -> dict[int, dict[str, Any]]:
+    """
+    Разобрать вывод PROGRESS_COMMAND
+
+    Returns:
+        {номер теста: dict с test_index, passed, duration_ms, exit_code, cpu_time_ms,
+        peak_memory_kb (и verdict при превышении лимита, skipped)}
+    """
+    progress: dict[int, dict[str, Any]] = {}
+    for line in output.splitlines():
+        parts = line.split()
+        try:
+            idx = int(parts[0])
+            if parts[1:] == ['skipped']:
+                progress[idx] = {'test_index': idx, 'passed': False, 'duration_ms': 0, 'exit_code': -1, 'skipped': True}
+                continue
+            exit_code, duration_ms = int(parts[1]), int(parts[2])
+        except (IndexError, ValueError):
+            continue
+        verdict = parts[3] if len(parts) > 3 else '-'
+        cpu_time_ms, peak_memory_kb, limit = _parse_usage(parts[4:])
+        progress[idx] = {
+            'test_index': idx,
+            'passed': exit_code == 0 and verdict == 'ok',
+            'duration_ms': duration_ms,
+            'exit_code': -1 if limit else exit_code,
+            'cpu_time_ms': cpu_time_ms,
+            'peak_memory_kb': peak_memory_kb,
+        }
+        if limit:
+            progress[idx]['verdict'] = LIMIT_VERDICTS[limit]
+    return progress
+
+
+def parse_harness_results(
+    files: dict[str, bytes],
+    indices: list[int],
+    timeout: int,
+    time_limit_ms: int | None = None,
+    memory_limit_mb: int | None = None,
+) -> dict[int, dict[str, Any]]:
+    """
+    Разобрать файлы результатов харнесса
+
+    Args:
+        files: {имя файла: содержимое} из директории результатов
+        indices: Номера тестов, которые должны были выполниться
+        timeout: Лимит реального времени одного теста в секундах
+        time_limit_ms: Лимит процессорного времени теста
+        memory_limit_mb: Лимит пикового RSS теста
+
+    Returns:
+        {номер теста: dict с stdout, stderr, exit_code, duration_ms, cpu_time_ms, peak_memory_kb
+        (limit - 'tle'/'mle' для остановленных по лимиту, skipped для fail-fast)}
+    """
+    results: dict[int, dict[str, Any]] = {}
+    for idx in indices:
+        meta = files.get(f'{idx}.meta')
+        if meta is not None and meta.strip() == b'skipped':
+            results[idx] = {
+                'stdout': '',
+                'stderr': '',
+                'exit_code': -1,
+                'duration_ms': 0,
+                'skipped': True,
+            }
+            continue
+        if meta is None:
+            results[idx] = {
+                'stdout': '',
+                'stderr': 'Test harness did not report a result',
+                'exit_code': -1,
+                'duration_ms': 0,
+            }
+            continue
+
+        parts = meta.decode('utf-8').split()
+        try:
+            exit_code = int(parts[0])
+            duration_ms = int(parts[1])
+        except (IndexError, ValueError):
+            exit_code, duration_ms = -1, 0
+        cpu_time_ms, peak_memory_kb, limit = _parse_usage(parts[3:])
+
+        if limit == 'tle':
+            if time_limit_ms is not None and cpu_time_ms is not None and cpu_time_ms > time_limit_ms:
+                message = f'Time limit exceeded: {cpu_time_ms} ms of CPU time (limit {time_limit_ms} ms)'
+            else:
+                message = f'Execution timeout after {timeout} seconds'
+        elif limit == 'mle':
+            message = f'Memory limit exceeded: {(peak_memory_kb or 0) // 1024} MB (limit {memory_limit_mb} MB)'
+        if limit:
+            results[idx] = {
+                'stdout': '',
+                'stderr': message,
+                'exit_code': -1,
+                'duration_ms': duration_ms,
+                'cpu_time_ms': cpu_time_ms,
+                'peak_memory_kb': peak_memory_kb,
+                'limit': limit,
+            }
+            continue
+
+        stdout_bytes = files.get(f'{idx}.stdout', b'')
+        stderr_bytes = files.get(f'{idx}.stderr', b'')
+        stdout = stdout_bytes.decode('utf-8', errors='replace')
+        stderr_raw = stderr_bytes.decode('utf-8', errors='replace')
+        # Показываем stderr только если есть реальная ошибка (exit_code != 0)
+        stderr = stderr_raw if exit_code != 0 and stderr_raw.strip() else ''
+        if exit_code == KILLED_EXIT_CODE and not stderr:
+            stderr = 'Killed by SIGKILL'
+        results[idx] = {
+            'stdout': stdout,
+            'stderr': stderr,
+            'exit_code': exit_code,
+            'duration_ms': duration_ms,
+            'cpu_time_ms': cpu_time_ms,
+            'peak_memory_kb': peak_memory_kb,
+        }
+    return results
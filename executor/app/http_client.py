@@ -0,0 +1,47 @@
+"""HTTP Client - Общий пул соединений executor -> backend"""
+
+import importlib.util
+import os
+
+import httpx
+
+# Соединения к backend: callbacks выполнения, прогресс тестов, загрузка наборов тестов
+EXECUTOR_BACKEND_MAX_CONNECTIONS = int(os.getenv('EXECUTOR_BACKEND_MAX_CONNECTIONS', '50'))
+EXECUTOR_BACKEND_MAX_KEEPALIVE = int(os.getenv('EXECUTOR_BACKEND_MAX_KEEPALIVE', '20'))
+
+# HTTP/2 - только если установлен h2; по открытому HTTP httpx остаётся на HTTP/1.1
+HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+
+class SharedHttpClient:
+    """
+    Один httpx.AsyncClient на процесс с keep-alive пулом.
+
+    Создаётся при первом запросе, закрывается в shutdown сервиса. Таймаут задаётся на
+    каждый запрос, поэтому один пул обслуживает и быстрые callbacks, и загрузку тестов.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = EXECUTOR_BACKEND_MAX_CONNECTIONS,
+        max_keepalive_connections: int = EXECUTOR_BACKEND_MAX_KEEPALIVE,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=30.0,
+        )
+        self._client: httpx.AsyncClient | None = None
+
+    def get(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=10.0, limits=self.limits, http2=HTTP2_AVAILABLE)
+        return self._client
+
+    async def close(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+
+backend_http = SharedHttpClient()
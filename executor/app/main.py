@@ -2,20 +2,30 @@
 
 import asyncio
 import os
+from concurrent.futures import Future
 from datetime import datetime, timezone
 
-import httpx
 from fastapi import FastAPI, HTTPException, status
 from pydantic import BaseModel, Field
 
 from .docker_executor import DockerExecutor
+from .http_client import backend_http
+from .scheduler import ExecutionScheduler, QueueFullError
+from .test_bundles import TestBundleCache
 
 app = FastAPI(title='VibeCode Executor Service')
 
 # URL основного backend для callback
 BACKEND_URL = os.getenv('BACKEND_URL', 'http://localhost:8000/api')
+# Сколько программ из /execute/batch выполняется одновременно: пакет не должен занимать
+# все потоки DockerExecutor и задерживать отправки кандидатов из очереди ExecutionScheduler
+EXECUTOR_BATCH_CONCURRENCY = int(os.getenv('EXECUTOR_BATCH_CONCURRENCY', '2'))
 
 executor = DockerExecutor()
+scheduler = ExecutionScheduler()
+test_bundles = TestBundleCache(BACKEND_URL)
+batch_slots = asyncio.Semaphore(max(1, EXECUTOR_BATCH_CONCURRENCY))
+batch_stats = {'running': 0}
 
 
 class TestCase(BaseModel):
@@ -23,12 +33,24 @@ class TestCase(BaseModel):
     output: str
 
 
+class TestBundleRef(BaseModel):
+    task_id: str
+    scope: str
+    hash: str
+    count: int = 0
+
+
 class ExecuteRequest(BaseModel):
     execution_id: str
     language: str = Field(..., description='Язык программирования')
     files: dict[str, str] = Field(..., description='Файлы кода {path: content}')
     timeout: int = Field(default=30, ge=1, le=300)
+    time_limit_ms: int | None = Field(None, ge=100, le=60000, description='Лимит процессорного времени одного теста')
+    memory_limit_mb: int | None = Field(None, ge=16, le=4096, description='Лимит пикового RSS одного теста')
     test_cases: list[TestCase] | None = Field(None, description='Тестовые случаи для проверки решения')
+    test_bundle: TestBundleRef | None = Field(None, description='Ссылка на набор тестов задачи (вместо test_cases)')
+    fail_fast: bool = Field(default=False, description='Остановить прогон после первого упавшего теста')
+    user_id: str | None = Field(None, description='Автор запуска - для честного распределения очереди')
 
 
 class ExecuteResponse(BaseModel):
@@ -36,47 +58,199 @@ class ExecuteResponse(BaseModel):
     status: str = 'accepted'
 
 
+class BatchProgram(BaseModel):
+    language: str = Field(..., description='Язык программирования')
+    files: dict[str, str] = Field(..., description='Файлы кода {path: content}')
+
+
+class BatchExecuteRequest(BaseModel):
+    programs: list[BatchProgram] = Field(..., min_length=1, max_length=8)
+    test_cases: list[TestCase] = Field(..., min_length=1, description='Общие тесты для всех программ')
+    timeout: int = Field(default=10, ge=1, le=60)
+
+
+class BatchProgramResult(BaseModel):
+    language: str
+    verdict: str | None = None
+    passed: int = 0
+    total: int = 0
+    max_duration_ms: int = 0
+    total_duration_ms: int = 0
+    max_cpu_time_ms: int = 0
+    max_peak_memory_kb: int = 0
+    test_results: list[dict] | None = None
+    error: str | None = None
+
+
+class BatchExecuteResponse(BaseModel):
+    results: list[BatchProgramResult]
+
+
+@app.on_event('startup')
+async def on_startup():
+    # Образы песочниц должны быть на месте до первого контейнера (сборка - только при первом запуске)
+    await asyncio.to_thread(executor.prepare_images)
+    # Прогреваем пул контейнеров в фоне, чтобы первые отправки не платили за холодный старт
+    executor.pool.warm_up()
+    scheduler.start(run_execution)
+
+
+@app.on_event('shutdown')
+async def on_shutdown():
+    dropped = await scheduler.stop()
+    # Задачи, не дождавшиеся слота, иначе навсегда остались бы в статусе pending
+    now = datetime.now(timezone.utc).isoformat()
+    for request in dropped:
+        await send_callback(
+            request.execution_id,
+            {
+                'id': request.execution_id,
+                'status': 'failed',
+                'result': None,
+                'error_message': 'Executor service restarted before the execution started',
+                'started_at': now,
+                'completed_at': now,
+            },
+        )
+    await backend_http.close()
+    await asyncio.to_thread(executor.shutdown)
+
+
 @app.get('/health')
 async def health():
-    return {'status': 'ok', 'service': 'executor'}
+    return {
+        'status': 'ok',
+        'service': 'executor',
+        'queue': scheduler.stats(),
+        'batch': {**batch_stats, 'concurrency': max(1, EXECUTOR_BATCH_CONCURRENCY)},
+        'test_bundles': test_bundles.stats(),
+        **executor.stats(),
+    }
 
 
 @app.post('/execute', status_code=status.HTTP_202_ACCEPTED, response_model=ExecuteResponse)
 async def execute_code(request: ExecuteRequest):
     """Принять задачу на выполнение (асинхронно)"""
-    # Запускаем выполнение в фоне
-    asyncio.create_task(run_execution(request))
+    # Ставим в очередь: выполнение начнётся, когда освободится рабочий слот
+    try:
+        await scheduler.submit(request.user_id or request.execution_id, request)
+    except QueueFullError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(exc),
+            headers={'Retry-After': str(exc.retry_after)},
+        ) from exc
     return ExecuteResponse(execution_id=request.execution_id, status='accepted')
 
 
+@app.post('/execute/batch', response_model=BatchExecuteResponse)
+async def execute_batch(request: BatchExecuteRequest):
+    """
+    Синхронно прогнать несколько программ на одном наборе тестов (проверка эталонных
+    решений задачи на всех языках). Программы выполняются параллельно, но не больше
+    EXECUTOR_BATCH_CONCURRENCY на весь сервис; результат - в ответе, без callback.
+    """
+    async def run_program(program: BatchProgram) -> BatchProgramResult:
+        try:
+            async with batch_slots:
+                batch_stats['running'] += 1
+                try:
+                    result = await executor.execute_code(
+                        language=program.language,
+                        files=program.files,
+                        timeout=request.timeout,
+                        test_cases=request.test_cases,
+                    )
+                finally:
+                    batch_stats['running'] -= 1
+        except Exception as exc:  # noqa: BLE001
+            return BatchProgramResult(language=program.language, error=str(exc) or type(exc).__name__)
+        test_results = result.get('test_results') or []
+        durations = [test['duration_ms'] for test in test_results]
+        cpu_times = [test.get('cpu_time_ms') or 0 for test in test_results]
+        peaks = [test.get('peak_memory_kb') or 0 for test in test_results]
+        accepted = result.get('verdict') == 'ACCEPTED'
+        return BatchProgramResult(
+            language=program.language,
+            verdict=result.get('verdict'),
+            passed=sum(1 for test in test_results if test['passed']),
+            total=len(test_results),
+            max_duration_ms=max(durations, default=0),
+            total_duration_ms=sum(durations),
+            max_cpu_time_ms=max(cpu_times, default=0),
+            max_peak_memory_kb=max(peaks, default=0),
+            test_results=test_results,
+            error=None if accepted else result['stderr'] or None,
+        )
+
+    results = await asyncio.gather(*(run_program(program) for program in request.programs))
+    return BatchExecuteResponse(results=list(results))
+
+
+async def send_callback(execution_id: str, data: dict, timeout: float = 10.0) -> None:
+    """Отправить статус выполнения в backend (ошибки только логируются)"""
+    try:
+        await backend_http.get().post(
+            f'{BACKEND_URL}/executions/{execution_id}/callback', json=data, timeout=timeout
+        )
+    except Exception as exc:  # noqa: BLE001
+        print(f'Failed to send callback: {exc}')  # noqa: T201
+
+
 async def run_execution(request: ExecuteRequest):
     """Выполнить код и отправить результат в backend"""
     started_at = datetime.now(timezone.utc)
     
     # Отправляем статус "running"
-    try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            await client.post(
-                f'{BACKEND_URL}/executions/{request.execution_id}/callback',
-                json={
+    await send_callback(
+        request.execution_id,
+        {
+            'id': request.execution_id,
+            'status': 'running',
+            'result': None,
+            'error_message': None,
+            'started_at': started_at.isoformat(),
+            'completed_at': None,
+        },
+        timeout=5.0,
+    )
+    
+    # Прогресс тестов приходит из рабочего потока; отправляем по одному, в порядке поступления
+    loop = asyncio.get_running_loop()
+    progress_lock = asyncio.Lock()
+    progress_posts: list[Future] = []
+
+    async def post_progress(progress: dict):
+        async with progress_lock:
+            await send_callback(
+                request.execution_id,
+                {
                     'id': request.execution_id,
                     'status': 'running',
-                    'result': None,
-                    'error_message': None,
+                    'progress': progress,
                     'started_at': started_at.isoformat(),
-                    'completed_at': None,
                 },
+                timeout=5.0,
             )
-    except Exception:  # noqa: BLE001
-        pass  # Игнорируем ошибки callback
-    
+
+    def on_progress(progress: dict):
+        progress_posts.append(asyncio.run_coroutine_threadsafe(post_progress(progress), loop))
+
     try:
+        test_cases = request.test_cases
+        if request.test_bundle is not None:
+            test_cases = await test_bundles.get(request.test_bundle.model_dump())
+
         # Выполняем код
         result = await executor.execute_code(
             language=request.language,
             files=request.files,
             timeout=request.timeout,
-            test_cases=request.test_cases,
+            test_cases=test_cases,
+            fail_fast=request.fail_fast,
+            on_progress=on_progress if test_cases else None,
+            time_limit_ms=request.time_limit_ms,
+            memory_limit_mb=request.memory_limit_mb,
         )
         
         completed_at = datetime.now(timezone.utc)
@@ -109,14 +283,10 @@ async def run_execution(request: ExecuteRequest):
             'completed_at': completed_at.isoformat(),
         }
     
+    # Итоговый callback уходит после всех промежуточных, чтобы не перетереть результат прогрессом
+    if progress_posts:
+        await asyncio.gather(*(asyncio.wrap_future(post) for post in progress_posts), return_exceptions=True)
+
     # Отправляем callback
-    try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            await client.post(
-                f'{BACKEND_URL}/executions/{request.execution_id}/callback',
-                json=callback_data,
-            )
-    except Exception as exc:  # noqa: BLE001
-        # Логируем ошибку, но не падаем
-        print(f'Failed to send callback: {exc}')  # noqa: T201
+    await send_callback(request.execution_id, callback_data)
 
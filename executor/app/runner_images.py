@@ -0,0 +1,166 @@
+"""Runner Images - Образы песочниц с предустановленными компиляторами и рантаймами"""
+
+import base64
+import copy
+import hashlib
+import io
+import os
+from typing import Any
+
+import docker
+
+RUNNER_IMAGE_PREFIX = os.getenv('EXECUTOR_RUNNER_IMAGE_PREFIX', 'vibecode-runner')
+# Собирать недостающие образы при старте; при 0 образы только проверяются (их собирает CI)
+RUNNER_IMAGES_BUILD = os.getenv('EXECUTOR_RUNNER_IMAGES_BUILD', '1') == '1'
+
+# Куда в образе складываются прогретые кэши
+GO_CACHE_SEED = '/opt/go-build-seed'
+JAVA_CDS_ARCHIVE = '/opt/cds/jdk.jsa'
+
+# Программа, которая импортирует типичные для решений пакеты: её сборка при создании образа
+# компилирует эти пакеты стандартной библиотеки в GOCACHE
+GO_WARMUP_SOURCE = """package main
+
+import (
+	_ "bufio"
+	_ "container/heap"
+	_ "container/list"
+	_ "fmt"
+	_ "io"
+	_ "math"
+	_ "math/big"
+	_ "os"
+	_ "regexp"
+	_ "sort"
+	_ "strconv"
+	_ "strings"
+	_ "unicode"
+)
+
+func main() {}
+"""
+
+# Программа, загружающая классы, которые нужны почти любому решению (ввод/вывод, коллекции,
+# стримы, лямбды): по её списку классов строится AppCDS архив для быстрого старта JVM
+JAVA_WARMUP_SOURCE = """import java.io.*;
+import java.util.*;
+import java.util.stream.*;
+
+public class Warmup {
+    public static void main(String[] args) throws IOException {
+        BufferedReader reader = new BufferedReader(new InputStreamReader(System.in));
+        reader.readLine();
+        Scanner scanner = new Scanner(new StringReader("3 1 2"));
+        List<Integer> values = new ArrayList<>();
+        while (scanner.hasNextInt()) {
+            values.add(scanner.nextInt());
+        }
+        Map<Integer, Long> counts = values.stream()
+            .collect(Collectors.groupingBy(v -> v % 2, Collectors.counting()));
+        int[] sorted = values.stream().mapToInt(Integer::intValue).sorted().toArray();
+        Deque<Integer> deque = new ArrayDeque<>(values);
+        PriorityQueue<Long> heap = new PriorityQueue<>(Comparator.reverseOrder());
+        heap.addAll(counts.values());
+        StringBuilder out = new StringBuilder();
+        out.append(String.format("%d %s %s%n", sorted.length, Arrays.toString(sorted), deque.peek()));
+        out.append(String.join(",", new TreeMap<>(counts).keySet().stream().map(String::valueOf).toList()));
+        PrintWriter writer = new PrintWriter(new BufferedWriter(new OutputStreamWriter(System.out)));
+        out.append(heap.peek());
+        writer.println(out);
+        writer.flush();
+    }
+}
+"""
+
+
+def write_file_step(path: str, content: str) -> str:
+    """Шаг Dockerfile, создающий файл без COPY (образ собирается без контекста)"""
+    encoded = base64.b64encode(content.encode('utf-8')).decode('ascii')
+    return f'RUN mkdir -p {os.path.dirname(path)} && echo {encoded} | base64 -d > {path}'
+
+
+# Прогретый GOCACHE: при старте песочницы копируется в её tmpfs (см. ContainerPool)
+GO_CACHE_STEPS = [
+    write_file_step('/tmp/warmup/main.go', GO_WARMUP_SOURCE),
+    f'RUN GOCACHE={GO_CACHE_SEED} go build -o /dev/null /tmp/warmup/main.go && rm -rf /tmp/warmup',
+]
+
+# Статический CDS архив из классов JDK, загруженных прогревочной программой
+JAVA_CDS_STEPS = [
+    write_file_step('/tmp/warmup/Warmup.java', JAVA_WARMUP_SOURCE),
+    'RUN cd /tmp/warmup && javac Warmup.java '
+    '&& java -Xshare:off -XX:DumpLoadedClassList=classes.all -cp . Warmup < /dev/null '
+    '&& grep -v Warmup classes.all > classes.lst '
+    f'&& mkdir -p {os.path.dirname(JAVA_CDS_ARCHIVE)} '
+    f'&& java -Xshare:dump -XX:SharedClassListFile=classes.lst -XX:SharedArchiveFile={JAVA_CDS_ARCHIVE} '
+    '&& rm -rf /tmp/warmup',
+]
+
+
+def runner_dockerfile(config: dict[str, Any]) -> str:
+    """Dockerfile образа песочницы: базовый образ языка плюс шаги из runner_steps"""
+    lines = [f'FROM {config["base_image"]}', *config.get('runner_steps', [])]
+    return '\n'.join(lines) + '\n'
+
+
+def runner_image_tag(language: str, config: dict[str, Any]) -> str:
+    """Тег образа зависит от содержимого Dockerfile: изменили шаги - получили новый образ"""
+    digest = hashlib.sha256(runner_dockerfile(config).encode('utf-8')).hexdigest()[:12]
+    return f'{RUNNER_IMAGE_PREFIX}-{language}:{digest}'
+
+
+def resolve_runner_images(language_config: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """Копия конфига языков, где image указывает на образ песочницы"""
+    resolved = copy.deepcopy(language_config)
+    for language, config in resolved.items():
+        config['image'] = runner_image_tag(language, config)
+    return resolved
+
+
+def ensure_runner_images(
+    client: docker.DockerClient,
+    language_config: dict[str, dict[str, Any]],
+    build: bool = RUNNER_IMAGES_BUILD,
+) -> dict[str, str]:
+    """
+    Проверить, что образы песочниц есть локально, и собрать недостающие
+
+    Args:
+        client: Docker клиент
+        language_config: Конфиг языков после resolve_runner_images
+        build: Собирать отсутствующие образы (иначе только отметить их как missing)
+
+    Returns:
+        {язык: 'present' | 'built' | 'missing' | 'failed: <ошибка>'}
+    """
+    status: dict[str, str] = {}
+    for language, config in language_config.items():
+        tag = config['image']
+        try:
+            client.images.get(tag)
+            status[language] = 'present'
+            continue
+        except docker.errors.ImageNotFound:
+            pass
+        except Exception as exc:  # noqa: BLE001
+            status[language] = f'failed: {exc}'
+            continue
+
+        if not build:
+            print(f'Runner image {tag} is missing and EXECUTOR_RUNNER_IMAGES_BUILD=0')  # noqa: T201
+            status[language] = 'missing'
+            continue
+
+        print(f'Building runner image {tag}')  # noqa: T201
+        try:
+            client.images.build(
+                fileobj=io.BytesIO(runner_dockerfile(config).encode('utf-8')),
+                tag=tag,
+                rm=True,
+                forcerm=True,
+            )
+            status[language] = 'built'
+        except Exception as exc:  # noqa: BLE001
+            print(f'Failed to build runner image {tag}: {exc}')  # noqa: T201
+            status[language] = f'failed: {exc}'
+    return status
@@ -0,0 +1,149 @@
+"""Scheduler - Ограниченная очередь задач с честным распределением между пользователями"""
+
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable
+
+# Сколько задач выполняется одновременно (по умолчанию - сколько потоков у DockerExecutor)
+EXECUTOR_WORKERS = int(os.getenv('EXECUTOR_WORKERS', os.getenv('EXECUTOR_CONCURRENCY', '8')))
+# Сколько задач может ждать в очереди, прежде чем /execute начнёт отвечать 429
+EXECUTOR_QUEUE_SIZE = int(os.getenv('EXECUTOR_QUEUE_SIZE', '64'))
+# Сколько задач одного пользователя может ждать в очереди одновременно
+EXECUTOR_QUEUE_PER_USER = int(os.getenv('EXECUTOR_QUEUE_PER_USER', '4'))
+
+# Сколько последних ожиданий учитывать в метриках
+_WAIT_SAMPLES = 500
+
+
+class QueueFullError(Exception):
+    """Очередь переполнена; retry_after - через сколько секунд имеет смысл повторить"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ExecutionScheduler:
+    """
+    Очередь задач на выполнение с N рабочими слотами.
+
+    У каждого пользователя своя очередь, воркеры обходят пользователей по кругу: кандидат,
+    отправивший десять запусков подряд, получает не больше слотов, чем остальные. Общая
+    длина очереди и число ожидающих задач одного пользователя ограничены - при переполнении
+    submit бросает QueueFullError с оценкой Retry-After.
+    """
+
+    def __init__(
+        self,
+        workers: int = EXECUTOR_WORKERS,
+        max_queue: int = EXECUTOR_QUEUE_SIZE,
+        max_per_user: int = EXECUTOR_QUEUE_PER_USER,
+    ):
+        self.handler: Callable[[Any], Awaitable[None]] | None = None
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.max_per_user = max(1, max_per_user)
+        # user_key -> очередь (job, время постановки); порядок ключей - порядок обхода
+        self._queues: OrderedDict[str, deque[tuple[Any, float]]] = OrderedDict()
+        self._depth = 0
+        self._busy = 0
+        self._ready: asyncio.Condition | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._waits_ms: deque[int] = deque(maxlen=_WAIT_SAMPLES)
+        # Скользящее среднее длительности задачи - для оценки Retry-After
+        self._avg_run_s = 5.0
+        self._stats = {'accepted': 0, 'rejected': 0, 'completed': 0, 'failed': 0}
+
+    def start(self, handler: Callable[[Any], Awaitable[None]]) -> None:
+        """Запустить воркеры; handler выполняет одну задачу"""
+        self.handler = handler
+        self._ready = asyncio.Condition()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f'execution-worker-{idx}')
+            for idx in range(self.workers)
+        ]
+
+    async def stop(self) -> list[Any]:
+        """Остановить воркеры; возвращает задачи, которые так и не начали выполняться"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        dropped = [job for queue in self._queues.values() for job, _ in queue]
+        self._queues.clear()
+        self._depth = 0
+        return dropped
+
+    def _retry_after(self) -> int:
+        """Сколько примерно ждать, пока очередь разгрузится на одну задачу на каждый слот"""
+        backlog = self._depth + self._busy
+        return max(1, math.ceil(self._avg_run_s * backlog / self.workers))
+
+    async def submit(self, user_key: str, job: Any) -> None:
+        """Поставить задачу в очередь пользователя (не ждёт выполнения)"""
+        if self._ready is None:
+            raise RuntimeError('Scheduler is not started')
+        async with self._ready:
+            queue = self._queues.get(user_key)
+            if self._depth >= self.max_queue:
+                self._stats['rejected'] += 1
+                raise QueueFullError('Execution queue is full', self._retry_after())
+            if queue is not None and len(queue) >= self.max_per_user:
+                self._stats['rejected'] += 1
+                raise QueueFullError('Too many queued executions for this user', self._retry_after())
+            if queue is None:
+                queue = self._queues[user_key] = deque()
+            queue.append((job, time.monotonic()))
+            self._depth += 1
+            self._stats['accepted'] += 1
+            self._ready.notify()
+
+    def _pop_next(self) -> tuple[Any, float]:
+        """Взять задачу у следующего по кругу пользователя (под self._ready)"""
+        user_key, queue = next(iter(self._queues.items()))
+        item = queue.popleft()
+        del self._queues[user_key]
+        if queue:
+            # Остальные задачи пользователя - в конец круга
+            self._queues[user_key] = queue
+        self._depth -= 1
+        return item
+
+    async def _worker(self) -> None:
+        assert self._ready is not None and self.handler is not None
+        while True:
+            async with self._ready:
+                await self._ready.wait_for(lambda: self._depth > 0)
+                job, enqueued_at = self._pop_next()
+                self._busy += 1
+            started = time.monotonic()
+            self._waits_ms.append(int((started - enqueued_at) * 1000))
+            try:
+                await self.handler(job)
+                self._stats['completed'] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001
+                self._stats['failed'] += 1
+                print(f'Execution worker failed: {exc}')  # noqa: T201
+            finally:
+                self._busy -= 1
+                self._avg_run_s = 0.9 * self._avg_run_s + 0.1 * (time.monotonic() - started)
+
+    def stats(self) -> dict[str, Any]:
+        waits = sorted(self._waits_ms)
+        return {
+            **self._stats,
+            'workers': self.workers,
+            'busy_workers': self._busy,
+            'depth': self._depth,
+            'capacity': self.max_queue,
+            'users_waiting': len(self._queues),
+            'wait_ms_avg': int(sum(waits) / len(waits)) if waits else None,
+            'wait_ms_p95': waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else None,
+            'wait_ms_max': waits[-1] if waits else None,
+            'avg_run_s': round(self._avg_run_s, 2),
+        }
@@ -0,0 +1,89 @@
+"""Test Bundles - Локальный кэш наборов тестов задач"""
+
+import asyncio
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Any
+
+from .http_client import backend_http
+
+# Сколько наборов тестов держим в памяти
+TEST_BUNDLE_CACHE_SIZE = int(os.getenv('EXECUTOR_TEST_BUNDLE_CACHE_SIZE', '128'))
+# Токен внутренних эндпоинтов backend (тот же INTERNAL_SERVICE_TOKEN, что у backend)
+INTERNAL_SERVICE_TOKEN = os.getenv('INTERNAL_SERVICE_TOKEN', 'internal_service_token')
+
+
+def bundle_hash(test_cases: list[dict[str, str]]) -> str:
+    """Хэш набора в том же каноническом виде, что и на backend"""
+    canonical = json.dumps(test_cases, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class TestBundleCache:
+    """
+    LRU наборов тестов по хэшу.
+
+    Backend присылает в /execute только ссылку {task_id, scope, hash}; при промахе набор
+    один раз скачивается у backend (параллельные запросы одного набора ждут одну загрузку)
+    и проверяется по хэшу.
+    """
+
+    def __init__(self, backend_url: str, max_entries: int = TEST_BUNDLE_CACHE_SIZE):
+        self.backend_url = backend_url
+        self.max_entries = max(1, max_entries)
+        self._entries: OrderedDict[str, list[dict[str, str]]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._stats = {'hits': 0, 'misses': 0}
+
+    async def get(self, ref: dict[str, Any]) -> list[dict[str, str]]:
+        key = ref['hash']
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        self._stats['misses'] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            test_cases = await self._fetch(ref)
+        except Exception as exc:
+            future.set_exception(exc)
+            # Исключение уже передано ожидающим; помечаем как полученное
+            future.exception()
+            raise
+        else:
+            future.set_result(test_cases)
+            self._entries[key] = test_cases
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return test_cases
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _fetch(self, ref: dict[str, Any]) -> list[dict[str, str]]:
+        url = f'{self.backend_url}/executions/test-bundles/{ref["task_id"]}/{ref["scope"]}/{ref["hash"]}'
+        response = await backend_http.get().get(
+            url, headers={'X-Internal-Token': INTERNAL_SERVICE_TOKEN}, timeout=30.0
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f'Failed to fetch test bundle {ref["hash"][:12]}: HTTP {response.status_code}')
+        test_cases = response.json()['test_cases']
+        if bundle_hash(test_cases) != ref['hash']:
+            raise RuntimeError(f'Test bundle {ref["hash"][:12]} does not match its hash')
+        return test_cases
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self._stats['hits'] + self._stats['misses']
+        return {
+            **self._stats,
+            'entries': len(self._entries),
+            'hit_rate': round(self._stats['hits'] / lookups, 3) if lookups else None,
+        }
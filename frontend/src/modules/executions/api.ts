@@ -36,6 +36,52 @@ export async function getExecution(token: string, id: string): Promise<Execution
   return (await response.json()) as Execution
 }
 
+/**
+ * Подписаться на изменения выполнения через SSE (fetch-стрим, чтобы передать Bearer токен).
+ * onUpdate получает каждое состояние и возвращает true, когда выполнение завершено.
+ * Возвращает true, если поток дошёл до завершения, и false, если оборвался раньше.
+ */
+export async function streamExecution(
+  token: string,
+  id: string,
+  onUpdate: (execution: Execution) => boolean,
+  signal?: AbortSignal,
+): Promise<boolean> {
+  const response = await fetch(buildUrl(`/executions/${id}/events`), {
+    headers: { ...getAuthHeaders(token), Accept: 'text/event-stream' },
+    signal,
+  })
+  if (!response.ok || !response.body) {
+    throw new Error('Не удалось подписаться на статус выполнения')
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  for (;;) {
+    const { value, done } = await reader.read()
+    if (done) {
+      return false
+    }
+    buffer += decoder.decode(value, { stream: true })
+    let separator = buffer.indexOf('\n\n')
+    while (separator !== -1) {
+      const rawEvent = buffer.slice(0, separator)
+      buffer = buffer.slice(separator + 2)
+      const data = rawEvent
+        .split('\n')
+        .filter((line) => line.startsWith('data:'))
+        .map((line) => line.slice(5).trimStart())
+        .join('\n')
+      if (data && onUpdate(JSON.parse(data) as Execution)) {
+        await reader.cancel()
+        return true
+      }
+      separator = buffer.indexOf('\n\n')
+    }
+  }
+}
+
 export async function listExecutions(token: string, limit = 20): Promise<Execution[]> {
   const response = await fetch(buildUrl(`/executions?limit=${limit}`), {
     headers: getAuthHeaders(token),
@@ -11,6 +11,7 @@ export type ExecutionRequest = {
   task_id?: string
   vacancy_id?: string
   is_submit?: boolean
+  fail_fast?: boolean
 }
 
 export type TestResult = {
@@ -20,6 +21,27 @@ export type TestResult = {
   actual_output: string
   passed: boolean
   duration_ms: number
+  cpu_time_ms?: number | null
+  peak_memory_kb?: number | null
+  verdict?: string | null
+  skipped?: boolean
+}
+
+export type TestProgress = {
+  test_index: number
+  passed: boolean
+  duration_ms: number
+  exit_code: number
+  cpu_time_ms?: number | null
+  peak_memory_kb?: number | null
+  verdict?: string | null
+  skipped?: boolean
+}
+
+export type ExecutionProgress = {
+  total: number
+  completed: number
+  test_results: TestProgress[]
 }
 
 export type ExecutionResult = {
@@ -38,6 +60,7 @@ export type Execution = {
   status: 'pending' | 'running' | 'completed' | 'failed'
   files: Record<string, string>
   result: ExecutionResult | null
+  progress?: ExecutionProgress | null
   error_message: string | null
   created_at: string
   started_at: string | null
@@ -2,7 +2,6 @@ import type {
   Task,
   TaskCreate,
   TaskUpdate,
-  TestCase,
   SolutionMlMeta,
   SolutionAntiCheatMeta,
   TaskCommunication,
@@ -43,20 +42,6 @@ export async function fetchTask(token: string, taskId: string): Promise<Task> {
   return (await response.json()) as Task
 }
 
-export async function fetchTaskTestsForSubmit(
-  token: string,
-  taskId: string,
-): Promise<{ open_tests: TestCase[] | null; hidden_tests: TestCase[] | null }> {
-  const response = await fetch(buildUrl(`/tasks/${taskId}/tests-for-submit`), {
-    headers: getAuthHeaders(token),
-  })
-  if (!response.ok) {
-    const error = await response.json().catch(() => ({ detail: 'Ошибка загрузки тестов' }))
-    throw new Error(error.detail || 'Не удалось загрузить тесты')
-  }
-  return (await response.json()) as { open_tests: TestCase[] | null; hidden_tests: TestCase[] | null }
-}
-
 export async function fetchSolvedTasks(
   token: string,
   vacancyId: string,
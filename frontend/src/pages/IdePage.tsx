@@ -9,7 +9,6 @@ import { getRandomTasks, fetchVacancy } from '../modules/vacancies/api'
 import {
   fetchContestTasks,
   fetchSolvedTasks,
-  fetchTaskTestsForSubmit,
   fetchLastSolution,
   fetchContestCompletionStatus,
   fetchTaskCommunication,
@@ -17,7 +16,7 @@ import {
 } from '../modules/tasks/api'
 import type { Question } from '../modules/questions/types'
 import type { Task, TaskCommunication, SolutionMlMeta, SolutionAntiCheatMeta } from '../modules/tasks/types'
-import { createExecution, getExecution } from '../modules/executions/api'
+import { createExecution, getExecution, streamExecution } from '../modules/executions/api'
 import type { Execution } from '../modules/executions/types'
 import { requestHint, getUsedHints, getAvailableHints, type HintResponse } from '../modules/hints/api'
 import ReactMarkdown from 'react-markdown'
@@ -486,46 +485,14 @@ export function IdePage() {
       [solutionFileName]: solutionCode,
     }
 
-    // Если режим контеста и выбрана задача, получаем тесты
-    let testCases: Array<{ input: string; output: string }> | undefined = undefined
-    if (isContestMode && selectedTask && 'open_tests' in selectedTask && selectedTaskId) {
-      if (runMode === 'run' && selectedTask.open_tests) {
-        // "Запустить" - только открытые тесты
-        testCases = selectedTask.open_tests.map(tc => ({ input: tc.input, output: tc.output }))
-      } else if (runMode === 'submit') {
-        // "Submit" - все тесты (открытые + закрытые)
-        // Запрашиваем все тесты для Submit
-        try {
-          const testsData = await fetchTaskTestsForSubmit(token, selectedTaskId)
-          const allTests: Array<{ input: string; output: string }> = []
-          
-          // Добавляем открытые тесты
-          if (testsData.open_tests) {
-            allTests.push(...testsData.open_tests.map(tc => ({ input: tc.input, output: tc.output })))
-          }
-          
-          // Добавляем закрытые тесты
-          if (testsData.hidden_tests) {
-            allTests.push(...testsData.hidden_tests.map(tc => ({ input: tc.input, output: tc.output })))
-          }
-          
-          testCases = allTests.length > 0 ? allTests : undefined
-        } catch (error) {
-          console.error('Failed to fetch tests for submit:', error)
-          setExecutionLoading(false)
-          return
-        }
-      }
-    }
-
     try {
       setExecutionLoading(true)
 
+      // Тесты задачи (открытые для "Запустить", все для Submit) подставляет backend по task_id
       const execution = await createExecution(token, {
         language: effectiveLanguage,
         files: filesToSend,
         timeout: 30,
-        test_cases: testCases,
         task_id: isContestMode && selectedTaskId ? selectedTaskId : undefined,
         vacancy_id: contestVacancyId ? contestVacancyId : undefined,
         is_submit: runMode === 'submit',
@@ -558,6 +525,82 @@ export function IdePage() {
     let attempts = 0
     const pollInterval = 1000
 
+    // Применяет очередное состояние выполнения; true - выполнение завершено
+    const applyUpdate = (execution: Execution): boolean => {
+      setCurrentExecution(execution)
+
+      if (execution.status === 'completed') {
+        setExecutionLoading(false)
+        
+        // Если это Submit, всегда перезагружаем список решенных задач
+        // Это гарантирует, что мы получим актуальное состояние с сервера
+        if (
+          currentRunMode === 'submit' &&
+          currentTaskId &&
+          currentVacancyId
+        ) {
+          // Небольшая задержка, чтобы backend успел сохранить решение
+          setTimeout(async () => {
+            try {
+              const solvedIds = await fetchSolvedTasks(token, currentVacancyId)
+              setSolvedTaskIds(new Set(solvedIds))
+              console.log('Reloaded solved tasks:', solvedIds)
+              
+              // Если задача решена (по вердикту или по списку с сервера), добавляем локально
+              const isAccepted = execution.result?.verdict === 'ACCEPTED' || solvedIds.includes(currentTaskId)
+              if (isAccepted) {
+                setSolvedTaskIds(prev => new Set([...prev, currentTaskId]))
+              }
+              
+              // Проверяем, все ли задачи решены
+              if (currentVacancyId) {
+                try {
+                  const completionStatus = await fetchContestCompletionStatus(token, currentVacancyId)
+                  setContestCompleted(completionStatus.all_solved)
+                } catch (error) {
+                  console.error('Failed to check completion status:', error)
+                }
+              }
+            } catch (error) {
+              console.error('Failed to reload solved tasks:', error)
+              // Если не удалось загрузить с сервера, но вердикт ACCEPTED, добавляем локально
+              if (execution.result?.verdict === 'ACCEPTED') {
+                setSolvedTaskIds(prev => new Set([...prev, currentTaskId]))
+              }
+            }
+          }, 500) // Задержка 500ms для гарантии сохранения на backend
+        }
+        const isAccepted =
+          currentRunMode === 'submit' &&
+          currentTaskId &&
+          execution.result?.verdict === 'ACCEPTED'
+        if (currentTaskId) {
+          void loadLastSolutionData(currentTaskId, {
+            vacancyId: currentVacancyId ?? undefined,
+            applyCode: false,
+          })
+          const requestCommunication = (attempt = 0) => {
+            void loadCommunicationForTask(currentTaskId).then(comm => {
+              if (comm && isAccepted) {
+                setActiveTab('chat')
+              } else if (!comm && isAccepted && attempt < 3) {
+                setTimeout(() => requestCommunication(attempt + 1), 800)
+              }
+            })
+          }
+          requestCommunication()
+        }
+        
+        return true
+      }
+
+      if (execution.status === 'failed') {
+        setExecutionLoading(false)
+        return true
+      }
+      return false
+    }
+
     const poll = async () => {
       if (attempts >= maxAttempts) {
         setExecutionLoading(false)
@@ -566,75 +609,7 @@ export function IdePage() {
 
       try {
         const execution = await getExecution(token, executionId)
-        setCurrentExecution(execution)
-
-        if (execution.status === 'completed') {
-          setExecutionLoading(false)
-          
-          // Если это Submit, всегда перезагружаем список решенных задач
-          // Это гарантирует, что мы получим актуальное состояние с сервера
-          if (
-            currentRunMode === 'submit' &&
-            currentTaskId &&
-            currentVacancyId
-          ) {
-            // Небольшая задержка, чтобы backend успел сохранить решение
-            setTimeout(async () => {
-              try {
-                const solvedIds = await fetchSolvedTasks(token, currentVacancyId)
-                setSolvedTaskIds(new Set(solvedIds))
-                console.log('Reloaded solved tasks:', solvedIds)
-                
-                // Если задача решена (по вердикту или по списку с сервера), добавляем локально
-                const isAccepted = execution.result?.verdict === 'ACCEPTED' || solvedIds.includes(currentTaskId)
-                if (isAccepted) {
-                  setSolvedTaskIds(prev => new Set([...prev, currentTaskId]))
-                }
-                
-                // Проверяем, все ли задачи решены
-                if (currentVacancyId) {
-                  try {
-                    const completionStatus = await fetchContestCompletionStatus(token, currentVacancyId)
-                    setContestCompleted(completionStatus.all_solved)
-                  } catch (error) {
-                    console.error('Failed to check completion status:', error)
-                  }
-                }
-              } catch (error) {
-                console.error('Failed to reload solved tasks:', error)
-                // Если не удалось загрузить с сервера, но вердикт ACCEPTED, добавляем локально
-                if (execution.result?.verdict === 'ACCEPTED') {
-                  setSolvedTaskIds(prev => new Set([...prev, currentTaskId]))
-                }
-              }
-            }, 500) // Задержка 500ms для гарантии сохранения на backend
-          }
-          const isAccepted =
-            currentRunMode === 'submit' &&
-            currentTaskId &&
-            execution.result?.verdict === 'ACCEPTED'
-          if (currentTaskId) {
-            void loadLastSolutionData(currentTaskId, {
-              vacancyId: currentVacancyId ?? undefined,
-              applyCode: false,
-            })
-            const requestCommunication = (attempt = 0) => {
-              void loadCommunicationForTask(currentTaskId).then(comm => {
-                if (comm && isAccepted) {
-                  setActiveTab('chat')
-                } else if (!comm && isAccepted && attempt < 3) {
-                  setTimeout(() => requestCommunication(attempt + 1), 800)
-                }
-              })
-            }
-            requestCommunication()
-          }
-          
-          return
-        }
-
-        if (execution.status === 'failed') {
-          setExecutionLoading(false)
+        if (applyUpdate(execution)) {
           return
         }
 
@@ -646,6 +621,15 @@ export function IdePage() {
       }
     }
 
+    // Сначала пробуем SSE-поток: backend сам присылает изменения без опроса
+    try {
+      if (await streamExecution(token, executionId, applyUpdate)) {
+        return
+      }
+    } catch (error) {
+      console.warn('Execution stream unavailable, falling back to polling:', error)
+    }
+
     setTimeout(poll, pollInterval)
   }
 
@@ -1018,6 +1002,23 @@ export function IdePage() {
                         {currentExecution.status === 'failed' && '❌ Ошибка'}
                       </div>
 
+                      {currentExecution.status === 'running' && currentExecution.progress && (
+                        <div>
+                          <strong style={{ fontSize: '12px', color: 'rgba(255, 255, 255, 0.7)' }}>
+                            Проверено тестов: {currentExecution.progress.completed}/{currentExecution.progress.total}
+                          </strong>
+                          <div className="execution-result-output stdout">
+                            {currentExecution.progress.test_results
+                              .map((tr) =>
+                                tr.skipped
+                                  ? `⏭ Тест ${tr.test_index}: не запускался`
+                                  : `${tr.passed ? '✅' : '❌'} Тест ${tr.test_index} (${tr.duration_ms}ms)${tr.verdict ? ` ${tr.verdict}` : ''}`,
+                              )
+                              .join('\n')}
+                          </div>
+                        </div>
+                      )}
+
                       {currentExecution.result && (
                         <>
                           {currentExecution.result.stdout && (
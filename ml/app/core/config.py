@@ -1,3 +1,5 @@
+from typing import Dict, List
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -12,6 +14,60 @@ class Settings(BaseSettings):
     # Model Names (для SciBox API)
     MODEL_AWQ: str = "qwen3-32b-awq" # General purpose
     MODEL_CODER: str = "qwen3-coder-30b-a3b-instruct-fp8" # Coding specialist
+
+    # Batch endpoints (/evaluate/batch, /anti-cheat/check/batch)
+    BATCH_MAX_ITEMS: int = 100 # Максимум элементов в одном запросе
+    BATCH_CONCURRENCY: int = 4 # Одновременных запросов к LLM на пакет
+
+    # Disk cache of LLM responses (services/llm_cache.py)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: str = ".cache/llm_cache.sqlite3"
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    LLM_CACHE_MAX_ENTRIES: int = 20000
+    LLM_CACHE_MAX_TEMPERATURE: float = 0.3 # Кэшируем только почти детерминированные запросы
+
+    # Upstream LLM limits per model (services/llm_limiter.py)
+    LLM_MAX_CONCURRENCY: int = 8 # Одновременных запросов к одной модели
+    LLM_REQUESTS_PER_SECOND: float = 5.0 # 0 - без ограничения
+    LLM_TOKENS_PER_MINUTE: int = 200000 # Промпт + ответ; 0 - без ограничения
+    # Переопределения по модели, JSON: {"qwen3-32b-awq": {"max_concurrency": 4, "tokens_per_minute": 100000}}
+    LLM_MODEL_LIMITS: Dict[str, Dict[str, float]] = {}
+
+    # Upstream LLM failures (services/llm_resilience.py)
+    LLM_TIMEOUT_SECONDS: float = 60.0
+    LLM_CONNECT_TIMEOUT_SECONDS: float = 10.0
+    LLM_RETRY_MAX_ATTEMPTS: int = 3 # Попыток на запрос: соединение, 5xx, 429
+    LLM_RETRY_BASE_DELAY: float = 0.5 # Пауза full jitter: до base * 2^attempt секунд
+    LLM_RETRY_MAX_DELAY: float = 10.0 # Retry-After больше этого не ждём - ошибка сразу
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5 # Сбоев подряд до открытия breaker
+    LLM_BREAKER_RESET_SECONDS: float = 30.0 # Сколько breaker отклоняет запросы до пробного
+
+    # Stock of pre-generated tasks (services/task_stock.py)
+    TASK_STOCK_ENABLED: bool = True
+    TASK_STOCK_PATH: str = ".cache/task_stock.sqlite3"
+    TASK_STOCK_LOW_WATERMARK: int = 2 # Меньше - запускаем пополнение
+    TASK_STOCK_HIGH_WATERMARK: int = 5 # Пополняем до этого количества
+    TASK_STOCK_REFILL_CONCURRENCY: int = 2 # Одновременных генераций на все ключи
+    # Ключи, которые пополняются при старте: "difficulty:language[:topic]"
+    TASK_STOCK_WARM_KEYS: List[str] = ["easy:python", "medium:python", "hard:python"]
+
+    # Python code execution pool (services/code_executor.py), limits per test input
+    CODE_EXECUTOR_WORKERS: int = 4
+    CODE_EXECUTOR_WALL_TIMEOUT_SECONDS: float = 5.0
+    CODE_EXECUTOR_CPU_TIMEOUT_SECONDS: int = 2
+    CODE_EXECUTOR_MEMORY_LIMIT_MB: int = 256
+    CODE_EXECUTOR_MAX_OUTPUT_BYTES: int = 1024 * 1024
+
+    # Validation of canonical solutions in the executor (services/solution_validator.py)
+    EXECUTOR_SERVICE_URL: str = "http://localhost:8001"
+    TASK_VALIDATION_TIMEOUT_SECONDS: int = 10 # Таймаут одного теста при проверке
+    TASK_VALIDATION_REQUEST_TIMEOUT_SECONDS: float = 300.0
+    TASK_TIME_LIMIT_FACTOR: float = 3.0 # Лимит = процессорное время самого медленного теста эталона * множитель
+    TASK_TIME_LIMIT_MIN_MS: int = 1000
+    TASK_TIME_LIMIT_MAX_MS: int = 10000
+    TASK_MEMORY_LIMIT_FACTOR: float = 2.0 # Лимит = пиковый RSS эталона * множитель
+    TASK_MEMORY_LIMIT_MIN_MB: int = 64
+    TASK_MEMORY_LIMIT_MAX_MB: int = 512 # Не больше памяти executor на один тест (EXECUTOR_TEST_MEMORY_MB)
     
     class Config:
         case_sensitive = True
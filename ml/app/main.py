@@ -1,6 +1,12 @@
 from fastapi import FastAPI
 from app.routes import api
 from app.core.config import settings
+from app.services.llm_cache import llm_cache
+from app.services.llm_client import llm_client
+from app.services.llm_limiter import llm_limiter
+from app.services.task_stock import task_stock
+from app.services.code_executor import code_executor
+from app.services.solution_validator import solution_validator
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -19,6 +25,34 @@ app.add_middleware(
 
 app.include_router(api.router, prefix=settings.API_V1_STR)
 
+@app.on_event("startup")
+async def start_code_executor():
+    await code_executor.start()
+
+@app.on_event("startup")
+async def start_task_stock():
+    if settings.TASK_STOCK_ENABLED:
+        task_stock.start(settings.TASK_STOCK_WARM_KEYS)
+
+@app.on_event("shutdown")
+async def stop_task_stock():
+    await task_stock.stop()
+
+@app.on_event("shutdown")
+async def stop_code_executor():
+    code_executor.shutdown()
+
+@app.on_event("shutdown")
+async def close_solution_validator():
+    await solution_validator.close()
+
 @app.get("/health")
 async def health_check():
-    return {"status": "ok", "service": "ml"}
+    return {
+        "status": "ok",
+        "service": "ml",
+        "llm_cache": llm_cache.stats(),
+        "llm": llm_client.stats(),
+        "llm_limiter": llm_limiter.stats(),
+        "task_stock": await task_stock.stats(),
+    }
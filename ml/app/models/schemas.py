@@ -18,6 +18,9 @@ class Task(BaseModel):
     hints: Optional[List[Dict[str, Any]]] = None  # Подсказки трех уровней
     canonical_solution: Optional[str] = None  # Эталонное решение на Python
     canonical_solutions: Optional[Dict[str, str]] = None  # Эталонные решения на разных языках
+    generation_timings_ms: Optional[Dict[str, int]] = None  # Время этапов генерации и total
+    solution_validation: Optional[Dict[str, Any]] = None  # Прогон эталонных решений в executor по языкам
+    resource_limits: Optional[Dict[str, Dict[str, int]]] = None  # Лимиты теста по языкам из замера эталонных решений
 
 class TaskGenerationRequest(BaseModel):
     difficulty: Literal["easy", "medium", "hard"]
@@ -37,6 +40,19 @@ class EvaluationResult(BaseModel):
     feedback: str
     passed: bool
 
+class EvaluationBatchRequest(BaseModel):
+    items: List[EvaluationRequest]
+
+class EvaluationBatchItem(BaseModel):
+    index: int # Позиция в запросе
+    result: Optional[EvaluationResult] = None
+    error: Optional[str] = None # Заполнено, если элемент не удалось оценить
+
+class EvaluationBatchResponse(BaseModel):
+    results: List[EvaluationBatchItem]
+    succeeded: int
+    failed: int
+
 class AdaptiveLevelRequest(BaseModel):
     current_difficulty: Literal["easy", "medium", "hard"]
     is_passed: bool
@@ -10,22 +10,28 @@ API эндпоинты для ML микросервиса VibeCode Jam.
 - Анти-чит проверки
 """
 
+from typing import Any, Dict, List, Optional
+
 from fastapi import APIRouter, HTTPException
+from app.core.config import settings
 from app.models.schemas import (
     TaskGenerationRequest, Task,
     EvaluationRequest, EvaluationResult,
+    EvaluationBatchRequest, EvaluationBatchItem, EvaluationBatchResponse,
     AdaptiveLevelRequest, AdaptiveLevelResponse,
     CommunicationRequest, CommunicationResponse,
     FollowUpRequest, ScoringRequest, ScoringResponse,
     GenerateHintsRequest, GenerateHintsResponse
 )
 from app.services.task_generator import task_generator
+from app.services.task_stock import task_stock
 from app.services.evaluator import evaluator
 from app.services.adaptive_engine import adaptive_engine
 from app.services.communication import communication_service
 from app.services.scoring import scoring_service
 from app.services.anti_cheat import anti_cheat_service
 from app.services.hint_service import hint_service
+from app.services.batch import run_batch
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -35,11 +41,42 @@ class AntiCheatRequest(BaseModel):
     code: str
     problem_description: str
 
+class AntiCheatBatchRequest(BaseModel):
+    """Пакетная проверка кода на плагиат."""
+    items: List[AntiCheatRequest]
+
+class AntiCheatBatchItem(BaseModel):
+    index: int
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+class AntiCheatBatchResponse(BaseModel):
+    results: List[AntiCheatBatchItem]
+    succeeded: int
+    failed: int
+
+def _check_batch_size(size: int) -> None:
+    if size > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch too large: {size} items, max {settings.BATCH_MAX_ITEMS}"
+        )
+
 @router.post("/generate-task", response_model=Task)
 async def generate_task(request: TaskGenerationRequest):
-    """Генерирует новую задачу заданного уровня сложности."""
+    """Генерирует новую задачу заданного уровня сложности.
+
+    Если в запасе есть готовая задача для (сложность, язык, тема), она отдаётся сразу,
+    а запас пополняется в фоне.
+    """
     try:
-        task = await task_generator.generate_task(request.difficulty, language=request.language)
+        if settings.TASK_STOCK_ENABLED:
+            task = await task_stock.pop(request.difficulty, request.language, request.topic)
+            if task is not None:
+                return task
+        task = await task_generator.generate_task(
+            request.difficulty, language=request.language, topic=request.topic
+        )
         return task
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -53,6 +90,22 @@ async def evaluate_solution(request: EvaluationRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/evaluate/batch", response_model=EvaluationBatchResponse)
+async def evaluate_solutions_batch(request: EvaluationBatchRequest):
+    """Оценивает пакет решений; ошибки отдельных элементов возвращаются в error."""
+    _check_batch_size(len(request.items))
+    outcomes = await run_batch(
+        request.items,
+        lambda item: evaluator.evaluate_submission(item, priority="batch"),
+        settings.BATCH_CONCURRENCY,
+    )
+    results = [
+        EvaluationBatchItem(index=index, result=result, error=error)
+        for index, (result, error) in enumerate(outcomes)
+    ]
+    failed = sum(1 for item in results if item.error is not None)
+    return EvaluationBatchResponse(results=results, succeeded=len(results) - failed, failed=failed)
+
 @router.post("/adaptive-engine", response_model=AdaptiveLevelResponse)
 async def get_next_level(request: AdaptiveLevelRequest):
     """Определяет следующий уровень сложности на основе результатов."""
@@ -116,6 +169,22 @@ async def check_cheat(request: AntiCheatRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/anti-cheat/check/batch", response_model=AntiCheatBatchResponse)
+async def check_cheat_batch(request: AntiCheatBatchRequest):
+    """Проверяет пакет решений на плагиат; ошибки отдельных элементов возвращаются в error."""
+    _check_batch_size(len(request.items))
+    outcomes = await run_batch(
+        request.items,
+        lambda item: anti_cheat_service.check_submission(item.code, item.problem_description, priority="batch"),
+        settings.BATCH_CONCURRENCY,
+    )
+    results = [
+        AntiCheatBatchItem(index=index, result=result, error=error)
+        for index, (result, error) in enumerate(outcomes)
+    ]
+    failed = sum(1 for item in results if item.error is not None)
+    return AntiCheatBatchResponse(results=results, succeeded=len(results) - failed, failed=failed)
+
 @router.post("/generate-task-mock", response_model=Task)
 async def generate_task_mock(request: TaskGenerationRequest):
     """Генерирует mock задачу для тестирования без LLM."""
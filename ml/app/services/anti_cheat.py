@@ -4,12 +4,13 @@ from app.services.llm_client import llm_client
 class AntiCheatService:
     """Сервис проверки кода на плагиат и AI-генерацию."""
     
-    async def check_submission(self, code: str, problem_desc: str) -> dict:
+    async def check_submission(self, code: str, problem_desc: str, priority: str = "default") -> dict:
         """Проверяет код на признаки нечестного решения.
         
         Args:
             code: Код кандидата
             problem_desc: Описание задачи
+            priority: Класс приоритета запроса к LLM (batch для пакетной проверки)
             
         Returns:
             dict: Результат проверки (is_suspicious, confidence, reason)
@@ -41,7 +42,8 @@ class AntiCheatService:
                 {"role": "system", "content": "Ты специалист по проверке целостности кода и обнаружению плагиата. Всегда отвечай на русском языке."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.3
+            temperature=0.3,
+            priority=priority
         )
 
 anti_cheat_service = AntiCheatService()
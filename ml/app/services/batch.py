@@ -0,0 +1,31 @@
+"""Пакетная обработка запросов с ограниченным параллелизмом к LLM."""
+
+import asyncio
+from typing import Awaitable, Callable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def run_batch(
+    items: List[T],
+    handler: Callable[[T], Awaitable[R]],
+    concurrency: int,
+) -> List[Tuple[Optional[R], Optional[str]]]:
+    """Обрабатывает элементы параллельно, не более concurrency одновременно.
+
+    Ошибка одного элемента не прерывает пакет: для него возвращается (None, текст ошибки).
+
+    Returns:
+        list: Пары (результат, ошибка) в порядке входных элементов
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(item: T) -> Tuple[Optional[R], Optional[str]]:
+        async with semaphore:
+            try:
+                return await handler(item), None
+            except Exception as e:
+                return None, str(e) or type(e).__name__
+
+    return list(await asyncio.gather(*(run_one(item) for item in items)))
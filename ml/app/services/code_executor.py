@@ -1,83 +1,203 @@
+import asyncio
+import multiprocessing
+import os
+import signal
 import sys
-import io
-import contextlib
+import tempfile
+import time
 import traceback
-from typing import List, Tuple, Any
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+
+from app.core.config import settings
+
+
+def _child_main(code: str, stdin_fd: int, stdout_fd: int, stderr_fd: int, limits: dict) -> None:
+    """Тело дочернего процесса: лимиты, stdio из файлов и выполнение кода."""
+    import resource
+
+    os.setpgid(0, 0)
+    cpu_seconds = limits["cpu_seconds"]
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+    memory_bytes = limits["memory_mb"] * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (limits["max_output_bytes"], limits["max_output_bytes"]))
+    os.dup2(stdin_fd, 0)
+    os.dup2(stdout_fd, 1)
+    os.dup2(stderr_fd, 2)
+    sys.stdin = open(0, "r", closefd=False)
+    sys.stdout = open(1, "w", closefd=False)
+    sys.stderr = open(2, "w", closefd=False)
+    exit_code = 0
+    try:
+        exec(compile(code, "<solution>", "exec"), {"__name__": "__main__"})
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException as e:
+        # Без кадра самого исполнителя - только код решения
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        exit_code = 1
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    except BaseException:
+        exit_code = exit_code or 1
+    os._exit(exit_code)
+
+
+def _read_limited(fd: int, limit: int) -> str:
+    os.lseek(fd, 0, os.SEEK_SET)
+    return os.read(fd, limit).decode("utf-8", errors="replace")
+
+
+def _run_one(code: str, inp: str, limits: dict) -> dict:
+    """Выполняет код на одном входе в отдельном дочернем процессе (вызывается в воркере пула)."""
+    with tempfile.TemporaryFile() as stdin_file, \
+         tempfile.TemporaryFile() as stdout_file, \
+         tempfile.TemporaryFile() as stderr_file:
+        stdin_file.write(inp.encode("utf-8"))
+        stdin_file.flush()
+        stdin_file.seek(0)
+
+        started = time.monotonic()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _child_main(code, stdin_file.fileno(), stdout_file.fileno(), stderr_file.fileno(), limits)
+            finally:
+                os._exit(1)
+
+        deadline = started + limits["wall_seconds"]
+        timed_out = False
+        while True:
+            waited_pid, status, usage = os.wait4(pid, os.WNOHANG)
+            if waited_pid == pid:
+                break
+            if time.monotonic() >= deadline:
+                timed_out = True
+                try:
+                    os.killpg(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                _, status, usage = os.wait4(pid, 0)
+                break
+            time.sleep(0.005)
+
+        output = _read_limited(stdout_file.fileno(), limits["max_output_bytes"]).strip()
+        error = _read_limited(stderr_file.fileno(), limits["max_output_bytes"])
+
+    result = {
+        "input": inp,
+        "output": output,
+        "error": error,
+        "success": False,
+        "time_ms": round((time.monotonic() - started) * 1000),
+        "cpu_ms": round((usage.ru_utime + usage.ru_stime) * 1000),
+    }
+    if timed_out:
+        result["error"] = f"Превышен лимит времени ({limits['wall_seconds']} с)"
+    elif os.WIFSIGNALED(status):
+        sig = os.WTERMSIG(status)
+        if sig == signal.SIGXCPU:
+            result["error"] = f"Превышен лимит процессорного времени ({limits['cpu_seconds']} с)"
+        elif sig == signal.SIGXFSZ:
+            result["error"] = f"Превышен лимит вывода ({limits['max_output_bytes']} байт)"
+        else:
+            result["error"] = f"Процесс завершён сигналом {signal.Signals(sig).name}\n{error}".strip()
+    elif os.WEXITSTATUS(status) == 0:
+        result["success"] = True
+    elif "MemoryError" in error:
+        result["error"] = f"Превышен лимит памяти ({limits['memory_mb']} МБ)\n{error}".strip()
+    elif "[Errno 27]" in error:
+        # RLIMIT_FSIZE: Python игнорирует SIGXFSZ, запись падает с EFBIG
+        result["error"] = f"Превышен лимит вывода ({limits['max_output_bytes']} байт)"
+    return result
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
 
 class CodeExecutor:
-    """Исполнитель кода Python в песочнице.
-    
-    ВНИМАНИЕ: Использует exec() - небезопасно! В production используйте Docker.
+    """Исполнитель кода Python в пуле заранее запущенных процессов.
+
+    Каждый вход выполняется в отдельном дочернем процессе воркера: со своими
+    stdin/stdout/stderr, лимитами процессорного времени, памяти и размера вывода
+    и таймаутом по реальному времени. Зависание или падение кода не затрагивает
+    ML сервис, а входы одного вызова выполняются параллельно на разных воркерах.
+
+    ВНИМАНИЕ: это не песочница - код имеет доступ к файловой системе и сети контейнера.
     """
-    
-    def execute(self, code: str, inputs: List[str]) -> List[dict]:
+
+    def __init__(
+        self,
+        workers: int,
+        wall_seconds: float,
+        cpu_seconds: int,
+        memory_mb: int,
+        max_output_bytes: int,
+    ):
+        self.workers = max(1, workers)
+        self.limits = {
+            "wall_seconds": wall_seconds,
+            "cpu_seconds": max(1, cpu_seconds),
+            "memory_mb": memory_mb,
+            "max_output_bytes": max_output_bytes,
+        }
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # forkserver: воркеры не наследуют потоки и состояние event loop сервиса
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("forkserver"),
+            )
+        return self._pool
+
+    async def start(self) -> None:
+        """Запускает воркеры заранее, чтобы первый запрос не ждал их старта."""
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        await asyncio.gather(*(loop.run_in_executor(pool, _warm_up) for _ in range(self.workers)))
+        print(f"🧵 Пул исполнения кода запущен: {self.workers} воркеров")
+
+    def shutdown(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, code: str, inp: str) -> dict:
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        try:
+            return await loop.run_in_executor(pool, _run_one, code, inp, self.limits)
+        except BrokenProcessPool as e:
+            # Воркер погиб (например, OOM killer) - пересоздаём пул для следующих вызовов
+            if self._pool is pool:
+                print(f"⚠️ Пул исполнения кода сломан, пересоздаём: {e}")
+                self.shutdown()
+            return {"input": inp, "output": "", "error": str(e) or "Воркер завершился аварийно", "success": False}
+
+    async def execute(self, code: str, inputs: List[str]) -> List[dict]:
         """Выполняет код на списке входных данных.
-        
+
         Args:
             code: Python код для выполнения
             inputs: Список входных данных (каждый - строка)
-            
+
         Returns:
-            List[dict]: Результаты выполнения для каждого теста
-        
+            List[dict]: Результаты выполнения для каждого теста в порядке inputs
+
         Предполагается, что код читает из stdin и выводит в stdout.
         """
-        passed_count = 0
-        results = []
-        
-        for i, inp in enumerate(inputs):
-            # Захватываем stdout и stderr
-            stdout_capture = io.StringIO()
-            stderr_capture = io.StringIO()
-            
-            success = False
-            output = ""
-            error = ""
-            
-            try:
-                # Подготавливаем входные данные
-                stdin_capture = io.StringIO(inp)
-                
-                # Выполняем в отдельном контексте для захвата I/O
-                with contextlib.redirect_stdout(stdout_capture), \
-                     contextlib.redirect_stderr(stderr_capture), \
-                     contextlib.redirect_stdin(stdin_capture):
-                    
-                    # ОПАСНО: exec() небезопасен. В production используйте Docker.
-                    # Оборачиваем в try/except блок.
-                    exec_globals = {}
-                    try:
-                        exec(code, exec_globals)
-                        success = True
-                    except Exception:
-                        error = traceback.format_exc()
-                        success = False
-                
-                output = stdout_capture.getvalue().strip()
-                if not success:
-                    # Ошибка выполнения
-                    pass
-                
-                # Примечание: У нас нет "ожидаемых выходных данных" для скрытых тестов.
-                # TaskGenerator генерирует только входные данные.
-                # Поэтому мы полагаемся на LLM для проверки корректности выходных данных.
-                # Собираем выходные данные и передаём Evaluator LLM для анализа.
-                
-                results.append({
-                    "input": inp,
-                    "output": output,
-                    "error": error,
-                    "success": success
-                })
-                
-            except Exception as e:
-                results.append({
-                    "input": inp,
-                    "output": "",
-                    "error": str(e),
-                    "success": False
-                })
-        
-        return results
-
-code_executor = CodeExecutor()
+        return list(await asyncio.gather(*(self._run(code, inp) for inp in inputs)))
+
+code_executor = CodeExecutor(
+    workers=settings.CODE_EXECUTOR_WORKERS,
+    wall_seconds=settings.CODE_EXECUTOR_WALL_TIMEOUT_SECONDS,
+    cpu_seconds=settings.CODE_EXECUTOR_CPU_TIMEOUT_SECONDS,
+    memory_mb=settings.CODE_EXECUTOR_MEMORY_LIMIT_MB,
+    max_output_bytes=settings.CODE_EXECUTOR_MAX_OUTPUT_BYTES,
+)
@@ -43,7 +43,8 @@ class CommunicationEvaluator:
                 {"role": "system", "content": "Ты технический интервьюер. Всегда отвечай на русском языке."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.5
+            temperature=0.5,
+            priority="interactive"
         )
         
     async def generate_followup_question(self, problem_desc: str, code: str) -> str:
@@ -69,7 +70,8 @@ class CommunicationEvaluator:
         return await llm_client.generate(
             model=settings.MODEL_AWQ, 
             messages=[{"role": "user", "content": prompt}],
-            temperature=0.7
+            temperature=0.7,
+            priority="interactive"
         )
 
 communication_service = CommunicationEvaluator()
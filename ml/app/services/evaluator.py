@@ -6,17 +6,18 @@ from app.models.schemas import EvaluationRequest, EvaluationResult
 class Evaluator:
     """Оценщик кода: запускает тесты и анализирует качество с помощью LLM."""
     
-    async def evaluate_submission(self, request: EvaluationRequest) -> EvaluationResult:
+    async def evaluate_submission(self, request: EvaluationRequest, priority: str = "default") -> EvaluationResult:
         """Оценивает решение кандидата.
         
         Args:
             request: Запрос с кодом, описанием задачи и скрытыми тестами
+            priority: Класс приоритета запроса к LLM (batch для пакетной оценки)
             
         Returns:
             EvaluationResult: Результат оценки с метриками и обратной связью
         """
         # 1. Выполняем код на скрытых тестах
-        execution_results = code_executor.execute(request.code, request.hidden_tests)
+        execution_results = await code_executor.execute(request.code, request.hidden_tests)
         
         # 2. Анализируем с помощью LLM (Coder модель)
         # Отправляем задачу, код и результаты выполнения в LLM
@@ -29,7 +30,8 @@ class Evaluator:
                 {"role": "system", "content": "Ты эксперт по ревью кода и оценке решений алгоритмических задач. Всегда отвечай на русском языке."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.2
+            temperature=0.2,
+            priority=priority
         )
         
         return EvaluationResult(
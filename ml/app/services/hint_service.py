@@ -85,7 +85,10 @@ class HintService:
                 {"role": "system", "content": "Ты эксперт по созданию обучающих подсказок для алгоритмических задач. Всегда отвечай на русском языке."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.7
+            temperature=0.7,
+            priority="interactive",
+            # Первые запросы подсказок к задаче приходят одновременно - хватит одной генерации
+            coalesce=True
         )
         
         # Формируем список подсказок с штрафами
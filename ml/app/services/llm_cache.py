@@ -0,0 +1,116 @@
+"""Дисковый кэш ответов LLM (SQLite)."""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+
+class LLMCache:
+    """Кэш ответов LLM по каноническому хэшу запроса.
+
+    Хранится в SQLite, поэтому переживает рестарт сервиса. Запись живёт ttl_seconds,
+    при превышении max_entries вытесняются давно не читавшиеся записи (LRU по accessed_at).
+    Любая ошибка диска считается промахом: кэш не должен ломать генерацию.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int, max_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "errors": 0}
+
+    @staticmethod
+    def make_key(payload: Dict[str, Any]) -> str:
+        """Ключ запроса: модель, сообщения и параметры генерации в каноническом JSON."""
+        canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_accessed_at ON llm_cache (accessed_at)")
+            self._conn = conn
+        return self._conn
+
+    def _get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return value
+
+    def _put(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            (count,) = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+            overflow = count - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN "
+                    "(SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?)",
+                    (overflow,),
+                )
+                self._stats["evictions"] += overflow
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            value = await asyncio.to_thread(self._get, key)
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️ Ошибка чтения кэша LLM: {e}")
+            self._stats["errors"] += 1
+            value = None
+        self._stats["hits" if value is not None else "misses"] += 1
+        return value
+
+    async def put(self, key: str, value: str) -> None:
+        try:
+            await asyncio.to_thread(self._put, key, value)
+            self._stats["stores"] += 1
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️ Ошибка записи кэша LLM: {e}")
+            self._stats["errors"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else None,
+        }
+
+
+llm_cache = LLMCache(
+    path=settings.LLM_CACHE_PATH,
+    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+    max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+)
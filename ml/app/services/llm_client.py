@@ -1,7 +1,25 @@
+import asyncio
 import httpx
 import json
-from typing import List, Dict, Any, Optional
+import re
+from typing import List, Dict, Any, Optional, Tuple
 from app.core.config import settings
+from app.services.llm_cache import llm_cache
+from app.services.llm_limiter import estimate_tokens, llm_limiter
+from app.services.llm_resilience import (
+    CircuitBreaker,
+    LLMCircuitOpenError,
+    LLMError,
+    LLMTransientError,
+    backoff_delay,
+    parse_retry_after,
+)
+
+# Просьба исправить ответ, который не распарсился как JSON
+JSON_REPAIR_PROMPT = (
+    "Твой предыдущий ответ не является корректным JSON ({error}). "
+    "Верни тот же ответ в виде одного корректного JSON объекта, без пояснений и markdown."
+)
 
 class LLMClient:
     """Клиент для работы с LLM моделями SciBox (OpenAI-compatible API)."""
@@ -15,29 +33,30 @@ class LLMClient:
             "Content-Type": "application/json"
         }
         # Отключаем проверку SSL для внутренних сетей
-        self.timeout = httpx.Timeout(60.0, connect=10.0)
+        self.timeout = httpx.Timeout(settings.LLM_TIMEOUT_SECONDS, connect=settings.LLM_CONNECT_TIMEOUT_SECONDS)
         self.verify_ssl = False  # Для приватных сетей SciBox
+        # Запросы в полёте по ключу запроса (single-flight)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._coalesced = 0
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._metrics: Dict[str, Any] = {
+            "requests": 0,
+            "failures": 0,
+            "retries": 0,
+            "retry_reasons": {},
+            "circuit_rejections": 0,
+            "json_repairs": 0,
+            "json_repair_failures": 0,
+        }
 
-    async def generate(
-        self, 
-        model: str, 
-        messages: List[Dict[str, str]], 
-        temperature: float = 0.7,
-        max_tokens: int = 2048,
-        json_mode: bool = False
-    ) -> str:
-        """Генерирует текстовый ответ от LLM.
-        
-        Args:
-            model: Название модели
-            messages: Список сообщений для чата
-            temperature: Температура генерации (0.0-1.0)
-            max_tokens: Максимальное количество токенов
-            json_mode: Режим JSON ответа
-            
-        Returns:
-            str: Сгенерированный текст
-        """
+    def _build_payload(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        json_mode: bool
+    ) -> Dict[str, Any]:
         payload = {
             "model": model,
             "messages": messages,
@@ -47,7 +66,10 @@ class LLMClient:
         
         if json_mode:
             payload["response_format"] = {"type": "json_object"}
+        return payload
 
+    async def _request(self, payload: Dict[str, Any]) -> Tuple[str, Optional[int]]:
+        """Один запрос chat/completions к upstream: текст ответа и usage.total_tokens."""
         async with httpx.AsyncClient(timeout=self.timeout, verify=self.verify_ssl) as client:
             try:
                 print(f"🔗 Отправляем запрос к: {self.base_url}/chat/completions")
@@ -61,29 +83,193 @@ class LLMClient:
                 )
                 response.raise_for_status()
                 data = response.json()
-                return data["choices"][0]["message"]["content"]
+                content = data["choices"][0]["message"]["content"]
+                total_tokens = (data.get("usage") or {}).get("total_tokens")
             except httpx.ConnectError as e:
                 error_msg = f"Не удается подключиться к SciBox API. Проверьте интернет соединение. URL: {self.base_url}. Ошибка: {e}"
                 print(f"❌ {error_msg}")
-                raise Exception(error_msg)
+                raise LLMTransientError(error_msg, reason="connect")
             except httpx.HTTPStatusError as e:
-                error_msg = f"API вернул HTTP ошибку {e.response.status_code}: {e.response.text}"
+                status = e.response.status_code
+                error_msg = f"API вернул HTTP ошибку {status}: {e.response.text}"
+                print(f"❌ {error_msg}")
+                if status == 429:
+                    retry_after = parse_retry_after(e.response.headers.get("Retry-After"))
+                    raise LLMTransientError(error_msg, reason="429", retry_after=retry_after)
+                if status >= 500:
+                    raise LLMTransientError(error_msg, reason="5xx")
+                raise LLMError(error_msg, reason=str(status))
+            except httpx.ConnectTimeout as e:
+                error_msg = f"Таймаут подключения к LLM API: {e}"
                 print(f"❌ {error_msg}")
-                raise Exception(error_msg)
+                raise LLMTransientError(error_msg, reason="connect_timeout")
             except httpx.TimeoutException as e:
+                # Не повторяем: ещё одно ожидание в LLM_TIMEOUT_SECONDS держало бы воркер слишком долго
                 error_msg = f"Таймаут при обращении к LLM API: {e}"
                 print(f"❌ {error_msg}")
-                raise Exception(error_msg)
+                raise LLMError(error_msg, reason="timeout")
             except Exception as e:
                 error_msg = f"Неожиданная ошибка LLM клиента ({type(e).__name__}): {e}"
                 print(f"❌ {error_msg}")
-                raise Exception(error_msg)
+                raise LLMError(error_msg)
+        return content, total_tokens
+
+    async def _limited_request(self, payload: Dict[str, Any], priority: str) -> str:
+        """Запрос к upstream в пределах лимитов модели (параллелизм, запросы/с, токены/мин)."""
+        limiter = llm_limiter.for_model(payload["model"])
+        cost = estimate_tokens(payload["messages"], payload["max_tokens"])
+        await limiter.acquire(priority, cost)
+        try:
+            content, total_tokens = await self._request(payload)
+        finally:
+            limiter.release()
+        limiter.settle(cost, total_tokens)
+        return content
+
+    def _breaker(self, model: str) -> CircuitBreaker:
+        breaker = self._breakers.get(model)
+        if breaker is None:
+            breaker = CircuitBreaker(settings.LLM_BREAKER_FAILURE_THRESHOLD, settings.LLM_BREAKER_RESET_SECONDS)
+            self._breakers[model] = breaker
+        return breaker
+
+    async def _call_upstream(self, payload: Dict[str, Any], priority: str) -> str:
+        """Запрос с повторами временных сбоев и circuit breaker модели.
+
+        Соединение, 5xx и 429 повторяются до LLM_RETRY_MAX_ATTEMPTS раз с паузой
+        full jitter (для 429 - не меньше Retry-After). Пока breaker открыт, запросы
+        к модели сразу завершаются LLMCircuitOpenError.
+        """
+        model = payload["model"]
+        breaker = self._breaker(model)
+        attempts = max(1, settings.LLM_RETRY_MAX_ATTEMPTS)
+        for attempt in range(attempts):
+            retry_in = breaker.check()
+            if retry_in is not None:
+                self._metrics["circuit_rejections"] += 1
+                raise LLMCircuitOpenError(model, retry_in)
+            self._metrics["requests"] += 1
+            try:
+                content = await self._limited_request(payload, priority)
+            except LLMTransientError as e:
+                # 429 - upstream жив и просит подождать, на breaker это не влияет
+                if e.reason == "429":
+                    breaker.release_probe()
+                else:
+                    breaker.record_failure()
+                delay = backoff_delay(attempt, settings.LLM_RETRY_BASE_DELAY, settings.LLM_RETRY_MAX_DELAY)
+                if e.retry_after is not None:
+                    delay = max(delay, e.retry_after)
+                if attempt + 1 >= attempts or delay > settings.LLM_RETRY_MAX_DELAY:
+                    self._metrics["failures"] += 1
+                    raise
+                self._metrics["retries"] += 1
+                reasons = self._metrics["retry_reasons"]
+                reasons[e.reason] = reasons.get(e.reason, 0) + 1
+                print(f"🔄 Повтор запроса к LLM через {delay:.1f} с (попытка {attempt + 2}/{attempts}, {e.reason})")
+                await asyncio.sleep(delay)
+            except LLMError as e:
+                if e.reason == "timeout":
+                    breaker.record_failure()
+                else:
+                    breaker.release_probe()
+                self._metrics["failures"] += 1
+                raise
+            except BaseException:
+                breaker.release_probe()
+                raise
+            else:
+                breaker.record_success()
+                return content
+
+    def _cache_key(self, payload: Dict[str, Any], cache: Optional[bool]) -> Optional[str]:
+        """Ключ дискового кэша или None, если запрос кэшировать не нужно."""
+        if cache is None:
+            cache = payload["temperature"] <= settings.LLM_CACHE_MAX_TEMPERATURE
+        if not cache or not settings.LLM_CACHE_ENABLED:
+            return None
+        return llm_cache.make_key(payload)
+
+    async def generate(
+        self, 
+        model: str, 
+        messages: List[Dict[str, str]], 
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        json_mode: bool = False,
+        cache: Optional[bool] = None,
+        priority: str = "default",
+        coalesce: bool = False
+    ) -> str:
+        """Генерирует текстовый ответ от LLM.
+        
+        Args:
+            model: Название модели
+            messages: Список сообщений для чата
+            temperature: Температура генерации (0.0-1.0)
+            max_tokens: Максимальное количество токенов
+            json_mode: Режим JSON ответа
+            cache: Использовать дисковый кэш ответов. None - только при
+                temperature <= LLM_CACHE_MAX_TEMPERATURE, False - никогда
+            priority: Класс приоритета в очереди к модели: interactive, default, batch
+            coalesce: Одинаковые одновременные запросы разделяют один вызов upstream.
+                Только для запросов, где одинаковый ответ желателен (подсказки), но не для
+                генерации, которая должна давать разные варианты
+            
+        Returns:
+            str: Сгенерированный текст
+        """
+        payload = self._build_payload(model, messages, temperature, max_tokens, json_mode)
+        cache_key = self._cache_key(payload, cache)
+        if cache_key:
+            cached = await llm_cache.get(cache_key)
+            if cached is not None:
+                print(f"💾 Ответ LLM взят из кэша ({cache_key[:12]})")
+                return cached
+
+        if not coalesce:
+            content = await self._call_upstream(payload, priority)
+            if cache_key:
+                await llm_cache.put(cache_key, content)
+            return content
+
+        # Одинаковые одновременные запросы разделяют один вызов upstream
+        flight_key = cache_key or llm_cache.make_key(payload)
+        inflight = self._inflight.get(flight_key)
+        if inflight is not None:
+            self._coalesced += 1
+            print(f"🔁 Ожидаем такой же запрос к LLM, уже отправленный ({flight_key[:12]})")
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[flight_key] = future
+        try:
+            content = await self._call_upstream(payload, priority)
+        except Exception as e:
+            future.set_exception(e)
+            # Исключение уже передано ожидающим; помечаем как полученное
+            future.exception()
+            raise
+        else:
+            future.set_result(content)
+        finally:
+            self._inflight.pop(flight_key, None)
+            if not future.done():
+                # Вызов отменён - ожидающие получат CancelledError, а не зависнут
+                future.cancel()
+
+        if cache_key:
+            await llm_cache.put(cache_key, content)
+        return content
 
     async def generate_json(
         self, 
         model: str, 
         messages: List[Dict[str, str]], 
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        cache: Optional[bool] = None,
+        priority: str = "default",
+        coalesce: bool = False
     ) -> Dict[str, Any]:
         """Генерирует JSON ответ от LLM.
         
@@ -94,6 +280,9 @@ class LLMClient:
             model: Название модели
             messages: Список сообщений
             temperature: Температура генерации
+            cache: Как в generate; в кэш попадают только ответы, которые удалось распарсить
+            priority: Как в generate
+            coalesce: Как в generate (повтор при невалидном JSON не объединяется)
             
         Returns:
             Dict[str, Any]: Спарсенный JSON ответ
@@ -102,14 +291,47 @@ class LLMClient:
         if messages and "json" not in messages[-1].get("content", "").lower():
              messages[-1]["content"] += "\n\nPlease respond with valid JSON."
 
-        content = await self.generate(model, messages, temperature, json_mode=True)
+        cache_key = self._cache_key(self._build_payload(model, messages, temperature, 2048, True), cache)
+        raw_content = await llm_cache.get(cache_key) if cache_key else None
+        from_cache = raw_content is not None
+        if not from_cache:
+            raw_content = await self.generate(
+                model, messages, temperature, json_mode=True, cache=False, priority=priority, coalesce=coalesce
+            )
+        print(f"📝 Получен ответ от LLM (первые 500 символов): {raw_content[:500]}")
         
-        print(f"📝 Получен ответ от LLM (первые 500 символов): {content[:500]}")
+        try:
+            parsed = self._parse_json(raw_content)
+        except json.JSONDecodeError as e:
+            print(f"❌ Не удалось распарсить JSON: {e}")
+            print(f"📄 Полный контент: {raw_content}")
+            # Один повтор: показываем модели её ответ и ошибку разбора
+            self._metrics["json_repairs"] += 1
+            repair_messages = messages + [
+                {"role": "assistant", "content": raw_content},
+                {"role": "user", "content": JSON_REPAIR_PROMPT.format(error=e)},
+            ]
+            raw_content = await self.generate(
+                model, repair_messages, 0.0, json_mode=True, cache=False, priority=priority
+            )
+            try:
+                parsed = self._parse_json(raw_content)
+            except json.JSONDecodeError as repair_error:
+                self._metrics["json_repair_failures"] += 1
+                print(f"❌ Исправленный ответ тоже не JSON: {repair_error}")
+                raise ValueError("Модель не вернула корректный JSON")
+            print("🩹 JSON исправлен повторным запросом")
         
+        if cache_key and not from_cache:
+            await llm_cache.put(cache_key, raw_content)
+        return parsed
+
+    @staticmethod
+    def _parse_json(content: str) -> Any:
+        """Разбирает ответ модели как JSON, убирая <think> и markdown обёртку."""
         # Очистка от тегов <think> и других артефактов
         if "<think>" in content:
             # Удаляем все между <think> и </think>
-            import re
             content = re.sub(r'<think>.*?</think>', '', content, flags=re.DOTALL)
             print(f"🧹 Удалены теги <think>, новая длина: {len(content)}")
         
@@ -119,24 +341,25 @@ class LLMClient:
         elif "```" in content:
             content = content.split("```")[1].split("```")[0].strip()
             
-        try:
-            parsed = json.loads(content)
-            print(f"✅ JSON успешно распарсен, ключи: {list(parsed.keys()) if isinstance(parsed, dict) else 'not a dict'}")
-            
-            # Если LLM вернул JSON с ключом 'content', извлекаем его
-            if isinstance(parsed, dict) and 'content' in parsed and isinstance(parsed['content'], str):
-                print(f"🔄 Обнаружен вложенный JSON в поле 'content', извлекаем...")
-                try:
-                    parsed = json.loads(parsed['content'])
-                    print(f"✅ Вложенный JSON распарсен, ключи: {list(parsed.keys()) if isinstance(parsed, dict) else 'not a dict'}")
-                except json.JSONDecodeError:
-                    print(f"⚠️ Не удалось распарсить вложенный JSON, используем исходный")
-            
-            return parsed
-        except json.JSONDecodeError as e:
-            # Здесь можно добавить логику повторных попыток
-            print(f"❌ Не удалось распарсить JSON: {e}")
-            print(f"📄 Полный контент: {content}")
-            raise ValueError("Модель не вернула корректный JSON")
+        parsed = json.loads(content)
+        print(f"✅ JSON успешно распарсен, ключи: {list(parsed.keys()) if isinstance(parsed, dict) else 'not a dict'}")
+        
+        # Если LLM вернул JSON с ключом 'content', извлекаем его
+        if isinstance(parsed, dict) and 'content' in parsed and isinstance(parsed['content'], str):
+            print(f"🔄 Обнаружен вложенный JSON в поле 'content', извлекаем...")
+            try:
+                parsed = json.loads(parsed['content'])
+                print(f"✅ Вложенный JSON распарсен, ключи: {list(parsed.keys()) if isinstance(parsed, dict) else 'not a dict'}")
+            except json.JSONDecodeError:
+                print(f"⚠️ Не удалось распарсить вложенный JSON, используем исходный")
+        return parsed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "inflight": len(self._inflight),
+            "coalesced": self._coalesced,
+            **self._metrics,
+            "breakers": {model: breaker.stats() for model, breaker in self._breakers.items()},
+        }
 
 llm_client = LLMClient()
@@ -0,0 +1,169 @@
+"""Ограничение нагрузки на upstream LLM: параллелизм, rate limit и приоритеты."""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+# Классы приоритета: меньше - важнее. Интерактивные запросы (подсказки, follow-up)
+# обгоняют фоновую работу (генерацию задач) в очереди к модели
+PRIORITIES = {"interactive": 0, "default": 1, "batch": 2}
+
+# Сколько последних ожиданий учитывать в метриках
+_WAIT_SAMPLES = 500
+
+
+def estimate_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+    """Грубая оценка стоимости запроса: ~4 символа на токен промпта плюс лимит ответа."""
+    prompt_chars = sum(len(message.get("content", "")) for message in messages)
+    return prompt_chars // 4 + max_tokens
+
+
+class TokenBucket:
+    """Token bucket: rate единиц в секунду, не больше capacity в запасе. rate <= 0 - без лимита."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, amount: float) -> float:
+        """Через сколько секунд в ведре будет amount единиц (0 - уже есть)."""
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        if self.rate > 0:
+            self._refill()
+            self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, amount: float) -> None:
+        """Доплатить (или вернуть) разницу между оценкой и фактическим расходом."""
+        if self.rate > 0:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class ModelLimiter:
+    """Лимиты одной модели: не больше max_concurrency запросов одновременно,
+    requests_per_second и tokens_per_minute через token bucket.
+
+    Ожидающие запросы выстраиваются по (приоритет, порядок поступления): слот и
+    токены всегда достаются самому важному из ожидающих.
+    """
+
+    def __init__(self, max_concurrency: int, requests_per_second: float, tokens_per_minute: float):
+        self.max_concurrency = max(1, max_concurrency)
+        self.requests = TokenBucket(requests_per_second, requests_per_second)
+        self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute)
+        self._active = 0
+        self._waiters: List[Tuple[int, int, float, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._waits: Dict[str, Deque[float]] = {name: deque(maxlen=_WAIT_SAMPLES) for name in PRIORITIES}
+
+    async def acquire(self, priority: str, cost: float) -> None:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (PRIORITIES.get(priority, PRIORITIES["default"]), next(self._seq), cost, future))
+        started = time.monotonic()
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Слот уже выдан, но запрос отменили - возвращаем его следующему
+                self.release()
+            else:
+                self._dispatch()
+            raise
+        self._waits.setdefault(priority, deque(maxlen=_WAIT_SAMPLES)).append(time.monotonic() - started)
+
+    def release(self) -> None:
+        self._active -= 1
+        self._dispatch()
+
+    def settle(self, estimated: float, actual: Optional[int]) -> None:
+        """Учесть фактический расход токенов из ответа (usage.total_tokens)."""
+        if actual is not None:
+            self.tokens.adjust(actual - estimated)
+
+    def _dispatch(self) -> None:
+        while self._waiters and self._active < self.max_concurrency:
+            _, _, cost, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            delay = max(self.requests.delay(1), self.tokens.delay(cost))
+            if delay > 0:
+                # Голова очереди ждёт пополнения ведра; остальные - за ней
+                if self._timer is None:
+                    self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+                return
+            heapq.heappop(self._waiters)
+            self.requests.take(1)
+            self.tokens.take(cost)
+            self._active += 1
+            future.set_result(None)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        waits = {}
+        for name, samples in self._waits.items():
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            waits[name] = {
+                "count": len(ordered),
+                "avg_ms": round(sum(ordered) / len(ordered) * 1000),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000),
+                "max_ms": round(ordered[-1] * 1000),
+            }
+        return {
+            "active": self._active,
+            "queued": sum(1 for waiter in self._waiters if not waiter[3].done()),
+            "queue_wait": waits,
+        }
+
+
+class LLMLimiter:
+    """Лимитеры по моделям; параметры - LLM_* из настроек с переопределением в LLM_MODEL_LIMITS."""
+
+    def __init__(self):
+        self._models: Dict[str, ModelLimiter] = {}
+
+    def for_model(self, model: str) -> ModelLimiter:
+        limiter = self._models.get(model)
+        if limiter is None:
+            overrides = settings.LLM_MODEL_LIMITS.get(model, {})
+            limiter = ModelLimiter(
+                max_concurrency=int(overrides.get("max_concurrency", settings.LLM_MAX_CONCURRENCY)),
+                requests_per_second=float(overrides.get("requests_per_second", settings.LLM_REQUESTS_PER_SECOND)),
+                tokens_per_minute=float(overrides.get("tokens_per_minute", settings.LLM_TOKENS_PER_MINUTE)),
+            )
+            self._models[model] = limiter
+        return limiter
+
+    def stats(self) -> Dict[str, Any]:
+        return {model: limiter.stats() for model, limiter in self._models.items()}
+
+
+llm_limiter = LLMLimiter()
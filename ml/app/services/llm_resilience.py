@@ -0,0 +1,111 @@
+"""Обработка сбоев upstream LLM: типы ошибок, отсрочка повторов и circuit breaker."""
+
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+
+class LLMError(Exception):
+    """Ошибка обращения к LLM. retryable - имеет смысл повторить запрос."""
+
+    retryable = False
+
+    def __init__(self, message: str, reason: str = "error"):
+        super().__init__(message)
+        self.reason = reason
+
+
+class LLMTransientError(LLMError):
+    """Временный сбой: нет соединения, 5xx, 429, таймаут подключения."""
+
+    retryable = True
+
+    def __init__(self, message: str, reason: str, retry_after: Optional[float] = None):
+        super().__init__(message, reason)
+        self.retry_after = retry_after
+
+
+class LLMCircuitOpenError(LLMError):
+    """Upstream модели недавно падал подряд - запрос отклонён без обращения к нему."""
+
+    def __init__(self, model: str, retry_in: float):
+        super().__init__(
+            f"LLM {model} временно недоступен, следующая попытка через {retry_in:.0f} с",
+            reason="circuit_open",
+        )
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After в секундах: число секунд или HTTP-дата."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full jitter: случайная пауза от 0 до base * 2^attempt, не больше cap."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Circuit breaker одной модели.
+
+    После failure_threshold сбоев подряд переходит в open и reset_seconds отклоняет
+    запросы сразу. Затем пропускает один пробный запрос (half_open): успех закрывает
+    breaker, сбой снова открывает его.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def check(self) -> Optional[float]:
+        """None - запрос можно отправлять, иначе через сколько секунд breaker откроет пробу."""
+        if self.state == "closed":
+            return None
+        retry_in = self._opened_at + self.reset_seconds - time.monotonic()
+        if self.state == "open" and retry_in <= 0:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return None
+        return max(retry_in, 0.0)
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.opened += 1
+            self.state = "open"
+            self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Пробный запрос завершился без вердикта о здоровье upstream (например, 4xx)."""
+        self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self.failures, "opened": self.opened}
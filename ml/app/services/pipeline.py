@@ -0,0 +1,53 @@
+"""Конвейер асинхронных этапов с зависимостями."""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+
+class StagePipeline:
+    """Граф этапов: каждый этап стартует, как только готовы его зависимости.
+
+    Этап - корутинная функция, получающая результаты зависимостей именованными
+    аргументами. Независимые этапы выполняются одновременно, поэтому общее время -
+    критический путь графа, а не сумма этапов. Время этапа считается от готовности
+    зависимостей до завершения. Ошибка любого этапа отменяет остальные.
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, Tuple[Callable[..., Awaitable[Any]], List[str]]] = {}
+        self.timings_ms: Dict[str, int] = {}
+
+    def add(self, name: str, func: Callable[..., Awaitable[Any]], depends_on: Tuple[str, ...] = ()) -> None:
+        missing = [dep for dep in depends_on if dep not in self._stages]
+        if missing:
+            # Зависимости объявляются раньше этапа - так граф не может содержать циклов
+            raise ValueError(f"Этап {name} зависит от необъявленных этапов: {missing}")
+        self._stages[name] = (func, list(depends_on))
+
+    async def run(self) -> Dict[str, Any]:
+        """Выполняет все этапы и возвращает их результаты по имени."""
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(name: str) -> Any:
+            func, depends_on = self._stages[name]
+            kwargs = {dep: await tasks[dep] for dep in depends_on}
+            started = time.perf_counter()
+            try:
+                return await func(**kwargs)
+            finally:
+                self.timings_ms[name] = round((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        for name in self._stages:
+            tasks[name] = asyncio.create_task(run_stage(name))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        finally:
+            self.timings_ms["total"] = round((time.perf_counter() - started) * 1000)
+        return {name: task.result() for name, task in tasks.items()}
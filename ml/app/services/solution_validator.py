@@ -0,0 +1,122 @@
+"""Проверка эталонных решений задачи в executor и замер времени и памяти."""
+
+import math
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+
+# Главный файл программы для executor по языку
+MAIN_FILES = {
+    "python": "main.py",
+    "go": "main.go",
+    "java": "Main.java",
+    "typescript": "main.ts",
+}
+
+
+class SolutionValidator:
+    """Прогоняет эталонные решения всех языков на тестах задачи через executor.
+
+    Все решения уходят одним запросом /execute/batch и выполняются в тех же
+    песочницах, что и решения кандидатов. Решение считается верным, если прошло
+    все тесты; по процессорному времени самого медленного теста и пиковому RSS верного
+    решения выводятся лимиты времени и памяти задачи для его языка. Рантаймы расходятся
+    в разы (JVM и Node против Python), поэтому для непроверенных языков лимиты не
+    задаются - executor применяет к ним свои значения по умолчанию.
+    """
+
+    def __init__(self):
+        self.base_url = settings.EXECUTOR_SERVICE_URL.rstrip("/")
+        # Один клиент на процесс: соединения с executor переиспользуются между задачами
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=settings.TASK_VALIDATION_REQUEST_TIMEOUT_SECONDS)
+        return self._client
+
+    async def close(self) -> None:
+        """Закрывает соединения с executor (при остановке сервиса)."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def time_limit_ms(self, max_cpu_ms: int) -> int:
+        """Лимит времени теста: замер * множитель, округлённый вверх до 100 мс, в пределах [MIN, MAX]."""
+        limit = math.ceil(max_cpu_ms * settings.TASK_TIME_LIMIT_FACTOR / 100) * 100
+        return max(settings.TASK_TIME_LIMIT_MIN_MS, min(settings.TASK_TIME_LIMIT_MAX_MS, limit))
+
+    def memory_limit_mb(self, max_peak_kb: int) -> int:
+        """Лимит памяти теста: замер * множитель, округлённый вверх до 16 МБ, в пределах [MIN, MAX]."""
+        limit = math.ceil(max_peak_kb * settings.TASK_MEMORY_LIMIT_FACTOR / 1024 / 16) * 16
+        return max(settings.TASK_MEMORY_LIMIT_MIN_MB, min(settings.TASK_MEMORY_LIMIT_MAX_MB, limit))
+
+    async def validate(self, solutions: Dict[str, str], test_cases: List[Dict[str, str]]) -> Dict[str, Any]:
+        """Проверяет решения на тестах.
+
+        Args:
+            solutions: Эталонные решения {язык: код}
+            test_cases: Тесты [{"input": ..., "output": ...}]
+
+        Returns:
+            dict: validated (executor ответил), languages - итог по каждому языку
+                (passed, passed_tests, total_tests, failed_tests, max_ms, total_ms, max_cpu_ms,
+                max_peak_kb, error) и limits - {язык: {time_limit_ms, memory_limit_mb}}
+                для прошедших тесты языков
+        """
+        programs = [
+            {"language": language, "files": {MAIN_FILES[language]: code}}
+            for language, code in solutions.items()
+            if code and language in MAIN_FILES
+        ]
+        if not programs or not test_cases:
+            return {"validated": False, "languages": {}, "limits": {}, "error": "Нечего проверять"}
+
+        payload = {
+            "programs": programs,
+            "test_cases": test_cases,
+            "timeout": settings.TASK_VALIDATION_TIMEOUT_SECONDS,
+        }
+        try:
+            response = await self._get_client().post(f"{self.base_url}/execute/batch", json=payload)
+            response.raise_for_status()
+            results = response.json()["results"]
+        except Exception as e:
+            print(f"⚠️ Не удалось проверить эталонные решения в executor: {e}")
+            return {"validated": False, "languages": {}, "limits": {}, "error": str(e) or type(e).__name__}
+
+        languages: Dict[str, Dict[str, Any]] = {}
+        for result in results:
+            languages[result["language"]] = {
+                "passed": result.get("verdict") == "ACCEPTED",
+                "passed_tests": result.get("passed", 0),
+                "total_tests": result.get("total", 0),
+                "max_ms": result.get("max_duration_ms", 0),
+                "total_ms": result.get("total_duration_ms", 0),
+                "max_cpu_ms": result.get("max_cpu_time_ms", 0),
+                "max_peak_kb": result.get("max_peak_memory_kb", 0),
+                "failed_tests": [
+                    test["test_index"] for test in result.get("test_results") or [] if not test.get("passed")
+                ][:20],
+                "error": (result.get("error") or "")[:500] or None,
+            }
+        limits: Dict[str, Dict[str, int]] = {
+            language: {
+                "time_limit_ms": self.time_limit_ms(info["max_cpu_ms"]),
+                "memory_limit_mb": self.memory_limit_mb(info["max_peak_kb"]),
+            }
+            for language, info in languages.items()
+            if info["passed"]
+        }
+        summary = ", ".join(
+            f"{language}: {info['passed_tests']}/{info['total_tests']} за {info['max_cpu_ms']} мс CPU, "
+            f"{info['max_peak_kb'] // 1024} МБ"
+            for language, info in languages.items()
+        )
+        print(f"🧪 Проверка эталонных решений: {summary}; лимиты по языкам {limits}")
+        return {"validated": True, "languages": languages, "limits": limits}
+
+
+solution_validator = SolutionValidator()
@@ -3,72 +3,170 @@ from app.services.llm_client import llm_client
 from app.models.schemas import Task
 from app.services.hint_service import hint_service
 from app.services.code_executor import code_executor
+from app.services.pipeline import StagePipeline
+from app.services.solution_validator import solution_validator
 import json
 import re
 
+SUPPORTED_LANGUAGES = {'python', 'go', 'java', 'typescript'}
+
+
+def normalize_language(language: str | None) -> str:
+    """Язык эталонного решения; неподдерживаемые заменяются на python."""
+    preferred_language = (language or 'python').lower()
+    return preferred_language if preferred_language in SUPPORTED_LANGUAGES else 'python'
+
+
 class TaskGenerator:
     """Генератор алгоритмических задач с использованием LLM."""
     
-    async def generate_task(self, difficulty: str, language: str | None = None) -> Task:
+    async def generate_task(
+        self,
+        difficulty: str,
+        language: str | None = None,
+        topic: str | None = None,
+    ) -> Task:
         """Генерирует задачу заданного уровня сложности.
         
         Args:
             difficulty: Уровень сложности ('easy', 'medium', 'hard')
             language: Предпочитаемый язык эталонного решения
+            topic: Тема задачи (необязательно)
             
         Returns:
             Task: Сгенерированная задача с описанием и скрытыми тестами
         """
-        supported_languages = {'python', 'go', 'java', 'typescript'}
-        preferred_language = (language or 'python').lower()
-        if preferred_language not in supported_languages:
-            preferred_language = 'python'
+        preferred_language = normalize_language(language)
+        
+        # Этапы образуют граф: тесты, решение на Python и подсказки зависят только от
+        # условия и генерируются одновременно; outputs ждут тесты и решение на Python
+        pipeline = StagePipeline()
+        pipeline.add("statement", lambda: self._generate_statement(difficulty, topic))
+        pipeline.add("test_inputs", self._generate_test_inputs, depends_on=("statement",))
+        pipeline.add(
+            "python_solution",
+            lambda statement: self._generate_canonical_solution(statement, difficulty, language='python'),
+            depends_on=("statement",),
+        )
+        if preferred_language != 'python':
+            pipeline.add(
+                "language_solution",
+                lambda statement, python_solution: self._generate_canonical_solution(
+                    statement,
+                    difficulty,
+                    language=preferred_language,
+                    reference_solution=python_solution,
+                ),
+                depends_on=("statement", "python_solution"),
+            )
+        pipeline.add(
+            "test_outputs",
+            self._generate_test_cases,
+            depends_on=("statement", "test_inputs", "python_solution"),
+        )
+        # Все эталонные решения прогоняются в executor на готовых тестах
+        validation_deps = ("test_outputs", "python_solution")
+        if preferred_language != 'python':
+            validation_deps += ("language_solution",)
+        pipeline.add(
+            "validation",
+            lambda test_outputs, python_solution, language_solution="": solution_validator.validate(
+                {preferred_language: language_solution, 'python': python_solution},
+                test_outputs,
+            ),
+            depends_on=validation_deps,
+        )
+        pipeline.add(
+            "hints",
+            lambda statement: hint_service.generate_hints(
+                task_description=statement.get("description", ""),
+                task_difficulty=difficulty,
+                input_format=statement.get("input_format", ""),
+                output_format=statement.get("output_format", ""),
+                examples=statement.get("examples", [])
+            ),
+            depends_on=("statement",),
+        )
+        results = await pipeline.run()
+        print(f"⏱️ Этапы генерации задачи (мс): {pipeline.timings_ms}")
+        
+        task_data = results["statement"]
+        validation = results["validation"]
+        canonical_solutions: dict[str, str] = {}
+        python_solution = results["python_solution"]
+        if python_solution:
+            canonical_solutions['python'] = python_solution
+        lang_solution = results.get("language_solution")
+        if lang_solution:
+            canonical_solutions[preferred_language] = lang_solution
+        
+        # Решение, расходящееся с тестами, когда другой язык их прошёл, не сохраняем.
+        # Если не прошёл никто, под подозрением сами outputs - решения оставляем как есть
+        checked = validation.get("languages", {})
+        if any(info["passed"] for info in checked.values()):
+            for checked_language, info in checked.items():
+                if not info["passed"]:
+                    print(f"⚠️ Эталонное решение на {checked_language} не прошло тесты, отбрасываем")
+                    canonical_solutions.pop(checked_language, None)
+            python_solution = canonical_solutions.get('python', "")
+        
+        canonical_for_storage = canonical_solutions.get(preferred_language) or python_solution
+        task_data["canonical_solution"] = canonical_for_storage or None
+        task_data["canonical_solutions"] = canonical_solutions or None
+        
+        # Разбиваем на 3 открытых и 15 закрытых тестов
+        test_cases = results["test_outputs"]
+        open_test_cases = [dict(input=case["input"], output=case["output"]) for case in test_cases[:3]]
+        hidden_test_cases = [dict(input=case["input"], output=case["output"]) for case in test_cases[3:18]]
+        
+        # Сохраняем открытые тесты как examples, закрытые как hidden_tests(+inputs)
+        task_data["examples"] = open_test_cases
+        task_data["hidden_tests_full"] = hidden_test_cases
+        task_data["hidden_tests"] = [case["input"] for case in hidden_test_cases]
+        task_data["difficulty"] = difficulty
+        task_data["hints"] = [hint.dict() for hint in results["hints"]]
+        task_data["generation_timings_ms"] = pipeline.timings_ms
+        task_data["solution_validation"] = validation
+        task_data["resource_limits"] = validation.get("limits") or None
         
-        # 1. Генерируем описание задачи с помощью AWQ модели
+        return Task(**task_data)
+
+    async def _generate_statement(self, difficulty: str, topic: str | None = None) -> dict:
+        """Генерирует условие задачи с помощью AWQ модели."""
         prompt = self._get_generation_prompt(difficulty)
+        if topic:
+            prompt += f"\n        Тема задачи: {topic}.\n"
         
-        task_data = await llm_client.generate_json(
+        return await llm_client.generate_json(
             model=settings.MODEL_AWQ,
             messages=[
                 {"role": "system", "content": "Ты эксперт по созданию алгоритмических задач для собеседований. Генерируй задачи ТОЛЬКО на русском языке."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.8
+            temperature=0.8,
+            priority="batch"
         )
-        
-        # 2. Генерируем тесты, чтобы получить 3 открытых и 15 закрытых вариантов
-        hidden_test_inputs = await self._generate_hidden_tests(task_data) or []
+
+    async def _generate_test_inputs(self, statement: dict) -> list[str]:
+        """Генерирует ровно 18 входов тестов: 3 открытых и 15 закрытых."""
+        hidden_test_inputs = await self._generate_hidden_tests(statement) or []
         
         # Гарантируем, что тестов не менее 18 штук (3 открытых + 15 закрытых)
         while len(hidden_test_inputs) < 18:
             hidden_test_inputs.extend(hidden_test_inputs or ["1\n1"])
-        hidden_test_inputs = hidden_test_inputs[:18]
-        
-        # 3. Генерируем эталонное решение
-        canonical_solutions: dict[str, str] = {}
-        python_solution = await self._generate_canonical_solution(task_data, difficulty, language='python')
-        if python_solution:
-            canonical_solutions['python'] = python_solution
-        
-        if preferred_language != 'python':
-            lang_solution = await self._generate_canonical_solution(
-                task_data,
-                difficulty,
-                language=preferred_language,
-                reference_solution=python_solution,
-            )
-            if lang_solution:
-                canonical_solutions[preferred_language] = lang_solution
-        
-        canonical_for_storage = canonical_solutions.get(preferred_language) or python_solution
-        task_data["canonical_solution"] = canonical_for_storage or None
-        task_data["canonical_solutions"] = canonical_solutions or None
-        
-        # 4. Генерируем outputs для тестов с помощью эталонного решения, если оно есть
+        return hidden_test_inputs[:18]
+
+    async def _generate_test_cases(
+        self,
+        statement: dict,
+        test_inputs: list[str],
+        python_solution: str,
+    ) -> list[dict[str, str]]:
+        """Получает outputs тестов: запуском эталонного решения, иначе через LLM."""
         test_cases: list[dict[str, str]] = []
         if python_solution:
-            executor_results = code_executor.execute(python_solution, hidden_test_inputs)
-            if executor_results and len(executor_results) == len(hidden_test_inputs):
+            executor_results = await code_executor.execute(python_solution, test_inputs)
+            if executor_results and len(executor_results) == len(test_inputs):
                 all_success = all(res.get("success") for res in executor_results)
                 if all_success:
                     test_cases = [
@@ -76,42 +174,20 @@ class TaskGenerator:
                         for res in executor_results
                     ]
         
-        # 5. Если выполнение эталонного решения не удалось, используем LLM для генерации outputs
-        if not test_cases or len(test_cases) < len(hidden_test_inputs):
-            hidden_tests_with_outputs = await self._generate_hidden_test_outputs(task_data, hidden_test_inputs)
+        # Если выполнение эталонного решения не удалось, используем LLM для генерации outputs
+        if not test_cases or len(test_cases) < len(test_inputs):
+            hidden_tests_with_outputs = await self._generate_hidden_test_outputs(statement, test_inputs)
             test_cases = hidden_tests_with_outputs or []
         
         # Фоллбек: если всё равно не получили outputs, создаём пустые пары
         if not test_cases:
-            test_cases = [{"input": inp, "output": ""} for inp in hidden_test_inputs]
+            test_cases = [{"input": inp, "output": ""} for inp in test_inputs]
         
         # Нормализуем длину массива тестов
         while len(test_cases) < 18:
             base = test_cases[len(test_cases) % len(test_cases)]
             test_cases.append({"input": base["input"], "output": base["output"]})
-        test_cases = test_cases[:18]
-        
-        # Разбиваем на 3 открытых и 15 закрытых тестов
-        open_test_cases = [dict(input=case["input"], output=case["output"]) for case in test_cases[:3]]
-        hidden_test_cases = [dict(input=case["input"], output=case["output"]) for case in test_cases[3:18]]
-        
-        # Сохраняем открытые тесты как examples, закрытые как hidden_tests(+inputs)
-        task_data["examples"] = open_test_cases
-        task_data["hidden_tests_full"] = hidden_test_cases
-        task_data["hidden_tests"] = [case["input"] for case in hidden_test_cases]
-        task_data["difficulty"] = difficulty
-        
-        # 5. Генерируем подсказки для задачи
-        hints = await hint_service.generate_hints(
-            task_description=task_data.get("description", ""),
-            task_difficulty=difficulty,
-            input_format=task_data.get("input_format", ""),
-            output_format=task_data.get("output_format", ""),
-            examples=task_data.get("examples", [])
-        )
-        task_data["hints"] = [hint.dict() for hint in hints]
-        
-        return Task(**task_data)
+        return test_cases[:18]
 
     async def _generate_hidden_tests(self, task_data: dict) -> list[str]:
         """Генерирует скрытые тесты для задачи (только inputs).
@@ -142,7 +218,8 @@ class TaskGenerator:
                     {"role": "system", "content": "Ты QA инженер, генерирующий тестовые случаи."},
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.5
+                temperature=0.5,
+                priority="batch"
             )
             sanitized: list[str] = []
             if isinstance(tests, list):
@@ -204,7 +281,8 @@ class TaskGenerator:
                     {"role": "system", "content": "Ты эксперт по алгоритмическим задачам. Генерируй правильные выходные данные для тестов и используй только JSON."},
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.3  # Низкая температура для более точных результатов
+                temperature=0.3,  # Низкая температура для более точных результатов
+                priority="batch"
             )
             
             paired_results: list[dict] = []
@@ -282,6 +360,7 @@ class TaskGenerator:
                 ],
                 temperature=0.15,
                 max_tokens=2048,
+                priority="batch",
             )
             return self._extract_code_block(content)
         except Exception as e:
@@ -0,0 +1,213 @@
+"""Запас заранее сгенерированных задач (SQLite) с фоновым пополнением."""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.models.schemas import Task
+from app.services.task_generator import normalize_language, task_generator
+
+# (difficulty, language, topic); topic "" - без темы
+StockKey = Tuple[str, str, str]
+
+# Сколько неудачных генераций подряд прерывают пополнение ключа
+REFILL_MAX_FAILURES = 3
+REFILL_RETRY_SECONDS = 30.0
+
+
+def make_stock_key(difficulty: str, language: Optional[str], topic: Optional[str]) -> StockKey:
+    return difficulty, normalize_language(language), (topic or "").strip().lower()
+
+
+def is_valid_task(task: Task) -> bool:
+    """В запас попадают только полные задачи: эталонное решение, прошедшее тесты в executor, и все outputs."""
+    hidden_tests = task.hidden_tests_full or []
+    outputs = [example.output for example in task.examples] + [case.get("output", "") for case in hidden_tests]
+    validation = task.solution_validation or {}
+    return (
+        bool(task.canonical_solution)
+        and bool(validation.get("validated"))
+        and any(info.get("passed") for info in validation.get("languages", {}).values())
+        and len(task.examples) == 3
+        and len(hidden_tests) == 15
+        and all(output.strip() for output in outputs)
+    )
+
+
+class TaskStock:
+    """Запас готовых задач по (сложность, язык, тема).
+
+    Задачи хранятся в SQLite и переживают рестарт. pop отдаёт самую старую задачу
+    мгновенно; когда задач по ключу меньше low_watermark, в фоне запускается
+    пополнение до high_watermark. Генерации всех ключей делят refill_concurrency слотов.
+    """
+
+    def __init__(self, path: str, low_watermark: int, high_watermark: int, refill_concurrency: int):
+        self.path = path
+        self.low_watermark = max(0, low_watermark)
+        self.high_watermark = max(self.low_watermark + 1, high_watermark)
+        self.refill_concurrency = max(1, refill_concurrency)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._refills: Dict[StockKey, asyncio.Task] = {}
+        self._stopping = False
+        self._stats = {"hits": 0, "misses": 0, "generated": 0, "rejected": 0, "failed": 0, "errors": 0}
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS task_stock ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, difficulty TEXT NOT NULL, "
+                "language TEXT NOT NULL, topic TEXT NOT NULL, task TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_task_stock_key ON task_stock (difficulty, language, topic, id)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _pop(self, key: StockKey) -> Optional[str]:
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT id, task FROM task_stock WHERE difficulty = ? AND language = ? AND topic = ? "
+                "ORDER BY id LIMIT 1",
+                key,
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("DELETE FROM task_stock WHERE id = ?", (row[0],))
+            return row[1]
+
+    def _push(self, key: StockKey, task: str) -> None:
+        with self._lock:
+            self._connection().execute(
+                "INSERT INTO task_stock (difficulty, language, topic, task, created_at) VALUES (?, ?, ?, ?, ?)",
+                (*key, task, time.time()),
+            )
+
+    def _count(self, key: Optional[StockKey] = None) -> Dict[StockKey, int]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT difficulty, language, topic, COUNT(*) FROM task_stock GROUP BY difficulty, language, topic"
+            ).fetchall()
+        counts = {(difficulty, language, topic): count for difficulty, language, topic, count in rows}
+        return counts if key is None else {key: counts.get(key, 0)}
+
+    async def count(self, key: StockKey) -> int:
+        try:
+            counts = await asyncio.to_thread(self._count, key)
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️ Ошибка чтения запаса задач: {e}")
+            self._stats["errors"] += 1
+            return 0
+        return counts[key]
+
+    async def pop(self, difficulty: str, language: Optional[str], topic: Optional[str] = None) -> Optional[Task]:
+        """Забирает готовую задачу и при необходимости запускает пополнение.
+
+        None - запас пуст или недоступен: вызывающий генерирует задачу сам.
+        """
+        key = make_stock_key(difficulty, language, topic)
+        try:
+            raw = await asyncio.to_thread(self._pop, key)
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️ Ошибка чтения запаса задач: {e}")
+            self._stats["errors"] += 1
+            raw = None
+        task = None
+        if raw is not None:
+            try:
+                task = Task(**json.loads(raw))
+            except (ValueError, TypeError) as e:
+                # Запись из старой версии схемы: _pop её уже удалил
+                print(f"⚠️ Задача из запаса не подходит под схему, отбрасываем: {e}")
+                self._stats["rejected"] += 1
+        self._stats["hits" if task is not None else "misses"] += 1
+        if task is None or await self.count(key) < self.low_watermark:
+            self.schedule_refill(key)
+        return task
+
+    def schedule_refill(self, key: StockKey) -> None:
+        """Запускает фоновое пополнение ключа, если оно ещё не идёт."""
+        if self._stopping or key in self._refills:
+            return
+        self._refills[key] = asyncio.create_task(self._refill(key))
+
+    async def _refill(self, key: StockKey) -> None:
+        difficulty, language, topic = key
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.refill_concurrency)
+        failures = 0
+        try:
+            while not self._stopping and await self.count(key) < self.high_watermark:
+                async with self._semaphore:
+                    try:
+                        task = await task_generator.generate_task(difficulty, language=language, topic=topic or None)
+                    except Exception as e:
+                        print(f"⚠️ Не удалось сгенерировать задачу в запас {key}: {e}")
+                        self._stats["failed"] += 1
+                        task = None
+                if task is not None and is_valid_task(task):
+                    await asyncio.to_thread(self._push, key, task.json())
+                    self._stats["generated"] += 1
+                    failures = 0
+                    continue
+                if task is not None:
+                    self._stats["rejected"] += 1
+                failures += 1
+                if failures >= REFILL_MAX_FAILURES:
+                    print(f"❌ Пополнение запаса {key} остановлено после {failures} неудач подряд")
+                    return
+                await asyncio.sleep(REFILL_RETRY_SECONDS)
+            print(f"📦 Запас задач {key} пополнен")
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️ Ошибка записи запаса задач: {e}")
+            self._stats["errors"] += 1
+        finally:
+            self._refills.pop(key, None)
+
+    def start(self, warm_keys: List[str]) -> None:
+        """Пополняет ключи из TASK_STOCK_WARM_KEYS ("difficulty:language[:topic]")."""
+        self._stopping = False
+        for spec in warm_keys:
+            difficulty, _, rest = spec.partition(":")
+            language, _, topic = rest.partition(":")
+            self.schedule_refill(make_stock_key(difficulty.strip(), language.strip() or None, topic))
+
+    async def stop(self) -> None:
+        self._stopping = True
+        tasks = list(self._refills.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def stats(self) -> Dict[str, Any]:
+        try:
+            counts = await asyncio.to_thread(self._count)
+        except (sqlite3.Error, OSError):
+            counts = {}
+        return {
+            **self._stats,
+            "stock": {":".join(part for part in key if part): count for key, count in counts.items()},
+            "refilling": [":".join(part for part in key if part) for key in self._refills],
+        }
+
+
+task_stock = TaskStock(
+    path=settings.TASK_STOCK_PATH,
+    low_watermark=settings.TASK_STOCK_LOW_WATERMARK,
+    high_watermark=settings.TASK_STOCK_HIGH_WATERMARK,
+    refill_concurrency=settings.TASK_STOCK_REFILL_CONCURRENCY,
+)
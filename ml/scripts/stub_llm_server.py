@@ -0,0 +1,76 @@
+"""Offline OpenAI-compatible stub of the LLM upstream.
+
+Usage: python scripts/stub_llm_server.py [port]
+Then start the ML service with SCIBOX_API_BASE=http://127.0.0.1:<port>/v1.
+
+Every POST /v1/chat/completions is answered deterministically and counted;
+GET /stats returns the number of upstream calls per model. Repeating a request
+with temperature <= LLM_CACHE_MAX_TEMPERATURE must not increase the counter
+(compare with "llm_cache" in the ML service /health).
+"""
+
+import hashlib
+import json
+import sys
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+calls: Counter = Counter()
+
+
+def make_content(payload: dict) -> str:
+    digest = hashlib.sha256(json.dumps(payload["messages"], sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    if (payload.get("response_format") or {}).get("type") == "json_object":
+        return json.dumps({"stub": True, "digest": digest})
+    return f"stub answer {digest}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path.rstrip("/") == "/stats":
+            self._send_json(200, {"total": sum(calls.values()), "by_model": dict(calls)})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self) -> None:  # noqa: N802
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self._send_json(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        calls[payload.get("model", "")] += 1
+        content = make_content(payload)
+        self._send_json(
+            200,
+            {
+                "id": f"stub-{sum(calls.values())}",
+                "object": "chat.completion",
+                "model": payload.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {"total_tokens": len(content) // 4 + 1},
+            },
+        )
+
+
+def main() -> None:
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8099
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    print(f"Stub LLM server on http://127.0.0.1:{port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
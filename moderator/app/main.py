@@ -14,6 +14,12 @@ app = FastAPI(title='VibeCode Moderator Service')
 BACKEND_URL = os.getenv('BACKEND_URL', 'http://localhost:8000/api')
 MODERATOR_TOKEN = os.getenv('MODERATOR_TOKEN', 'moderator_secret_token')
 
+# Один клиент с keep-alive пулом на весь процесс вместо нового соединения на каждый запрос
+backend_client = httpx.AsyncClient(
+    timeout=10.0,
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0),
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=['http://localhost:5173', 'http://127.0.0.1:5173', 'http://localhost:3000'],
@@ -35,6 +41,11 @@ class ApplicationDecision(BaseModel):
     comment: str | None = Field(None, description='Комментарий (опционально)')
 
 
+@app.on_event('shutdown')
+async def on_shutdown():
+    await backend_client.aclose()
+
+
 @app.get('/health')
 async def health():
     return {'status': 'ok', 'service': 'moderator'}
@@ -60,17 +71,16 @@ async def list_applications(moderator_token: str):
             detail='Invalid moderator token'
         )
     
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        response = await client.get(
-            f'{BACKEND_URL}/moderator/applications',
-            headers={'X-Moderator-Token': MODERATOR_TOKEN}
+    response = await backend_client.get(
+        f'{BACKEND_URL}/moderator/applications',
+        headers={'X-Moderator-Token': MODERATOR_TOKEN}
+    )
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=response.text
         )
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=response.text
-            )
-        return response.json()
+    return response.json()
 
 
 @app.get('/applications/{application_id}')
@@ -82,17 +92,16 @@ async def get_application(application_id: str, moderator_token: str):
             detail='Invalid moderator token'
         )
     
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        response = await client.get(
-            f'{BACKEND_URL}/moderator/applications/{application_id}',
-            headers={'X-Moderator-Token': MODERATOR_TOKEN}
+    response = await backend_client.get(
+        f'{BACKEND_URL}/moderator/applications/{application_id}',
+        headers={'X-Moderator-Token': MODERATOR_TOKEN}
+    )
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=response.text
         )
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=response.text
-            )
-        return response.json()
+    return response.json()
 
 
 @app.post('/applications/{application_id}/decide')
@@ -114,16 +123,15 @@ async def decide_application(
             detail='Decision must be "accepted" or "rejected"'
         )
     
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        response = await client.post(
-            f'{BACKEND_URL}/moderator/applications/{application_id}/decide',
-            json=decision.model_dump(),
-            headers={'X-Moderator-Token': MODERATOR_TOKEN}
+    response = await backend_client.post(
+        f'{BACKEND_URL}/moderator/applications/{application_id}/decide',
+        json=decision.model_dump(),
+        headers={'X-Moderator-Token': MODERATOR_TOKEN}
+    )
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=response.text
         )
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=response.text
-            )
-        return response.json()
+    return response.json()
 